@@ -1,20 +1,63 @@
+import functools
+import os
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_wtf import CSRFProtect
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///needlepoint.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+from app.db_profiles import RoutingSession, attach_db_profile, configure_db_profile
 
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-csrf = CSRFProtect(app)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+csrf = CSRFProtect()
 
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'  # Specify the route for the login page
+login_manager.login_view = 'auth.login'  # Specify the route for the login page
+
+
+def create_app(config=None):
+    """Build the application. config (a mapping) overrides the defaults in app.settings.Config.
+
+    Blueprints and the modules behind them are imported here rather than at package
+    import, and heavy libraries (numpy/scipy, Pillow, Flask-Migrate) only where they are
+    used, so workers and tests boot quickly.
+    """
+    app = Flask(__name__)
+    app.config.from_object('app.settings.Config')
+    app.config.from_mapping(config or {})
+    if app.config['RESPONSE_CACHE_PATH'] is None:
+        app.config['RESPONSE_CACHE_PATH'] = os.path.join(app.instance_path, 'response_cache.db')
+
+    configure_db_profile(app)
+    init_database(app)
+    if app.config['PRELOAD_SAFE']:
+        # gunicorn --preload imports the app once and forks workers from it; each child
+        # starts with empty pools so no connection opened before the fork is shared
+        os.register_at_fork(after_in_child=functools.partial(_after_fork, app))
+    csrf.init_app(app)
+    login_manager.init_app(app)
+    if app.config['DB_MIGRATIONS']:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    from app import assets, auth, catalog, commands, fragments, instrumentation, voting
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(catalog.bp)
+    app.register_blueprint(voting.bp)
+    assets.init_app(app)
+    fragments.init_app(app)
+    instrumentation.init_app(app)
+    commands.init_app(app)
+    return app
+
+
+def init_database(app):
+    db.init_app(app)
+    attach_db_profile(app, db)
+
 
-from app import routes, models
+def _after_fork(app):
+    # close=False: the parent still owns those connections, the child just forgets them
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
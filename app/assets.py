@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import current_app, request, send_from_directory
+
+BUILD_DIR = 'dist'
+MANIFEST = 'manifest.json'
+# Uploaded canvas images are already named by their content hash, so they are left where they are
+SKIP_DIRS = {BUILD_DIR, 'canvas_images'}
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico'}
+# Preferred first; only encodings with a file written by build_assets are ever offered
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CONTENT_ADDRESSED = re.compile(r'^canvas_images/[0-9a-f]{64}(_\w+)?\.\w+$')
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def compress(data, ext):
+    """{file suffix: bytes} of each precompressed variant worth keeping (smaller than data)."""
+    if ext not in COMPRESSIBLE:
+        return {}
+    import brotli  # only the build step needs it
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0), '.br': brotli.compress(data, quality=11)}
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+def build_assets(static_folder, progress=lambda source, target: None):
+    """Copy each static asset to dist/ under a content-hashed name, with gzip and brotli variants.
+
+    Writes dist/manifest.json mapping every source path (as passed to url_for('static'))
+    to its fingerprinted path, and returns that mapping. Files from earlier builds are
+    kept, so pages cached before a deploy still find the assets they link to.
+    """
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith('.'):
+                continue
+            source = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+            with open(os.path.join(root, name), 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(source)
+            target = f'{BUILD_DIR}/{stem}.{fingerprint(data)}{ext}'
+            _write(static_folder, target, data)
+            for suffix, body in compress(data, ext.lower()).items():
+                _write(static_folder, target + suffix, body)
+            manifest[source] = target
+            progress(source, target)
+    _write(static_folder, f'{BUILD_DIR}/{MANIFEST}', json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _write(static_folder, filename, data):
+    path = os.path.join(static_folder, *filename.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+
+def load_manifest(app):
+    path = os.path.join(app.static_folder, BUILD_DIR, MANIFEST)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+    app.extensions['asset_manifest'] = manifest
+    app.extensions['asset_files'] = set(manifest.values())
+    return manifest
+
+
+def init_app(app):
+    """Point url_for('static') at the built assets and serve them precompressed and immutable.
+
+    Without a build (e.g. in development) the manifest is empty and assets are served
+    as they are on disk.
+    """
+    load_manifest(app)
+    app.url_defaults(_fingerprinted_url)
+    app.view_functions['static'] = send_static_asset
+
+
+def _fingerprinted_url(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = current_app.extensions['asset_manifest'].get(values['filename'], values['filename'])
+
+
+def is_immutable(filename):
+    """True for files whose name changes whenever their content does."""
+    return filename in current_app.extensions['asset_files'] or bool(CONTENT_ADDRESSED.match(filename))
+
+
+def send_static_asset(filename):
+    """The static view: built assets go out precompressed when accepted, and anything
+    fingerprinted is cached by browsers for ASSET_MAX_AGE without revalidation."""
+    app = current_app
+    if not is_immutable(filename):
+        return app.send_static_file(filename)
+
+    max_age = app.config['ASSET_MAX_AGE']
+    if filename in app.extensions['asset_files']:
+        response = (_send_precompressed(app.static_folder, filename, max_age)
+                    or send_from_directory(app.static_folder, filename, max_age=max_age))
+        response.vary.add('Accept-Encoding')
+    else:
+        response = send_from_directory(app.static_folder, filename, max_age=max_age)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _send_precompressed(static_folder, filename, max_age):
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(static_folder, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            # Saved as-is, the file is the asset itself, not a .br/.gz download
+            response.headers.pop('Content-Disposition', None)
+            return response
+    return None
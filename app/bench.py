@@ -0,0 +1,207 @@
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app import db
+from app.instrumentation import capture_queries
+from app.models import User, Artist, Canvas, Comment
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+# Run in a fresh interpreter: import the package, build the app, report the time and what got imported
+STARTUP_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app(json.loads(sys.argv[1]))
+print(json.dumps({'ms': (time.perf_counter() - started) * 1000, 'modules': sorted(sys.modules)}))
+'''
+# Libraries only the offline jobs, image processing or 'flask db' need; a web worker should boot without them
+HEAVY_MODULES = ('numpy', 'scipy', 'PIL', 'flask_migrate', 'alembic')
+
+
+def measure_startup(runs=5, config=None):
+    """Median and worst cold-boot time of import + create_app(config), and the heavy modules it loaded."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings, loaded = [], set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, json.dumps(config or {})],
+                                cwd=root, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        timings.append(result['ms'])
+        loaded.update(name for name in HEAVY_MODULES if name in result['modules'])
+    timings.sort()
+    return {'runs': runs, 'p50_ms': round(percentile(timings, 50), 1), 'max_ms': round(timings[-1], 1),
+            'heavy_modules': sorted(loaded)}
+
+
+# Endpoints bench_routes leaves out on purpose; test_bench checks every other one is covered
+BENCH_EXCLUDED = {
+    'static': 'served by the front-end web server in production',
+    'auth.logout': 'would end the session the member client reuses',
+    'catalog.canvas_events': 'a long-lived event stream, not a request/response',
+    'catalog.edit_canvas': "only the canvas's owner may edit, and edits rewrite what other routes read",
+    'catalog.delete_canvas': 'would delete the canvases the other routes pick from',
+}
+
+
+def bench_routes(rng):
+    """(name, method, url factory, client, form data factory) for every route worth timing, with real ids.
+
+    client is 'anonymous' or 'member' for a per-thread client that keeps its session,
+    or 'visitor' for a fresh one per request (logging in would otherwise stick).
+    """
+    from app.catalog import CANVAS_ORDERINGS, COMMENT_ORDERINGS
+    from app.stitch_lists import STITCH_STATUSES
+
+    def ids(model):
+        return db.session.scalars(db.select(model.id).order_by(db.func.random()).limit(100)).all() or [0]
+
+    canvas_ids, artist_ids, comment_ids, user_ids = ids(Canvas), ids(Artist), ids(Comment), ids(User)
+    emails = db.session.scalars(db.select(User.email).where(User.id.in_(user_ids))).all() or ['nobody@example.com']
+    pick = rng.choice
+
+    def new_account():
+        name = f'bench{rng.getrandbits(48):012x}'
+        return {'username': name, 'email': f'{name}@example.com', 'password': 'password'}
+
+    routes = [
+        ('index', 'GET', lambda: '/', 'anonymous', None),
+        *[(f'canvases_by_{sort}', 'GET', lambda sort=sort: f'/canvases?sort={sort}', 'anonymous', None)
+          for sort in CANVAS_ORDERINGS],
+        ('artists', 'GET', lambda: '/artists', 'anonymous', None),
+        *[(f'artist_detail_by_{sort}', 'GET', lambda sort=sort: f'/artist/{pick(artist_ids)}?sort={sort}',
+           'anonymous', None) for sort in CANVAS_ORDERINGS],
+        ('canvas_detail', 'GET', lambda: f'/canvas/{pick(canvas_ids)}', 'anonymous', None),
+        ('canvas_detail_member', 'GET', lambda: f'/canvas/{pick(canvas_ids)}', 'member', None),
+        *[(f'canvas_comments_by_{sort}', 'GET', lambda sort=sort: f'/canvas/{pick(canvas_ids)}/comments?comments={sort}',
+           'anonymous', None) for sort in COMMENT_ORDERINGS],
+        ('search', 'GET', lambda: f'/search?q={pick(["rose", "winter cardinal", "tartan", "owl"])}', 'anonymous', None),
+        ('stitch_list', 'GET', lambda: '/stitch_list', 'member', None),
+        ('stitch_list_by_status', 'GET', lambda: f'/stitch_list?status={pick(STITCH_STATUSES)}', 'member', None),
+        ('login_form', 'GET', lambda: '/login', 'anonymous', None),
+        ('register_form', 'GET', lambda: '/register', 'anonymous', None),
+        ('add_artist_form', 'GET', lambda: '/add_artist', 'anonymous', None),
+        ('add_canvas_form', 'GET', lambda: '/add_canvas', 'anonymous', None),
+        ('login', 'POST', lambda: '/login', 'visitor', lambda: {'email': pick(emails), 'password': 'password'}),
+        ('register', 'POST', lambda: '/register', 'visitor', new_account),
+        ('add_artist', 'POST', lambda: '/add_artist', 'anonymous', lambda: {'name': 'Benchmark artist', 'bio': ''}),
+        ('vote_canvas', 'POST', lambda: f'/vote_canvas/{pick(canvas_ids)}/{pick(["up", "down"])}', 'member', None),
+        ('vote_comment', 'POST', lambda: f'/vote_comment/{pick(comment_ids)}/{pick(["up", "down"])}', 'member', None),
+        ('add_comment', 'POST', lambda: f'/add_comment/{pick(canvas_ids)}', 'member',
+         lambda: {'comment': 'Benchmark comment'}),
+        ('update_stitch_list', 'POST', lambda: '/stitch_list', 'member',
+         lambda: {'action': 'add', 'status': pick(STITCH_STATUSES), 'canvas_id': pick(canvas_ids)}),
+    ]
+    return routes, user_ids
+
+
+def run_benchmark(requests=200, concurrency=8, seed=1, include_writes=True):
+    """Drive each route through the Flask test client at fixed concurrency and summarise latency."""
+    app = current_app._get_current_object()
+    rng = random.Random(seed)
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        routes, user_ids = bench_routes(rng)
+    local = threading.local()
+
+    def client(kind):
+        if kind == 'visitor':
+            return app.test_client()
+        if not hasattr(local, kind):
+            test_client = app.test_client()
+            if kind == 'member':
+                with test_client.session_transaction() as session:
+                    session['_user_id'] = str(rng.choice(user_ids))
+            setattr(local, kind, test_client)
+        return getattr(local, kind)
+
+    def one_request(method, url, kind, data):
+        with capture_queries() as log:
+            started = time.perf_counter()
+            response = client(kind).open(url, method=method, data=data)
+            elapsed = time.perf_counter() - started
+        return elapsed, log.count, response.status_code
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, method, url, kind, data in routes:
+            if method != 'GET' and not include_writes:
+                continue
+            urls = [url() for _ in range(requests)]
+            forms = [data and data() for _ in range(requests)]
+            started = time.perf_counter()
+            samples = list(pool.map(lambda u, form: one_request(method, u, kind, form), urls, forms))
+            wall = time.perf_counter() - started
+
+            latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+            results[name] = {
+                'requests': requests,
+                'errors': sum(status >= 500 for _, _, status in samples),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'throughput_rps': round(requests / wall, 1),
+                'queries_per_request': round(sum(count for _, count, _ in samples) / requests, 2),
+            }
+    return {
+        'meta': {
+            'requests': requests,
+            'concurrency': concurrency,
+            'database': app.config['SQLALCHEMY_DATABASE_URI'],
+            'db_profile': app.config['DB_PROFILE'],
+            'response_cache': app.config['RESPONSE_CACHE'],
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'routes': results,
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    """Lines describing p95/throughput/query changes against a baseline, and whether any regressed."""
+    lines, regressed = [], False
+    for name, now in current['routes'].items():
+        before = baseline['routes'].get(name)
+        if before is None:
+            lines.append(f'{name}: new route')
+            continue
+        checks = [
+            ('p95_ms', now['p95_ms'] > before['p95_ms'] * (1 + tolerance)),
+            ('throughput_rps', now['throughput_rps'] < before['throughput_rps'] * (1 - tolerance)),
+            ('queries_per_request', now['queries_per_request'] > before['queries_per_request']),
+        ]
+        for metric, worse in checks:
+            delta = (now[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            flag = '  REGRESSION' if worse else ''
+            lines.append(f'{name} {metric}: {before[metric]} -> {now[metric]} ({delta:+.1f}%){flag}')
+            regressed = regressed or worse
+    return lines, regressed
+
+
+def format_report(report):
+    header = f"{'route':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'errors':>8}"
+    lines = [header, '-' * len(header)]
+    for name, r in report['routes'].items():
+        lines.append(f"{name:<34}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+                     f"{r['throughput_rps']:>9}{r['queries_per_request']:>9}{r['errors']:>8}")
+    return '\n'.join(lines)
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
@@ -0,0 +1,197 @@
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+CACHE_BACKENDS = {}
+
+
+def cache_backend(name):
+    """Register a response cache backend class under a RESPONSE_CACHE config name."""
+    def register(cls):
+        CACHE_BACKENDS[name] = cls
+        return cls
+    return register
+
+
+@cache_backend('memory')
+class LRUCache:
+    """Per-process LRU of cached responses, with a tag -> keys index for invalidation."""
+
+    def __init__(self, config, max_entries=None):
+        self.max_entries = max_entries or config['RESPONSE_CACHE_SIZE']
+        self.entries = OrderedDict()
+        self.tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at, _ = item
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl, tags):
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (entry, time.time() + ttl, tags)
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def delete_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def _remove(self, key):
+        item = self.entries.pop(key, None)
+        if item is not None:
+            for tag in item[2]:
+                keys = self.tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.tags[tag]
+
+
+@cache_backend('sqlite')
+class SQLiteCache:
+    """Cache shared by every worker on the host through a local SQLite file."""
+
+    def __init__(self, config):
+        self.path = config['RESPONSE_CACHE_PATH']
+        self.max_entries = config['RESPONSE_CACHE_SIZE']
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS response_cache "
+                         "(key TEXT PRIMARY KEY, body BLOB, mimetype TEXT, etag TEXT, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS response_cache_tag "
+                         "(tag TEXT, key TEXT, PRIMARY KEY (tag, key)) WITHOUT ROWID")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_tag_key ON response_cache_tag (key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_expires_at ON response_cache (expires_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT body, mimetype, etag FROM response_cache WHERE key = ? AND expires_at >= ?",
+            (key, time.time())).fetchone()
+        return tuple(row) if row else None
+
+    def set(self, key, entry, ttl, tags):
+        body, mimetype, etag = entry
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+                         (key, body, mimetype, etag, time.time() + ttl))
+            conn.executemany("INSERT OR IGNORE INTO response_cache_tag VALUES (?, ?)", [(tag, key) for tag in tags])
+            # Expired entries, then the soonest to expire beyond RESPONSE_CACHE_SIZE, keep the file bounded
+            self._delete_keys(conn, [row[0] for row in conn.execute(
+                "SELECT key FROM response_cache WHERE expires_at < ? UNION "
+                "SELECT key FROM (SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (time.time(), self.max_entries))])
+
+    def delete_tags(self, tags):
+        marks = ', '.join('?' * len(tags))
+        with self._connection() as conn:
+            self._delete_keys(conn, [row[0] for row in conn.execute(
+                f"SELECT key FROM response_cache_tag WHERE tag IN ({marks})", list(tags))])
+
+    def _delete_keys(self, conn, keys):
+        conn.executemany("DELETE FROM response_cache WHERE key = ?", [(key,) for key in keys])
+        conn.executemany("DELETE FROM response_cache_tag WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM response_cache")
+            conn.execute("DELETE FROM response_cache_tag")
+
+
+def get_cache():
+    name = current_app.config['RESPONSE_CACHE']
+    if not name:
+        return None
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        cache = current_app.extensions['response_cache'] = CACHE_BACKENDS[name](current_app.config)
+    return cache
+
+
+def invalidate(*tags):
+    """Drop every cached response tagged with any of tags."""
+    cache = get_cache()
+    if cache is not None and tags:
+        cache.delete_tags(tags)
+
+
+def _cache_key(args):
+    """The page's key: only the query arguments the view reads, so ?junk=N maps to the same entry."""
+    query = '&'.join(f'{name}={value}' for name in sorted(args) for value in request.args.getlist(name))
+    return f'{request.endpoint}:{request.path}?{query}'
+
+
+def _conditional(entry):
+    body, mimetype, etag = entry
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = make_response(body)
+        response.mimetype = mimetype
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def cached_page(tags, args=(), ttl=None):
+    """Cache a view's full response for anonymous GETs.
+
+    tags is called with the view's arguments and returns the tags the page depends on;
+    writes call invalidate() with the same tags to drop exactly those pages. args names
+    the query arguments the view reads; any others are left out of the cache key.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            cache = get_cache()
+            if cache is None or request.method != 'GET' or current_user.is_authenticated:
+                return view(**kwargs)
+
+            key = _cache_key(args)
+            entry = cache.get(key)
+            if entry is None:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                body = response.get_data()
+                entry = (body, response.mimetype, hashlib.sha1(body).hexdigest())
+                cache.set(key, entry, ttl or current_app.config['RESPONSE_CACHE_TTL'], tags(**kwargs))
+            return _conditional(entry)
+        return wrapper
+    return decorator
@@ -0,0 +1,355 @@
+from flask import Blueprint, current_app, render_template, url_for, redirect, flash, request, jsonify, abort
+
+from app import db
+from app.forms import ArtistForm, CanvasForm
+from app.models import Canvas, Artist, Comment, CanvasVote, CommentVote, StitchList
+from app.pagination import KeysetPage, keyset_paginate, page_size
+from app.search import search
+from app.cache import cached_page, invalidate
+from app.featured import featured_canvases
+from app.images import save_canvas_image, schedule_canvas_image
+from app.events import event_stream, publish_comment
+from app.rankings import window_start
+from app.similar import similar_canvases
+from app.purge import schedule_purge
+from app.stitch_lists import (STITCH_ACTIONS, STITCH_STATUSES, canvas_stitch_counts, update_stitch_list,
+                              user_stitch_counts)
+from flask_login import current_user, login_required
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy.orm import joinedload
+
+bp = Blueprint('catalog', __name__)
+
+# Query arguments each cached page reads (see cached_page)
+PAGE_ARGS = ('after', 'before', 'per_page')
+LISTING_ARGS = PAGE_ARGS + ('sort',)
+COMMENT_ARGS = ('after', 'before', 'comments')
+
+@bp.route('/')
+@cached_page(lambda: ['featured'])
+def index():
+    return render_template('index.html', featured_canvases=featured_canvases(4))
+
+@bp.route('/artists')
+@cached_page(lambda: ['artists'], args=PAGE_ARGS)
+def artists():
+    page = keyset_paginate(Artist.query.options(joinedload(Artist.stats)), [Artist.id])
+    return render_template('artists.html', artists=page)
+
+@bp.route('/artist/<int:artist_id>')
+@cached_page(lambda artist_id: canvas_listing_tags(f'artist:{artist_id}'), args=LISTING_ARGS)
+def artist_detail(artist_id):
+    artist = Artist.query.options(joinedload(Artist.stats)).get_or_404(artist_id)
+    sort = canvas_sort()
+    page = keyset_paginate(ranked(artist.canvases.options(joinedload(Canvas.stats)), Canvas, sort),
+                           *CANVAS_ORDERINGS[sort])
+    return render_template('artist_detail.html', artist=artist, canvases=page, sort=sort)
+
+@bp.route('/search')
+def search_page():
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    results, has_next = search(query, page=page, per_page=page_size()) if query else ([], False)
+    return render_template('search.html', query=query, results=results, page=page, has_next=has_next)
+
+@bp.route('/add_artist', methods=['GET', 'POST'])
+def add_artist():
+    form = ArtistForm()
+    if form.validate_on_submit():
+        new_artist = Artist(name=form.name.data, bio=form.bio.data,
+                            user_id=current_user.id if current_user.is_authenticated else None)
+        db.session.add(new_artist)
+        db.session.commit()
+        invalidate('artists')
+        return redirect(url_for('catalog.artists'))
+    return render_template('add_artist.html', form=form)
+
+@bp.route('/add_canvas', methods=['GET', 'POST'])
+def add_canvas():
+    form = CanvasForm()
+    artists = Artist.query.all()
+
+    if not artists:
+        flash('No artists available. Please add an artist first.')
+        return redirect(url_for('catalog.add_artist'))
+    
+    form.artist_id.choices = [(artist.id, artist.name) for artist in artists]
+
+    if form.validate_on_submit():
+        # Handle image file
+        if form.image.data:
+            content_hash, image_path, filepath = save_canvas_image(form.image.data)
+        else:
+            filepath = None
+
+        new_canvas = Canvas(
+            title=form.title.data,
+            description=form.description.data,
+            image_url=filepath,  # assuming you handle image uploads
+            artist_id=form.artist_id.data  # Set the artist_id
+        )
+
+        # Add more fields as necessary, like artist_id
+        db.session.add(new_canvas)
+        db.session.commit()
+        invalidate('featured', 'canvases', f'artist:{new_canvas.artist_id}')
+
+        # Resized variants are rendered off the request path
+        if filepath:
+            schedule_canvas_image(new_canvas.id, content_hash, image_path)
+        return redirect(url_for('catalog.canvases'))
+    return render_template('add_canvas.html', form=form)
+
+@bp.route('/delete_canvas/<int:canvas_id>', methods=['POST'])
+@login_required
+def delete_canvas(canvas_id):
+    canvas = Canvas.query.get_or_404(canvas_id)
+
+    # Check if current user is the artist who created the canvas or an admin
+    if canvas.artist.user_id != current_user.id and not current_user.is_admin:
+        flash('You do not have permission to delete this canvas.', 'danger')
+        return redirect(url_for('catalog.canvas_detail', canvas_id=canvas_id))
+
+    # Proceed with deletion: only the canvas row goes now, its comments and votes are purged in the background
+    artist_id = canvas.artist_id
+    db.session.delete(canvas)
+    db.session.commit()
+    invalidate('featured', 'canvases', f'canvas:{canvas_id}', f'artist:{artist_id}')
+    schedule_purge()
+    flash('Canvas has been deleted', 'success')
+    return redirect(url_for('catalog.canvases'))
+
+@bp.route('/edit_canvas/<int:canvas_id>', methods=['GET', 'POST'])
+@login_required
+def edit_canvas(canvas_id):
+    canvas = Canvas.query.get_or_404(canvas_id)
+
+    # Check if current user is the artist who created the canvas or an admin
+    if canvas.artist.user_id != current_user.id and not current_user.is_admin:
+        flash('You do not have permission to edit this canvas.', 'danger')
+        return redirect(url_for('catalog.canvas_detail', canvas_id=canvas_id))
+
+    form = CanvasForm(obj=canvas)
+    artists = Artist.query.all()
+
+    if not artists:
+        flash('No artists available. Please add an artist first.')
+        return redirect(url_for('catalog.add_artist'))
+    
+    form.artist_id.choices = [(artist.id, artist.name) for artist in artists]
+
+    if form.validate_on_submit():
+        # Handle image file
+        if form.image.data:
+            content_hash, image_path, filepath = save_canvas_image(form.image.data)
+            canvas.image_url = filepath
+            canvas.image_variants = None
+        else:
+            filepath = None
+
+        old_artist_id = canvas.artist_id
+        canvas.title = form.title.data
+        canvas.description = form.description.data
+        canvas.artist_id = form.artist_id.data
+
+        db.session.commit()
+        invalidate('featured', 'canvases', f'canvas:{canvas_id}', f'artist:{old_artist_id}', f'artist:{canvas.artist_id}')
+
+        if filepath:
+            schedule_canvas_image(canvas.id, content_hash, image_path)
+        return redirect(url_for('catalog.canvas_detail', canvas_id=canvas_id))
+
+    return render_template('edit_canvas.html', form=form, canvas=canvas)
+
+
+def unindexed(column):
+    """column as an expression no index can order by, keeping its name for the page cursor.
+
+    Windowed leaderboards use it so SQLite range-searches the created_at index and sorts
+    just that window, rather than walking the whole score index and filtering on age.
+    """
+    return (column + 0).label(column.key)
+
+# Sort options for canvas listings: the unique key columns and whether they run descending.
+# 'day' and 'week' are the top-score leaderboard restricted to recently created canvases.
+CANVAS_ORDERINGS = {
+    'id': ([Canvas.id], False),
+    'score': ([Canvas.score, Canvas.id], True),
+    'day': ([unindexed(Canvas.score), Canvas.id], True),
+    'week': ([unindexed(Canvas.score), Canvas.id], True),
+    'hot': ([Canvas.hot, Canvas.id], True),
+    'controversial': ([Canvas.controversy, Canvas.id], True),
+}
+
+def canvas_sort():
+    sort = request.args.get('sort', 'id')
+    return sort if sort in CANVAS_ORDERINGS else 'id'
+
+def ranked(query, model, sort):
+    """Limit query to the time window of a windowed leaderboard sort."""
+    since = window_start(sort)
+    return query.filter(model.created_at >= since) if since else query
+
+def canvas_listing_tags(tag):
+    # Ranked pages also change whenever any canvas is voted on
+    return [tag] if canvas_sort() == 'id' else [tag, 'canvas-scores']
+
+@bp.route('/canvases')
+@cached_page(lambda: canvas_listing_tags('canvases'), args=LISTING_ARGS)
+def canvases():
+    sort = canvas_sort()
+    query = ranked(Canvas.query.options(joinedload(Canvas.artist)), Canvas, sort)
+    page = keyset_paginate(query, *CANVAS_ORDERINGS[sort])
+    csrf_token = generate_csrf()
+    return render_template('canvases.html', canvases=page, sort=sort, csrf_token=csrf_token)
+
+# Comment thread orderings, newest first or by one of the leaderboards
+COMMENT_ORDERINGS = {
+    'new': ([Comment.id], True),
+    'top': ([Comment.score, Comment.id], True),
+    'day': ([unindexed(Comment.score), Comment.id], True),
+    'week': ([unindexed(Comment.score), Comment.id], True),
+    'hot': ([Comment.hot, Comment.id], True),
+    'controversial': ([Comment.controversy, Comment.id], True),
+}
+
+def comment_sort():
+    sort = request.args.get('comments', 'new')
+    return sort if sort in COMMENT_ORDERINGS else 'new'
+
+def comment_page(canvas_id, sort):
+    """One page of a canvas's comments with their authors, plus the viewer's votes on them."""
+    query = ranked(Comment.query.filter_by(canvas_id=canvas_id).options(joinedload(Comment.user)), Comment, sort)
+    page = keyset_paginate(query, *COMMENT_ORDERINGS[sort], per_page=current_app.config['COMMENT_PAGE_SIZE'])
+    user_comment_votes = {}
+    if current_user.is_authenticated and page.items:
+        user_comment_votes = {vote.comment_id: vote for vote in CommentVote.query.filter(
+            CommentVote.user_id == current_user.id,
+            CommentVote.comment_id.in_([comment.id for comment in page.items]))}
+    return page, user_comment_votes
+
+@bp.route('/canvas/<int:canvas_id>')
+@cached_page(lambda canvas_id: [f'canvas:{canvas_id}'], args=COMMENT_ARGS)
+def canvas_detail(canvas_id):
+    canvas = Canvas.query.get_or_404(canvas_id)
+    csrf_token = generate_csrf()
+
+    sort = comment_sort()
+    comments, user_comment_votes = comment_page(canvas_id, sort)
+    user_canvas_vote = user_stitch = None
+
+    if current_user.is_authenticated:
+        user_canvas_vote = CanvasVote.query.filter_by(user_id=current_user.id, canvas_id=canvas_id).first()
+        user_stitch = StitchList.query.filter_by(user_id=current_user.id, canvas_id=canvas_id).first()
+
+    return render_template('canvas_detail.html', 
+                           canvas=canvas, 
+                           comments=comments,
+                           comment_sort=sort,
+                           csrf_token=csrf_token, 
+                           user_canvas_vote=user_canvas_vote,
+                           user_comment_votes=user_comment_votes,
+                           similar_canvases=similar_canvases,
+                           stitch_counts=canvas_stitch_counts,
+                           stitch_statuses=STITCH_STATUSES,
+                           user_stitch=user_stitch)
+
+@bp.route('/canvas/<int:canvas_id>/comments')
+@cached_page(lambda canvas_id: [f'canvas:{canvas_id}'], args=COMMENT_ARGS + ('format',))
+def canvas_comments(canvas_id):
+    """Later pages of a comment thread, as an HTML fragment or (with ?format=json) JSON."""
+    sort = comment_sort()
+    comments, user_comment_votes = comment_page(canvas_id, sort)
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'comments': [{
+                'id': comment.id,
+                'username': comment.user.username,
+                'content': comment.content,
+                'score': comment.score,
+                'user_vote': user_comment_votes[comment.id].vote if comment.id in user_comment_votes else 0,
+            } for comment in comments],
+            'next_cursor': comments.next_cursor,
+        })
+    return render_template('_comments.html', canvas_id=canvas_id, comments=comments, comment_sort=sort,
+                           csrf_token=generate_csrf(), user_comment_votes=user_comment_votes)
+
+
+@bp.route('/canvas/<int:canvas_id>/events')
+def canvas_events(canvas_id):
+    """Server-Sent Events stream of score changes and new comments on one canvas."""
+    if db.session.get(Canvas, canvas_id) is None:
+        abort(404)
+    # Release the connection now; the stream itself never touches the database
+    db.session.remove()
+    return event_stream(canvas_id)
+
+
+@bp.route('/add_comment/<int:canvas_id>', methods=['POST'])
+@login_required
+def add_comment(canvas_id):
+    # Assume 'comment' is the name of the form field for the comment content
+    comment_content = (request.form.get('comment') or '').strip()
+    if not comment_content:
+        if wants_json():
+            return jsonify(error='Comment cannot be empty.'), 400
+        flash('Comment cannot be empty.', 'danger')
+        return redirect(url_for('catalog.canvas_detail', canvas_id=canvas_id))
+
+    new_comment = Comment(content=comment_content, user_id=current_user.id, canvas_id=canvas_id)
+    db.session.add(new_comment)
+    db.session.commit()
+    invalidate(f'canvas:{canvas_id}')
+    publish_comment(new_comment)
+
+    if wants_json():
+        html = render_template('_comments.html', canvas_id=canvas_id, comments=KeysetPage([new_comment]),
+                               comment_sort=comment_sort(), csrf_token=generate_csrf(), user_comment_votes={})
+        return jsonify(id=new_comment.id, html=html), 201
+    return redirect(url_for('catalog.canvas_detail', canvas_id=canvas_id))
+
+def wants_json():
+    """True for fetch() calls asking for JSON; plain form posts still get a redirect."""
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+@bp.route('/stitch_list')
+@login_required
+def stitch_list():
+    query = StitchList.query.filter_by(user_id=current_user.id).options(joinedload(StitchList.canvas))
+    status = request.args.get('status')
+    if status in STITCH_STATUSES:
+        query = query.filter_by(status=status)
+    page = keyset_paginate(query, [StitchList.id])
+    return render_template('sketch_list.html', stitch_list=page, status=status, statuses=STITCH_STATUSES,
+                           counts=user_stitch_counts(current_user.id), csrf_token=generate_csrf())
+
+
+@bp.route('/stitch_list', methods=['POST'])
+@login_required
+def update_stitch_list_view():
+    """Bulk add, remove or change the status of the checked canvases in one transaction."""
+    action = request.form.get('action')
+    status = request.form.get('status')
+    canvas_ids = request.form.getlist('canvas_id', type=int)
+    error = None
+    if action not in STITCH_ACTIONS or not canvas_ids:
+        error = 'Choose at least one canvas and an action.'
+    elif action != 'remove' and status not in STITCH_STATUSES:
+        error = 'Choose a valid status.'
+    elif len(canvas_ids) > current_app.config['STITCH_LIST_BULK_LIMIT']:
+        error = f"At most {current_app.config['STITCH_LIST_BULK_LIMIT']} canvases can be changed at once."
+    if error:
+        if wants_json():
+            return jsonify(error=error), 400
+        flash(error, 'danger')
+    else:
+        changed = update_stitch_list(current_user.id, action, canvas_ids, status)
+        if wants_json():
+            return jsonify(changed=changed, counts=user_stitch_counts(current_user.id))
+
+    # Only follow local paths back, e.g. to the canvas page the form was on
+    next_page = request.form.get('next', '')
+    if not next_page.startswith('/') or next_page.startswith('//'):
+        next_page = url_for('catalog.stitch_list')
+    return redirect(next_page)
@@ -0,0 +1,226 @@
+import json
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Canvas, Comment, CanvasVote, CommentVote
+from app.seed import DEFAULT_VOLUMES
+from app.transfer import FORMATS
+
+# Commands import the modules doing the work when they run, so registering them stays cheap
+COMMANDS = []
+
+
+def command(name):
+    """Declare a CLI command that runs inside the app context; init_app() registers them all."""
+    def register(func):
+        cmd = click.command(name)(with_appcontext(func))
+        COMMANDS.append(cmd)
+        return cmd
+    return register
+
+
+def init_app(app):
+    for cmd in COMMANDS:
+        app.cli.add_command(cmd)
+
+
+def _vote_totals(vote_model, fk_column, target_id):
+    def total(expr):
+        return db.select(db.func.coalesce(db.func.sum(expr), 0)) \
+            .where(fk_column == target_id).scalar_subquery()
+
+    return {
+        'score': total(vote_model.vote),
+        'upvotes': total(db.case((vote_model.vote == 1, 1), else_=0)),
+        'downvotes': total(db.case((vote_model.vote == -1, 1), else_=0)),
+    }
+
+
+def rebuild_vote_counts():
+    """Recompute the denormalized score columns from the vote tables."""
+    db.session.execute(db.update(Canvas).values(**_vote_totals(CanvasVote, CanvasVote.canvas_id, Canvas.id)))
+    db.session.execute(db.update(Comment).values(**_vote_totals(CommentVote, CommentVote.comment_id, Comment.id)))
+    db.session.commit()
+
+
+@command('rebuild-vote-counts')
+def rebuild_vote_counts_command():
+    """Rebuild canvas and comment vote counts from CanvasVote/CommentVote."""
+    rebuild_vote_counts()
+    click.echo('Vote counts rebuilt.')
+
+
+@command('purge-deleted')
+@click.option('--chunk-size', type=int, help='Rows per transaction; defaults to PURGE_CHUNK_SIZE.')
+def purge_deleted_command(chunk_size):
+    """Remove the comments, votes and stitch-list rows of deleted canvases now."""
+    from app.purge import purge_deleted_canvases
+
+    canvases, rows = purge_deleted_canvases(chunk_size)
+    click.echo(f'Purged {rows:,} rows from {canvases:,} deleted canvases.')
+
+
+@command('build-assets')
+def build_assets_command():
+    """Fingerprint the static assets, precompress them and write the manifest url_for() uses."""
+    from app.assets import build_assets
+
+    def progress(source, target):
+        click.echo(f'{source} -> {target}')
+
+    manifest = build_assets(current_app.static_folder, progress=progress)
+    click.echo(f'Built {len(manifest):,} assets. Restart the app to serve them.')
+
+
+@command('seed')
+@click.option('--users', default=DEFAULT_VOLUMES['users'], show_default=True)
+@click.option('--artists', default=DEFAULT_VOLUMES['artists'], show_default=True)
+@click.option('--canvases', default=DEFAULT_VOLUMES['canvases'], show_default=True)
+@click.option('--canvas-votes', default=DEFAULT_VOLUMES['canvas_votes'], show_default=True)
+@click.option('--comments', default=DEFAULT_VOLUMES['comments'], show_default=True)
+@click.option('--comment-votes', default=DEFAULT_VOLUMES['comment_votes'], show_default=True)
+@click.option('--seed', 'random_seed', default=42, show_default=True, help='Random seed, for reproducible data.')
+@click.option('--batch-size', default=10_000, show_default=True)
+def seed_command(random_seed, batch_size, **volumes):
+    """Fill the database with a large synthetic catalog for load testing."""
+    from app.seed import seed
+
+    def progress(table, count):
+        click.echo(f'{table}: {count:,} rows')
+
+    started = time.perf_counter()
+    seed(volumes, seed=random_seed, batch_size=batch_size, progress=progress)
+    click.echo(f'Seeded in {time.perf_counter() - started:.1f}s.')
+
+
+@command('bench')
+@click.option('--requests', default=200, show_default=True, help='Requests per route.')
+@click.option('--concurrency', default=8, show_default=True)
+@click.option('--read-only', is_flag=True, help='Skip the vote and comment routes.')
+@click.option('--no-cache', is_flag=True, help='Disable the anonymous response cache.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as a JSON baseline.')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False),
+              help='Compare against a saved baseline and exit 1 on regression.')
+@click.option('--tolerance', default=0.10, show_default=True, help='Allowed p95/throughput drift.')
+def bench_command(requests, concurrency, read_only, no_cache, output, baseline_path, tolerance):
+    """Time every route at fixed concurrency and report latency percentiles."""
+    from app.bench import compare, format_report, run_benchmark, save_report
+
+    if no_cache:
+        current_app.config['RESPONSE_CACHE'] = None
+    report = run_benchmark(requests=requests, concurrency=concurrency, include_writes=not read_only)
+    click.echo(format_report(report))
+    if output:
+        save_report(report, output)
+        click.echo(f'Saved baseline to {output}')
+    if baseline_path:
+        with open(baseline_path) as f:
+            lines, regressed = compare(json.load(f), report, tolerance)
+        click.echo('\n'.join(lines))
+        if regressed:
+            raise SystemExit(1)
+
+
+@command('bench-startup')
+@click.option('--runs', default=5, show_default=True, help='Fresh interpreters to time.')
+@click.option('--budget-ms', type=float, help='Exit 1 when the median boot is slower; defaults to STARTUP_BUDGET_MS.')
+@click.option('--with-migrations', is_flag=True, help='Boot the way the CLI does, with Flask-Migrate loaded.')
+def bench_startup_command(runs, budget_ms, with_migrations):
+    """Time a cold import + create_app() the way a web worker boots, against a budget."""
+    from app.bench import measure_startup
+
+    budget_ms = budget_ms or current_app.config['STARTUP_BUDGET_MS']
+    result = measure_startup(runs, {'DB_MIGRATIONS': with_migrations})
+    click.echo(f"Cold boot over {runs} runs: p50 {result['p50_ms']} ms, max {result['max_ms']} ms "
+               f"(budget {budget_ms:g} ms)")
+    if result['heavy_modules']:
+        click.echo('Imported at boot: ' + ', '.join(result['heavy_modules']))
+    if result['p50_ms'] > budget_ms:
+        raise SystemExit(1)
+
+
+@command('similar-canvases')
+@click.option('--top-k', default=20, show_default=True, help='Neighbours stored per canvas.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Canvases multiplied per block.')
+@click.option('--incremental', is_flag=True, help='Only refresh canvases with new interactions since the last run.')
+def similar_canvases_command(top_k, chunk_size, incremental):
+    """Precompute "stitchers also liked" from upvotes and stitch lists."""
+    from app.similar import refresh_similar_canvases
+
+    def progress(done, total):
+        click.echo(f'{done:,}/{total:,} canvases')
+
+    started = time.perf_counter()
+    refreshed = refresh_similar_canvases(k=top_k, chunk_size=chunk_size, incremental=incremental, progress=progress)
+    click.echo(f'Refreshed {refreshed:,} canvases in {time.perf_counter() - started:.1f}s.')
+
+
+@command('refresh-stats')
+@click.option('--chunk-size', default=1000, show_default=True, help='Journaled changes applied per transaction.')
+def refresh_stats_command(chunk_size):
+    """Update artist and canvas stats for whatever changed since the last run."""
+    from app.stats import refresh_stats
+
+    def progress(done, total):
+        click.echo(f'{done:,}/{total:,} changes')
+
+    started = time.perf_counter()
+    canvases, artists = refresh_stats(chunk_size=chunk_size, progress=progress)
+    click.echo(f'Refreshed stats for {canvases:,} canvases and {artists:,} artists '
+               f'in {time.perf_counter() - started:.1f}s.')
+
+
+@command('rebuild-stats')
+@click.option('--chunk-size', default=1000, show_default=True, help='Canvases or artists recomputed per transaction.')
+def rebuild_stats_command(chunk_size):
+    """Recompute every artist and canvas stats row from scratch."""
+    from app.stats import rebuild_stats
+
+    started = time.perf_counter()
+    canvases, artists = rebuild_stats(chunk_size=chunk_size)
+    click.echo(f'Rebuilt stats for {canvases:,} canvases and {artists:,} artists '
+               f'in {time.perf_counter() - started:.1f}s.')
+
+
+def _transfer_progress(kind, done):
+    click.echo(f'{kind}: {done:,} records')
+
+
+@command('import-catalog')
+@click.argument('kind', type=click.Choice(['artists', 'canvases']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('--images-dir', type=click.Path(exists=True, file_okay=False),
+              help='Where relative image paths point. Defaults to the directory of PATH.')
+@click.option('--workers', default=4, show_default=True, help='Threads copying and resizing images.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an earlier, interrupted run.')
+def import_catalog_command(kind, path, fmt, batch_size, images_dir, workers, restart):
+    """Bulk load artists or canvases from CSV/JSONL, resuming where an earlier run stopped."""
+    from app.transfer import import_records
+
+    started = time.perf_counter()
+    count = import_records(kind, path, fmt=fmt, batch_size=batch_size, images_dir=images_dir, workers=workers,
+                           restart=restart, progress=_transfer_progress)
+    click.echo(f'Imported {count:,} {kind} in {time.perf_counter() - started:.1f}s.')
+
+
+@command('export-catalog')
+@click.argument('kind', type=click.Choice(['artists', 'canvases']))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('--images-dir', type=click.Path(file_okay=False), help='Also copy stored canvas images here.')
+@click.option('--workers', default=4, show_default=True, help='Threads copying images.')
+def export_catalog_command(kind, path, fmt, batch_size, images_dir, workers):
+    """Stream artists or canvases out to CSV/JSONL in a form import-catalog reads back."""
+    from app.transfer import export_records
+
+    started = time.perf_counter()
+    count = export_records(kind, path, fmt=fmt, batch_size=batch_size, images_dir=images_dir, workers=workers,
+                           progress=_transfer_progress)
+    click.echo(f'Exported {count:,} {kind} in {time.perf_counter() - started:.1f}s.')
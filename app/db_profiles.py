@@ -0,0 +1,88 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+READ_ONLY_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+DB_PROFILES = {
+    # SQLite defaults: rollback journal, one pool for everything
+    'default': {
+        'pragmas': {},
+    },
+    # Concurrent gunicorn workers: WAL so readers never wait on the writer, a single
+    # BEGIN IMMEDIATE writer connection per process, and a separate read-only pool
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'busy_timeout': 5000,
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # negative means KiB
+            'temp_store': 'MEMORY',
+        },
+        'immediate_writes': True,
+        'writer_pool_size': 1,
+        'reader_pool_size': 8,
+    },
+}
+
+
+def configure_db_profile(app):
+    """Set engine options for app.config['DB_PROFILE']; call before db.init_app(app)."""
+    profile = DB_PROFILES[app.config['DB_PROFILE']]
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+    if 'writer_pool_size' in profile:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': profile['writer_pool_size'], 'max_overflow': 0, 'pool_timeout': 30,
+        }
+    if 'reader_pool_size' in profile:
+        app.config['SQLALCHEMY_BINDS'] = {'reader': {
+            'url': app.config['SQLALCHEMY_DATABASE_URI'],
+            'pool_size': profile['reader_pool_size'], 'max_overflow': 0,
+        }}
+
+
+def attach_db_profile(app, db):
+    """Install the profile's connect hooks on the engines created by db.init_app(app)."""
+    profile = DB_PROFILES[app.config['DB_PROFILE']]
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            reader = bind_key == 'reader'
+            pragmas = dict(profile['pragmas'])
+            if reader:
+                # journal_mode is persistent and set by the writer; readers just refuse writes
+                pragmas.pop('journal_mode', None)
+                pragmas['query_only'] = 'ON'
+            apply_pragmas(engine, pragmas, immediate=profile.get('immediate_writes') and not reader)
+
+
+def apply_pragmas(engine, pragmas, immediate=False):
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        if immediate:
+            # Let SQLAlchemy emit BEGIN itself so it can be BEGIN IMMEDIATE
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    if immediate:
+        # Take the write lock up front: a deferred transaction that upgrades to a
+        # writer mid-way gets SQLITE_BUSY immediately instead of honouring busy_timeout
+        @event.listens_for(engine, 'begin')
+        def on_begin(conn):
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+class RoutingSession(Session):
+    """Sends reads during GET/HEAD/OPTIONS requests to the 'reader' bind when it exists."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (not self._flushing and 'reader' in self._db.engines
+                and has_request_context() and request.method in READ_ONLY_METHODS):
+            return self._db.engines['reader']
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
@@ -0,0 +1,186 @@
+import json
+import queue
+import threading
+import time
+
+from flask import Response, current_app
+
+from app import db
+
+BROKER_BACKENDS = {}
+
+
+def broker_backend(name):
+    """Register a pub/sub broker class under an EVENT_BROKER config name."""
+    def register(cls):
+        BROKER_BACKENDS[name] = cls
+        return cls
+    return register
+
+
+@broker_backend('local')
+class LocalBroker:
+    """Single-process broker that coalesces events per channel and delivers them once per interval.
+
+    Publishing only records the latest payload per (kind, key), so a burst of votes on
+    one canvas becomes a single update for each subscriber.
+    """
+
+    def __init__(self, config):
+        self.interval = config['EVENT_COALESCE_MS'] / 1000
+        self.subscribers = {}
+        self.pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def has_subscribers(self, channel):
+        return bool(self.subscribers.get(channel))
+
+    def publish(self, channel, kind, key, data):
+        with self._lock:
+            if not self.subscribers.get(channel):
+                return
+            self.pending.setdefault(channel, {})[(kind, key)] = data
+
+    def subscribe(self, channel):
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            self.subscribers.setdefault(channel, set()).add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-broker', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            subscribers = self.subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[channel]
+                    self.pending.pop(channel, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            targets = {channel: list(self.subscribers.get(channel, ())) for channel in pending}
+        for channel, events in pending.items():
+            message = {}
+            for (kind, _), data in events.items():
+                message.setdefault(kind, []).append(data)
+            for subscriber in targets[channel]:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # A reader that has stopped draining misses updates rather than growing memory
+                    pass
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+class StreamLimit:
+    """Counts this process's open event streams so they never take every worker thread."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+
+def get_broker():
+    broker = current_app.extensions.get('event_broker')
+    if broker is None:
+        broker = current_app.extensions['event_broker'] = BROKER_BACKENDS[current_app.config['EVENT_BROKER']](current_app.config)
+    return broker
+
+
+def get_stream_limit():
+    limit = current_app.extensions.get('event_streams')
+    if limit is None:
+        limit = current_app.extensions['event_streams'] = StreamLimit(current_app.config['EVENT_STREAM_LIMIT'])
+    return limit
+
+
+def canvas_channel(canvas_id):
+    return f'canvas:{canvas_id}'
+
+
+def publish_score(model, target_id, canvas_id):
+    """Push a canvas or comment's current counts to viewers of canvas_id, if there are any."""
+    broker = get_broker()
+    channel = canvas_channel(canvas_id)
+    if not broker.has_subscribers(channel):
+        return
+    counts = db.session.execute(
+        db.select(model.score, model.upvotes, model.downvotes).where(model.id == target_id)).first()
+    if counts is not None:
+        kind = model.__tablename__
+        broker.publish(channel, 'scores', f'{kind}:{target_id}', {
+            'kind': kind, 'id': target_id,
+            'score': counts.score, 'upvotes': counts.upvotes, 'downvotes': counts.downvotes,
+        })
+
+
+def publish_comment(comment):
+    broker = get_broker()
+    channel = canvas_channel(comment.canvas_id)
+    if not broker.has_subscribers(channel):
+        return
+    broker.publish(channel, 'comments', comment.id, {
+        'id': comment.id, 'username': comment.user.username, 'content': comment.content, 'score': comment.score,
+    })
+
+
+def event_stream(canvas_id):
+    """A text/event-stream response relaying coalesced updates for one canvas.
+
+    The stream ends after EVENT_STREAM_MAX_AGE seconds so it never holds a worker
+    thread indefinitely; the retry: field tells the browser to reconnect shortly after.
+    Past EVENT_STREAM_LIMIT open streams the request gets a 503 instead, leaving the
+    remaining threads for page requests.
+    """
+    limit = get_stream_limit()
+    if not limit.acquire():
+        retry = current_app.config['EVENT_STREAM_RETRY']
+        return Response('Too many live viewers, try again shortly.\n', status=503, mimetype='text/plain',
+                        headers={'Retry-After': str(retry)})
+    broker = get_broker()
+    channel = canvas_channel(canvas_id)
+    keepalive = current_app.config['EVENT_KEEPALIVE']
+    max_age = current_app.config['EVENT_STREAM_MAX_AGE']
+
+    def generate():
+        subscriber = broker.subscribe(channel)
+        deadline = time.monotonic() + max_age
+        try:
+            yield 'retry: 3000\n\n'
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    message = subscriber.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: update\ndata: {json.dumps(message)}\n\n'
+        finally:
+            broker.unsubscribe(channel, subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(limit.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
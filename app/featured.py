@@ -0,0 +1,197 @@
+import bisect
+import itertools
+import logging
+import random
+import threading
+import time
+from array import array
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Canvas
+
+logger = logging.getLogger(__name__)
+
+FEATURED_POLICIES = {}
+
+
+def featured_policy(name):
+    """Register a sampling policy: a function of (pool, k) returning up to k distinct canvas ids."""
+    def register(func):
+        FEATURED_POLICIES[name] = func
+        return func
+    return register
+
+
+@featured_policy('uniform')
+def uniform(pool, k):
+    return random.sample(pool.ids, min(k, len(pool.ids)))
+
+
+@featured_policy('score')
+def score_weighted(pool, k):
+    # Weighted draws can repeat, so keep drawing until k distinct ids or a bounded number of tries
+    picked = {}
+    for _ in range(k * 10):
+        if len(picked) == min(k, len(pool.ids)):
+            break
+        picked.setdefault(random.choices(pool.ids, cum_weights=pool.cum_weights)[0], None)
+    return list(picked)
+
+
+@featured_policy('recent')
+def recent(pool, k):
+    window = pool.ids[-current_app.config['FEATURED_RECENT_WINDOW']:]
+    return random.sample(window, min(k, len(window)))
+
+
+class CanvasPool:
+    """Compact snapshot of canvas ids (ascending) and score weights used for sampling.
+
+    Only the first load happens inside a request. Committed inserts and deletes are
+    applied to the snapshot in memory, and every ttl seconds a background thread
+    reloads it (picking up score changes) while requests keep sampling the old one.
+    """
+
+    def __init__(self, app, ttl):
+        self.app = app
+        self.ttl = ttl
+        self.ids = array('q')
+        self.cum_weights = array('d')
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._changes = []  # applied while a reload is running, replayed onto its result
+
+    def load(self):
+        """Read every canvas's id and score: O(catalog), so kept off the request path after startup."""
+        rows = db.session.execute(db.select(Canvas.id, Canvas.score).order_by(Canvas.id)).all()
+        # Every canvas keeps a chance of being featured; well-liked ones get proportionally more
+        return (array('q', (row.id for row in rows)),
+                array('d', itertools.accumulate(max(row.score, 0) + 1 for row in rows)))
+
+    def refresh(self):
+        with self._refresh_lock:
+            with self._lock:
+                self._refreshing, self._changes = True, []
+            try:
+                ids, cum_weights = self.load()
+            except BaseException:
+                with self._lock:
+                    self._refreshing, self._changes = False, []
+                raise
+            # One critical section, so no add or remove can land on the old arrays unrecorded
+            with self._lock:
+                self.ids, self.cum_weights = ids, cum_weights
+                for change in self._changes:
+                    change()
+                self._refreshing, self._changes = False, []
+                self.loaded_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if self.loaded_at is None:
+            self.refresh()
+        elif time.monotonic() - self.loaded_at > self.ttl and not self._refreshing:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, name='featured-pool', daemon=True).start()
+
+    def _refresh_in_background(self):
+        with self.app.app_context():
+            try:
+                self.refresh()
+            except Exception:
+                # Keep sampling the current snapshot; the next request past the ttl retries
+                logger.exception('Featured pool reload failed')
+
+    def _update(self, change):
+        with self._lock:
+            change()
+            if self._refreshing:
+                self._changes.append(change)
+
+    def add(self, canvas_id, score):
+        """Add a new canvas; ids only grow, so this is almost always an O(1) append.
+
+        Inserting anywhere else rewrites every later cumulative weight under the lock, O(pool).
+        """
+        def change():
+            index = bisect.bisect_left(self.ids, canvas_id)
+            if index < len(self.ids) and self.ids[index] == canvas_id:
+                return
+            weight = max(score or 0, 0) + 1
+            before = self.cum_weights[index - 1] if index else 0
+            self.ids.insert(index, canvas_id)
+            self.cum_weights.insert(index, before + weight)
+            for i in range(index + 1, len(self.cum_weights)):
+                self.cum_weights[i] += weight
+        self._update(change)
+
+    def remove(self, canvas_id):
+        """Drop a deleted canvas: O(pool) under the lock, as every later cumulative weight shifts.
+
+        Deletes are rare next to reads; votes never come here, their scores wait for the next reload.
+        """
+        def change():
+            index = bisect.bisect_left(self.ids, canvas_id)
+            if index == len(self.ids) or self.ids[index] != canvas_id:
+                return
+            weight = self.cum_weights[index] - (self.cum_weights[index - 1] if index else 0)
+            del self.ids[index]
+            del self.cum_weights[index]
+            for i in range(index, len(self.cum_weights)):
+                self.cum_weights[i] -= weight
+        self._update(change)
+
+
+def get_featured_pool():
+    pool = current_app.extensions.get('featured_pool')
+    if pool is None:
+        pool = current_app.extensions['featured_pool'] = CanvasPool(
+            current_app._get_current_object(), current_app.config['FEATURED_POOL_TTL'])
+    return pool
+
+
+def featured_canvases(k, policy=None):
+    """Sample k canvases with the configured policy, fetching only the sampled rows."""
+    pool = get_featured_pool()
+    pool.ensure_fresh()
+    ids = FEATURED_POLICIES[policy or current_app.config['FEATURED_POLICY']](pool, k)
+    if not ids:
+        return []
+    by_id = {canvas.id: canvas for canvas in Canvas.query.filter(Canvas.id.in_(ids))}
+    return [by_id[canvas_id] for canvas_id in ids if canvas_id in by_id]
+
+
+@event.listens_for(Canvas, 'after_insert')
+def _record_new_canvas(mapper, connection, target):
+    Session.object_session(target).info.setdefault('featured_pool_added', []).append((target.id, target.score))
+
+
+@event.listens_for(Canvas, 'after_delete')
+def _record_deleted_canvas(mapper, connection, target):
+    Session.object_session(target).info.setdefault('featured_pool_removed', []).append(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _update_featured_pool(session):
+    added = session.info.pop('featured_pool_added', ())
+    removed = session.info.pop('featured_pool_removed', ())
+    if (added or removed) and has_app_context():
+        pool = get_featured_pool()
+        for canvas_id, score in added:
+            pool.add(canvas_id, score)
+        for canvas_id in removed:
+            pool.remove(canvas_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_featured_pool_changes(session):
+    session.info.pop('featured_pool_added', None)
+    session.info.pop('featured_pool_removed', None)
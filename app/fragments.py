@@ -0,0 +1,66 @@
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.cache import LRUCache
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache key[, ttl] %}...{% endcache %}: reuse the rendered block while key is unchanged.
+
+    key is built from database state the page has already loaded, e.g.
+    ('canvas', canvas.id, canvas.version), so a change made by any worker gives a new
+    key and every process renders the block afresh. Replaced entries are never read
+    again and age out of the LRU; ttl only bounds how long an entry may be kept.
+    Per-user markup (vote state, forms, CSRF tokens) belongs outside the block.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        args.append(parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None))
+        # Tells apart blocks that share a key, e.g. two sections of one canvas page
+        args.append(nodes.Const(f'{parser.name}:{lineno}'))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cached_block', args), [], [], body).set_lineno(lineno)
+
+    def _cached_block(self, key, ttl, block, caller):
+        cache = get_fragment_cache()
+        if cache is None:
+            return caller()
+        entry_key = f'{block}|{key!r}'
+        html = cache.get(entry_key)
+        if html is None:
+            html = Markup(caller())
+            cache.set(entry_key, html, ttl or current_app.config['FRAGMENT_CACHE_TTL'], ())
+        return html
+
+
+def get_fragment_cache():
+    size = current_app.config['FRAGMENT_CACHE_SIZE']
+    if not size:
+        return None
+    cache = current_app.extensions.get('fragment_cache')
+    if cache is None:
+        cache = current_app.extensions['fragment_cache'] = LRUCache(current_app.config, max_entries=size)
+    return cache
+
+
+class _BytecodeCache(FileSystemBytecodeCache):
+    """Creates its directory on the first write rather than when the app is built."""
+
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def init_app(app):
+    """Add the {% cache %} tag and keep compiled templates on disk across restarts."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if app.config['TEMPLATE_BYTECODE_CACHE']:
+        path = app.config['TEMPLATE_BYTECODE_CACHE_PATH'] or os.path.join(app.instance_path, 'jinja_cache')
+        app.jinja_env.bytecode_cache = _BytecodeCache(path)
@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, url_for
+
+from app import db
+from app.cache import invalidate
+from app.models import Canvas
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIR = 'canvas_images'
+CHUNK_SIZE = 64 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _static_path(*parts):
+    return os.path.join(current_app.static_folder, IMAGE_DIR, *parts)
+
+
+def _static_url(filename):
+    return url_for('static', filename=f'{IMAGE_DIR}/{filename}')
+
+
+def store_upload(file_storage):
+    """Stream an upload to disk, naming it by its SHA-256 so identical uploads share one file.
+
+    Returns the content hash and the path of the stored original.
+    """
+    return _store_stream(file_storage.stream, os.path.splitext(file_storage.filename or '')[1].lower())
+
+
+def store_file(source_path):
+    """Copy a local image file into the store the same way store_upload does."""
+    with open(source_path, 'rb') as stream:
+        return _store_stream(stream, os.path.splitext(source_path)[1].lower())
+
+
+def _store_stream(stream, ext):
+    os.makedirs(_static_path(), exist_ok=True)
+
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=_static_path(), delete=False) as tmp:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            tmp.write(chunk)
+
+    content_hash = digest.hexdigest()
+    path = _static_path(content_hash + ext)
+    if os.path.exists(path):
+        os.remove(tmp.name)
+    else:
+        os.replace(tmp.name, path)
+    return content_hash, path
+
+
+def variant_urls(content_hash):
+    return {name: _static_url(f'{content_hash}_{name}.jpg') for name in current_app.config['IMAGE_VARIANTS']}
+
+
+def render_variants(content_hash, source_path):
+    """Write each configured size of the image as a JPEG.
+
+    Variants already on disk (from an earlier upload of the same file) are reused.
+    """
+    from PIL import Image, ImageOps  # only image workers and imports pay for Pillow
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+        for name, max_size in current_app.config['IMAGE_VARIANTS'].items():
+            path = _static_path(f'{content_hash}_{name}.jpg')
+            if os.path.exists(path):
+                continue
+            variant = image.copy()
+            variant.thumbnail((max_size, max_size), Image.LANCZOS)
+            variant.save(path + '.tmp', 'JPEG', quality=current_app.config['IMAGE_QUALITY'], optimize=True, progressive=True)
+            os.replace(path + '.tmp', path)
+
+
+def process_canvas_image(app, canvas_id, content_hash, source_path, urls):
+    with app.app_context():
+        try:
+            render_variants(content_hash, source_path)
+        except Exception:
+            logger.exception('Could not render image variants for canvas %s', canvas_id)
+            return
+        Canvas.query.filter_by(id=canvas_id).update({Canvas.image_variants: urls})
+        db.session.commit()
+        invalidate(f'canvas:{canvas_id}', 'featured')
+
+
+def schedule_canvas_image(canvas_id, content_hash, source_path):
+    """Render the canvas's image variants on the worker pool, or inline when IMAGE_WORKERS is 0."""
+    global _executor
+    app = current_app._get_current_object()
+    urls = variant_urls(content_hash)
+    workers = app.config['IMAGE_WORKERS']
+    if not workers:
+        return process_canvas_image(app, canvas_id, content_hash, source_path, urls)
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='canvas-images')
+    _executor.submit(process_canvas_image, app, canvas_id, content_hash, source_path, urls)
+
+
+def save_canvas_image(file_storage):
+    """Store an upload and return (content_hash, path, url of the original)."""
+    content_hash, path = store_upload(file_storage)
+    return content_hash, path, original_url(path)
+
+
+def original_url(path):
+    return _static_url(os.path.basename(path))
+
+
+def stored_path(url):
+    """Local path of an image stored under canvas_images, or None for anything else."""
+    prefix = _static_url('')
+    if not url or not url.startswith(prefix):
+        return None
+    return _static_path(url[len(prefix):])
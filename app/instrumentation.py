@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_active = threading.local()
+
+
+class QueryLog:
+    """Statements executed while the log was active, with their durations in seconds."""
+
+    def __init__(self):
+        self.statements = []
+
+    def record(self, statement, duration):
+        self.statements.append((statement, duration))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.statements)
+
+    def slowest(self, n=3):
+        return sorted(self.statements, key=lambda item: item[1], reverse=True)[:n]
+
+    def repeated(self, threshold):
+        """Statements run at least threshold times: the signature of an N+1 loop."""
+        counts = Counter(statement for statement, _ in self.statements)
+        return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+
+def _logs():
+    if not hasattr(_active, 'logs'):
+        _active.logs = []
+    return _active.logs
+
+
+@contextmanager
+def capture_queries():
+    """Collect every statement executed on this thread inside the block."""
+    log = QueryLog()
+    _logs().append(log)
+    try:
+        yield log
+    finally:
+        _logs().remove(log)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _logs():
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    for log in _logs():
+        log.record(statement, duration)
+
+
+def init_app(app):
+    """Report each request's queries in Server-Timing and log slow or repetitive ones."""
+    app.before_request(_start_query_log)
+    app.after_request(_report_query_log)
+    app.teardown_request(_stop_query_log)
+
+
+def _start_query_log():
+    if current_app.config['SQL_INSTRUMENTATION']:
+        g.query_log = QueryLog()
+        _logs().append(g.query_log)
+
+
+def _report_query_log(response):
+    log = g.get('query_log')
+    if log is None:
+        return response
+
+    total_ms = log.total_time * 1000
+    response.headers.add('Server-Timing', f'db;dur={total_ms:.1f};desc="{log.count} queries"')
+
+    repeated = log.repeated(current_app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+    for statement, count in repeated:
+        logger.warning('Possible N+1 in %s: %d x %s', request.endpoint, count, statement)
+    if current_app.debug or repeated or total_ms >= current_app.config['SQL_SLOW_REQUEST_MS']:
+        logger.info('%s: %d queries in %.1f ms; slowest: %s', request.endpoint, log.count, total_ms,
+                    '; '.join(f'{duration * 1000:.1f} ms {statement}' for statement, duration in log.slowest()))
+    return response
+
+
+def _stop_query_log(exc):
+    log = g.pop('query_log', None)
+    if log is not None and log in _logs():
+        _logs().remove(log)
@@ -1,59 +1,336 @@
 from app import db
+from flask import current_app, has_app_context, session
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import Session
 from flask_login import UserMixin
 from . import login_manager
+from app.rankings import ranking_triggers
+from app.user_cache import CachedUser, UserCache
+
+
+class TimestampMixin:
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+
+class VoteCountsMixin:
+    """Denormalized vote totals, kept in step with the vote rows by the triggers below."""
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    upvotes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    downvotes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+
+class RankingMixin:
+    """Leaderboard keys derived from the vote counts and recomputed by triggers as they change."""
+    hot = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    controversy = db.Column(db.Float, nullable=False, default=0, server_default='0')
+
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
+    is_admin = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
     stitch_lists = db.relationship('StitchList', backref='user', lazy='dynamic')
     comments = db.relationship('Comment', backref='user', lazy='dynamic')
     canvas_votes = db.relationship('CanvasVote', backref='user', lazy='dynamic')
     comment_votes = db.relationship('CommentVote', backref='user', lazy='dynamic')
 
 
-class Canvas(db.Model):
+class Canvas(VoteCountsMixin, RankingMixin, TimestampMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_canvas_score_id', 'score', 'id'),
+        db.Index('ix_canvas_hot_id', 'hot', 'id'),
+        db.Index('ix_canvas_controversy_id', 'controversy', 'id'),
+        db.Index('ix_canvas_created_at', 'created_at'),
+        # Artist pages: id order comes free with the rowid, score/hot orders need their own
+        db.Index('ix_canvas_artist_id', 'artist_id'),
+        db.Index('ix_canvas_artist_id_score_id', 'artist_id', 'score', 'id'),
+        db.Index('ix_canvas_artist_id_hot_id', 'artist_id', 'hot', 'id'),
+        db.Index('ix_canvas_artist_id_created_at', 'artist_id', 'created_at'),
+        # AUTOINCREMENT: a deleted canvas's id is never handed out again, since its comments,
+        # votes and stitch-list rows stay behind until the purge worker removes them by canvas_id
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
     artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'), nullable=False)
     image_url = db.Column(db.String(250))  # URL to the image of the canvas
-    stitch_lists = db.relationship('StitchList', backref='canvas', lazy='dynamic')
-    comments = db.relationship('Comment', backref='canvas', lazy='dynamic')
-    canvas_votes = db.relationship('CanvasVote', backref='canvas', lazy='dynamic', cascade='all, delete-orphan')
+    image_variants = db.Column(db.JSON)  # {'thumb': url, 'card': url, 'full': url} once resized
+    # Bumped by triggers (and the similar-canvases job) whenever the page's cached blocks go stale; votes leave it alone
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Dependents are never loaded on delete; the purge worker removes them in chunks afterwards
+    stitch_lists = db.relationship('StitchList', backref='canvas', lazy='dynamic', passive_deletes='all')
+    comments = db.relationship('Comment', backref='canvas', lazy='dynamic', passive_deletes='all')
+    canvas_votes = db.relationship('CanvasVote', backref='canvas', lazy='dynamic', passive_deletes='all')
+    stats = db.relationship('CanvasStats', primaryjoin='foreign(CanvasStats.canvas_id) == Canvas.id',
+                            uselist=False, viewonly=True)
+
+    def image_for(self, variant):
+        """URL of the resized image, falling back to the original until the variants are ready."""
+        return (self.image_variants or {}).get(variant) or self.image_url
 
 class Artist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     bio = db.Column(db.Text, nullable=True)
+    # The stitcher who added the artist; they may edit and delete its canvases
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     canvases = db.relationship('Canvas', backref='artist', lazy='dynamic')
+    stats = db.relationship('ArtistStats', primaryjoin='foreign(ArtistStats.artist_id) == Artist.id',
+                            uselist=False, viewonly=True)
 
 class StitchList(db.Model):
+    __table_args__ = (
+        db.Index('ix_stitch_list_user_id_canvas_id', 'user_id', 'canvas_id', unique=True),
+        db.Index('ix_stitch_list_user_id_status', 'user_id', 'status'),
+        db.Index('ix_stitch_list_canvas_id', 'canvas_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     canvas_id = db.Column(db.Integer, db.ForeignKey('canvas.id'))
     status = db.Column(db.String(50))  # e.g., 'Completed', 'In Progress', 'Want to Stitch'
 
-class Comment(db.Model):
+class Comment(VoteCountsMixin, RankingMixin, TimestampMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_comment_canvas_id_id', 'canvas_id', 'id'),
+        db.Index('ix_comment_canvas_id_score_id', 'canvas_id', 'score', 'id'),
+        db.Index('ix_comment_canvas_id_hot_id', 'canvas_id', 'hot', 'id'),
+        db.Index('ix_comment_canvas_id_controversy_id', 'canvas_id', 'controversy', 'id'),
+        db.Index('ix_comment_canvas_id_created_at', 'canvas_id', 'created_at'),
+        db.Index('ix_comment_user_id', 'user_id'),
+        # AUTOINCREMENT: as for canvas, so purged comments' votes never attach to a new comment
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     canvas_id = db.Column(db.Integer, db.ForeignKey('canvas.id', ondelete='CASCADE'), nullable=False)
     comment_votes = db.relationship('CommentVote', backref='comment', lazy='dynamic')
 
-class CanvasVote(db.Model):
+class CanvasVote(TimestampMixin, db.Model):
+    # The primary key leads with user_id; these serve per-canvas totals and the incremental similarity job
+    __table_args__ = (
+        db.Index('ix_canvas_vote_canvas_id_vote', 'canvas_id', 'vote'),
+        db.Index('ix_canvas_vote_updated_at', 'updated_at'),
+    )
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
     canvas_id = db.Column(db.Integer, db.ForeignKey('canvas.id'), primary_key=True)
     vote = db.Column(db.Integer)  # -1, 0, or 1 for downvote, no vote, or upvote
 
-class CommentVote(db.Model):
+class CommentVote(TimestampMixin, db.Model):
+    __table_args__ = (db.Index('ix_comment_vote_comment_id_vote', 'comment_id', 'vote'),)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
     comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), primary_key=True)
     vote = db.Column(db.Integer)  # -1, 0, or 1 for downvote, no vote, or upvote
 
+
+class CanvasStitchCount(db.Model):
+    """How many stitch lists hold a canvas in each status, kept current by triggers on stitch_list."""
+    canvas_id = db.Column(db.Integer, db.ForeignKey('canvas.id'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class UserStitchCount(db.Model):
+    """How many canvases a user has in each status, kept current by triggers on stitch_list."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class SimilarCanvas(db.Model):
+    """Precomputed "stitchers also liked" neighbours, written by the similar-canvases job."""
+    canvas_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.SmallInteger, primary_key=True)  # 0 is the most similar
+    similar_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+class CanvasPurge(db.Model):
+    """Deleted canvases whose comments, votes and stitch-list rows are still to be purged."""
+    canvas_id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, default=db.func.now())
+
+class CanvasStats(db.Model):
+    """Per-canvas totals for listings, written by the catalog-stats job (app.stats)."""
+    __table_args__ = (db.Index('ix_canvas_stats_artist_id', 'artist_id'),)
+    canvas_id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stitchers = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class ArtistStats(db.Model):
+    """Per-artist totals over their canvases, written by the catalog-stats job (app.stats)."""
+    artist_id = db.Column(db.Integer, primary_key=True)
+    canvases = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stitchers = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # distinct users
+    comments = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class StatsChange(db.Model):
+    """Journal of canvases whose stats are stale, appended to by triggers and drained by the stats job."""
+    # AUTOINCREMENT: seq never goes backwards, even after the job deletes the rows it has read
+    __table_args__ = {'sqlite_autoincrement': True}
+    seq = db.Column(db.Integer, primary_key=True)
+    canvas_id = db.Column(db.Integer, nullable=False)
+    artist_id = db.Column(db.Integer)  # the canvas's previous artist, when it moved or was deleted
+
+class JobState(db.Model):
+    """Progress markers for offline jobs, such as the high-water mark of an incremental run."""
+    name = db.Column(db.String(50), primary_key=True)
+    state = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
     
+def vote_count_triggers(vote_table, target_table, fk):
+    """SQLite triggers that shift target_table's vote counts whenever a vote row changes."""
+    def shift(*terms):
+        def delta(expr):
+            return ' '.join(f"{sign} IFNULL({row}.{expr}, 0)" for sign, row in terms)
+        return (f"score = score {delta('vote')}, "
+                f"upvotes = upvotes {delta('vote = 1')}, "
+                f"downvotes = downvotes {delta('vote = -1')}")
+
+    return [
+        f"CREATE TRIGGER {vote_table}_counts_insert AFTER INSERT ON {vote_table} BEGIN "
+        f"UPDATE {target_table} SET {shift(('+', 'NEW'))} WHERE id = NEW.{fk}; END",
+        f"CREATE TRIGGER {vote_table}_counts_update AFTER UPDATE OF vote ON {vote_table} BEGIN "
+        f"UPDATE {target_table} SET {shift(('-', 'OLD'), ('+', 'NEW'))} WHERE id = NEW.{fk}; END",
+        f"CREATE TRIGGER {vote_table}_counts_delete AFTER DELETE ON {vote_table} BEGIN "
+        f"UPDATE {target_table} SET {shift(('-', 'OLD'))} WHERE id = OLD.{fk}; END",
+    ]
+
+
+for _model, _target, _fk in ((CanvasVote, 'canvas', 'canvas_id'), (CommentVote, 'comment', 'comment_id')):
+    for _sql in vote_count_triggers(_model.__tablename__, _target, _fk):
+        event.listen(_model.__table__, 'after_create', DDL(_sql).execute_if(dialect='sqlite'))
+
+
+def stitch_count_triggers(count_table, owner):
+    """SQLite triggers that keep count_table's per-owner, per-status totals in step with stitch_list."""
+    def add(row):
+        return (f"INSERT INTO {count_table} ({owner}, status, count) SELECT {row}.{owner}, {row}.status, 1 "
+                f"WHERE {row}.{owner} IS NOT NULL AND {row}.status IS NOT NULL "
+                f"ON CONFLICT ({owner}, status) DO UPDATE SET count = count + 1;")
+
+    def remove(row):
+        return f"UPDATE {count_table} SET count = count - 1 WHERE {owner} = {row}.{owner} AND status = {row}.status;"
+
+    return [
+        f"CREATE TRIGGER stitch_list_{count_table}_insert AFTER INSERT ON stitch_list BEGIN {add('NEW')} END",
+        f"CREATE TRIGGER stitch_list_{count_table}_update AFTER UPDATE OF status, {owner} ON stitch_list BEGIN "
+        f"{remove('OLD')} {add('NEW')} END",
+        f"CREATE TRIGGER stitch_list_{count_table}_delete AFTER DELETE ON stitch_list BEGIN {remove('OLD')} END",
+    ]
+
+
+for _model, _owner in ((CanvasStitchCount, 'canvas_id'), (UserStitchCount, 'user_id')):
+    for _sql in stitch_count_triggers(_model.__tablename__, _owner):
+        event.listen(StitchList.__table__, 'after_create', DDL(_sql).execute_if(dialect='sqlite'))
+
+# Queue every deleted canvas for the purge worker, however the row was deleted
+CANVAS_PURGE_TRIGGER = (
+    "CREATE TRIGGER canvas_purge_enqueue AFTER DELETE ON canvas BEGIN "
+    "INSERT OR IGNORE INTO canvas_purge (canvas_id, deleted_at) VALUES (OLD.id, CURRENT_TIMESTAMP); END"
+)
+event.listen(Canvas.__table__, 'after_create', DDL(CANVAS_PURGE_TRIGGER).execute_if(dialect='sqlite'))
+
+
+# Edits and stitch-list changes retire the canvas page's cached fragments
+CANVAS_VERSION_TRIGGERS = {
+    'canvas': [
+        "CREATE TRIGGER canvas_version_edit AFTER UPDATE OF title, description, artist_id, image_url, image_variants "
+        "ON canvas BEGIN UPDATE canvas SET version = version + 1 WHERE id = NEW.id; END",
+    ],
+    'stitch_list': [
+        "CREATE TRIGGER stitch_list_canvas_version_insert AFTER INSERT ON stitch_list BEGIN "
+        "UPDATE canvas SET version = version + 1 WHERE id = NEW.canvas_id; END",
+        "CREATE TRIGGER stitch_list_canvas_version_update AFTER UPDATE OF status, canvas_id ON stitch_list BEGIN "
+        "UPDATE canvas SET version = version + 1 WHERE id IN (OLD.canvas_id, NEW.canvas_id); END",
+        "CREATE TRIGGER stitch_list_canvas_version_delete AFTER DELETE ON stitch_list BEGIN "
+        "UPDATE canvas SET version = version + 1 WHERE id = OLD.canvas_id; END",
+    ],
+}
+for _model in (Canvas, StitchList):
+    for _sql in CANVAS_VERSION_TRIGGERS[_model.__tablename__]:
+        event.listen(_model.__table__, 'after_create', DDL(_sql).execute_if(dialect='sqlite'))
+
+# Canvases whose stats change with each table's rows: (trigger event, (canvas, previous artist) per journal row)
+STATS_CHANGE_EVENTS = {
+    # Vote triggers update canvas.score, so votes are journaled through here too
+    'canvas': [('INSERT', [('NEW.id', 'NULL')]),
+               ('UPDATE OF score, artist_id', [('OLD.id', 'OLD.artist_id')]),
+               ('DELETE', [('OLD.id', 'OLD.artist_id')])],
+    'stitch_list': [('INSERT', [('NEW.canvas_id', 'NULL')]),
+                    ('UPDATE OF status, canvas_id, user_id', [('OLD.canvas_id', 'NULL'), ('NEW.canvas_id', 'NULL')]),
+                    ('DELETE', [('OLD.canvas_id', 'NULL')])],
+    'comment': [('INSERT', [('NEW.canvas_id', 'NULL')]),
+                ('DELETE', [('OLD.canvas_id', 'NULL')])],
+}
+
+
+def stats_change_triggers(table):
+    """SQLite triggers that add the affected canvases to the stats_change journal when table's rows change."""
+    triggers = []
+    for when, rows in STATS_CHANGE_EVENTS[table]:
+        values = ' UNION ALL '.join(f"SELECT {canvas}, {artist} WHERE {canvas} IS NOT NULL" for canvas, artist in rows)
+        triggers.append(f"CREATE TRIGGER {table}_stats_change_{when.split()[0].lower()} AFTER {when} ON {table} "
+                        f"BEGIN INSERT INTO stats_change (canvas_id, artist_id) {values}; END")
+    return triggers
+
+
+for _model in (Canvas, StitchList, Comment):
+    for _sql in stats_change_triggers(_model.__tablename__):
+        event.listen(_model.__table__, 'after_create', DDL(_sql).execute_if(dialect='sqlite'))
+
+for _model in (Canvas, Comment):
+    for _sql in ranking_triggers(_model.__tablename__):
+        # DDL() applies %-formatting, which would swallow strftime's '%s'
+        event.listen(_model.__table__, 'after_create', DDL(_sql.replace('%', '%%')).execute_if(dialect='sqlite'))
+
+
+def get_user_cache():
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        cache = current_app.extensions['user_cache'] = UserCache(current_app.config['USER_CACHE_SIZE'],
+                                                                 current_app.config['USER_CACHE_TTL'])
+    return cache
+
+
+def _load_cached_user(user_id):
+    row = db.session.execute(
+        db.select(User.id, User.username, User.email, User.is_admin).where(User.id == user_id)).first()
+    return CachedUser(row.id, row.username, row.email, row.is_admin) if row else None
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _mark_user_changed(mapper, connection, target):
+    Session.object_session(target).info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    changed = session.info.pop('changed_user_ids', None)
+    if changed and has_app_context():
+        get_user_cache().invalidate(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
\ No newline at end of file
+    user_id = int(user_id)
+    user_cache = get_user_cache()
+    if current_app.config['USER_SESSION_EMBED']:
+        user = user_cache.from_session(session, user_id, current_app.config['USER_CACHE_TTL'])
+        if user is not None:
+            return user
+    user = user_cache.get(user_id, _load_cached_user)
+    if user is not None and current_app.config['USER_SESSION_EMBED']:
+        user_cache.embed(session, user)
+    return user
\ No newline at end of file
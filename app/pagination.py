@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+
+from flask import abort, current_app, request
+
+from app import db
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query, with opaque cursors to its neighbours."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        abort(400)
+
+
+def page_size():
+    per_page = request.args.get('per_page', current_app.config['PAGE_SIZE'], type=int)
+    return max(1, min(per_page, current_app.config['MAX_PAGE_SIZE']))
+
+
+def keyset_paginate(query, columns, descending=False, per_page=None):
+    """Paginate query by the unique tuple of columns, reading ?after= / ?before= cursors.
+
+    Only per_page + 1 rows are fetched per page, so the cost does not depend on how
+    deep into the listing the reader is.
+    """
+    per_page = per_page or page_size()
+    after, before = request.args.get('after'), request.args.get('before')
+    key = db.tuple_(*columns)
+
+    def keys(item):
+        return [getattr(item, column.key) for column in columns]
+
+    # Walking backwards flips both the comparison and the sort order
+    backwards = before is not None
+    if after is not None or before is not None:
+        cursor = decode_cursor(before if backwards else after)
+        if not isinstance(cursor, list) or len(cursor) != len(columns):
+            abort(400)
+        query = query.filter(key < db.tuple_(*cursor) if descending != backwards else key > db.tuple_(*cursor))
+    order = [column.desc() if descending != backwards else column.asc() for column in columns]
+    items = query.order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+        next_cursor = encode_cursor(keys(items[-1])) if items else None
+        prev_cursor = encode_cursor(keys(items[0])) if has_more else None
+    else:
+        next_cursor = encode_cursor(keys(items[-1])) if has_more else None
+        prev_cursor = encode_cursor(keys(items[0])) if after is not None and items else None
+    return KeysetPage(items, next_cursor, prev_cursor)
@@ -0,0 +1,101 @@
+import logging
+import threading
+
+from flask import current_app
+
+from app import db
+from app.models import (CanvasPurge, CanvasStitchCount, CanvasVote, Comment, CommentVote, SimilarCanvas,
+                        StitchList)
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_deletes(canvas_id, chunk_size):
+    """Statements that each delete up to chunk_size rows belonging to canvas_id, dependents first."""
+    comment_ids = db.select(Comment.id).where(Comment.canvas_id == canvas_id)
+    return [
+        db.delete(CommentVote).where(db.tuple_(CommentVote.user_id, CommentVote.comment_id).in_(
+            db.select(CommentVote.user_id, CommentVote.comment_id)
+            .where(CommentVote.comment_id.in_(comment_ids)).limit(chunk_size))),
+        db.delete(Comment).where(Comment.id.in_(comment_ids.limit(chunk_size))),
+        db.delete(CanvasVote).where(db.tuple_(CanvasVote.user_id, CanvasVote.canvas_id).in_(
+            db.select(CanvasVote.user_id, CanvasVote.canvas_id)
+            .where(CanvasVote.canvas_id == canvas_id).limit(chunk_size))),
+        db.delete(StitchList).where(StitchList.id.in_(
+            db.select(StitchList.id).where(StitchList.canvas_id == canvas_id).limit(chunk_size))),
+        db.delete(SimilarCanvas).where(db.or_(SimilarCanvas.canvas_id == canvas_id,
+                                              SimilarCanvas.similar_id == canvas_id)),
+        db.delete(CanvasStitchCount).where(CanvasStitchCount.canvas_id == canvas_id),
+    ]
+
+
+def purge_canvas(canvas_id, chunk_size):
+    """Delete a removed canvas's dependents, committing after every chunk. Returns the rows deleted.
+
+    Each transaction is short, so the write lock is released between chunks and other
+    requests keep going while a canvas with a large history is cleaned up.
+    """
+    total = 0
+    for stmt in _chunk_deletes(canvas_id, chunk_size):
+        while True:
+            deleted = db.session.execute(stmt).rowcount
+            db.session.commit()
+            total += deleted
+            if deleted < chunk_size:
+                break
+    db.session.execute(db.delete(CanvasPurge).where(CanvasPurge.canvas_id == canvas_id))
+    db.session.commit()
+    return total
+
+
+def purge_deleted_canvases(chunk_size=None):
+    """Work through the canvas_purge queue. Returns (canvases, rows) purged."""
+    chunk_size = chunk_size or current_app.config['PURGE_CHUNK_SIZE']
+    canvases = rows = 0
+    for canvas_id in db.session.scalars(db.select(CanvasPurge.canvas_id).order_by(CanvasPurge.deleted_at)).all():
+        rows += purge_canvas(canvas_id, chunk_size)
+        canvases += 1
+    return canvases, rows
+
+
+class PurgeWorker:
+    """Background thread that purges deleted canvases when woken, and every interval seconds."""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='canvas-purge', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    canvases, rows = purge_deleted_canvases()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Canvas purge failed; will retry')
+                    continue
+                if canvases:
+                    logger.info('Purged %d rows belonging to %d deleted canvases', rows, canvases)
+
+
+def schedule_purge():
+    """Have the background worker clean up deleted canvases, or do it now when PURGE_WORKER is off."""
+    if not current_app.config['PURGE_WORKER']:
+        return purge_deleted_canvases()
+    worker = current_app.extensions.get('canvas_purge')
+    if worker is None:
+        worker = current_app.extensions['canvas_purge'] = PurgeWorker(
+            current_app._get_current_object(), current_app.config['PURGE_INTERVAL'])
+    worker.wake()
@@ -0,0 +1,71 @@
+import re
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import db
+
+# Tables that grow with traffic; reading one of these end to end is the regression we look for
+LARGE_TABLES = {'artist', 'canvas', 'comment', 'canvas_vote', 'comment_vote', 'stitch_list', 'user',
+                'similar_canvas', 'canvas_stitch_count', 'user_stitch_count'}
+
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+_active = threading.local()
+
+
+class QueryPlan:
+    """One captured statement and the detail lines of its EXPLAIN QUERY PLAN."""
+
+    def __init__(self, statement, details):
+        self.statement = statement
+        self.details = details
+
+    def scanned_tables(self):
+        """Large tables the plan reads with a SCAN step rather than a SEARCH."""
+        tables = set()
+        for detail in self.details:
+            match = _SCAN.match(detail)
+            if match and match.group(1) in LARGE_TABLES and 'VIRTUAL TABLE' not in detail:
+                tables.add(match.group(1))
+        return tables
+
+    def __str__(self):
+        return self.statement + '\n' + '\n'.join(f'  {detail}' for detail in self.details)
+
+
+@contextmanager
+def capture_statements():
+    """Collect (statement, parameters) for every single-row-parameter statement on this thread."""
+    captured = []
+    _active.statements = captured
+    try:
+        yield captured
+    finally:
+        _active.statements = None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    captured = getattr(_active, 'statements', None)
+    if captured is not None and not executemany and statement.lstrip().upper().startswith(
+            ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+        captured.append((statement, parameters))
+
+
+def explain(statement, parameters=()):
+    """EXPLAIN QUERY PLAN detail lines for statement (SQLite only)."""
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+    return [row[-1] for row in rows]
+
+
+def query_plans(statements):
+    """QueryPlan for each captured statement, skipping repeats of the same SQL."""
+    seen, plans = set(), []
+    for statement, parameters in statements:
+        if statement in seen:
+            continue
+        seen.add(statement)
+        plans.append(QueryPlan(statement, explain(statement, parameters)))
+    return plans
@@ -0,0 +1,63 @@
+import math
+from datetime import datetime, timedelta
+
+# Hot ranking trades one order of magnitude of score for 12.5 hours of age
+HOT_EPOCH = 1134028003
+HOT_HALF_DAY = 45000
+
+# Top-N leaderboards over a recent window of creation time; 'score' is all-time
+TIME_WINDOWS = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+
+def hot_rank(score, created):
+    """Log-scaled score plus a bonus for recency, so new items can outrank old favourites.
+
+    created is a Unix timestamp. The value only changes when the score does, which is
+    what lets it live in an indexed column instead of being computed per request.
+    HOT_RANK_SQL is the same formula for the triggers.
+    """
+    score = score or 0
+    order = math.log10(max(abs(score), 1))
+    sign = (score > 0) - (score < 0)
+    seconds = int(created or HOT_EPOCH) - HOT_EPOCH
+    return round(sign * order + seconds / HOT_HALF_DAY, 7)
+
+
+def controversy_rank(upvotes, downvotes):
+    """High for items with many votes split evenly between up and down. See CONTROVERSY_RANK_SQL."""
+    upvotes, downvotes = upvotes or 0, downvotes or 0
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    balance = downvotes / upvotes if upvotes > downvotes else upvotes / downvotes
+    return (upvotes + downvotes) ** balance
+
+
+# The ranking triggers spell the formulas above in built-in SQL (the math functions of
+# SQLite 3.35+), so rows written by the sqlite3 shell, a migration or any other client
+# are ranked the same as the app's own writes.
+HOT_RANK_SQL = (f"round(sign(NEW.score) * log10(max(abs(NEW.score), 1)) + "
+                f"(coalesce(strftime('%s', NEW.created_at), {HOT_EPOCH}) - {HOT_EPOCH}) / {HOT_HALF_DAY}.0, 7)")
+CONTROVERSY_RANK_SQL = ("CASE WHEN NEW.upvotes > 0 AND NEW.downvotes > 0 "
+                        "THEN pow(NEW.upvotes + NEW.downvotes, "
+                        "1.0 * min(NEW.upvotes, NEW.downvotes) / max(NEW.upvotes, NEW.downvotes)) "
+                        "ELSE 0.0 END")
+
+
+def ranking_triggers(table):
+    """SQLite triggers that recompute table's hot and controversy columns when its counts change."""
+    ranks = f"hot = {HOT_RANK_SQL}, controversy = {CONTROVERSY_RANK_SQL}"
+    return [
+        f"CREATE TRIGGER {table}_rankings_insert AFTER INSERT ON {table} BEGIN "
+        f"UPDATE {table} SET {ranks} WHERE id = NEW.id; END",
+        f"CREATE TRIGGER {table}_rankings_update AFTER UPDATE OF score, upvotes, downvotes, created_at ON {table} BEGIN "
+        f"UPDATE {table} SET {ranks} WHERE id = NEW.id; END",
+    ]
+
+
+def window_start(sort):
+    """Earliest creation time included in a windowed leaderboard, or None for all-time sorts."""
+    window = TIME_WINDOWS.get(sort)
+    return datetime.utcnow() - window if window else None
@@ -0,0 +1,101 @@
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, text
+
+from app import db
+from app.models import Artist, Canvas, Comment
+
+# One FTS5 table indexes every searchable model. The rowid packs the source row as
+# id * 4 + kind, so the sync triggers can find an entry by rowid instead of scanning.
+SEARCH_KINDS = {1: 'canvas', 2: 'artist', 3: 'comment'}
+SEARCH_SOURCES = (
+    # (kind, model, title column, body column)
+    (1, Canvas, 'title', 'description'),
+    (2, Artist, 'name', 'bio'),
+    (3, Comment, None, 'content'),
+)
+
+CREATE_SEARCH_INDEX = \
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, body, tokenize='porter unicode61')"
+
+_HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE = '\x02', '\x03'
+
+
+def search_triggers(kind, table, title, body):
+    """Triggers that mirror inserts, edits and deletes on table into search_index."""
+    new_title = f'NEW.{title}' if title else 'NULL'
+    changed = ', '.join(column for column in (title, body) if column)
+    return [
+        f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO search_index(rowid, title, body) VALUES (NEW.id * 4 + {kind}, {new_title}, NEW.{body}); END",
+        f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {changed} ON {table} BEGIN "
+        f"UPDATE search_index SET title = {new_title}, body = NEW.{body} WHERE rowid = NEW.id * 4 + {kind}; END",
+        f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM search_index WHERE rowid = OLD.id * 4 + {kind}; END",
+    ]
+
+
+# Keep db.create_all()/drop_all() (used by the tests) in step with the migration
+event.listen(db.metadata, 'before_create', DDL(CREATE_SEARCH_INDEX).execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'after_drop', DDL('DROP TABLE IF EXISTS search_index').execute_if(dialect='sqlite'))
+for _kind, _model, _title, _body in SEARCH_SOURCES:
+    for _sql in search_triggers(_kind, _model.__tablename__, _title, _body):
+        event.listen(_model.__table__, 'after_create', DDL(_sql).execute_if(dialect='sqlite'))
+
+
+def fts_query(query):
+    """Turn free text into an FTS5 query that ANDs each word as a literal phrase."""
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    return ' '.join(terms)
+
+
+def _highlighted(value):
+    if value is None:
+        return None
+    html = str(escape(value)).replace(_HIGHLIGHT_OPEN, '<mark>').replace(_HIGHLIGHT_CLOSE, '</mark>')
+    return Markup(html)
+
+
+class SearchResult:
+
+    def __init__(self, kind, ref_id, title, snippet, rank):
+        self.kind = kind
+        self.ref_id = ref_id
+        self.title = title
+        self.snippet = snippet
+        self.rank = rank
+        self.canvas_id = ref_id if kind == 'canvas' else None
+
+
+def search(query, page=1, per_page=20):
+    """Return (results, has_next) for one page of bm25-ranked matches, best first."""
+    match = fts_query(query)
+    if not match:
+        return [], False
+
+    rows = db.session.execute(text(
+        "SELECT rowid, highlight(search_index, 0, :open, :close) AS title, "
+        "snippet(search_index, 1, :open, :close, '…', 16) AS snippet, "
+        "bm25(search_index, 5.0, 1.0) AS rank "
+        "FROM search_index WHERE search_index MATCH :match "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    ), {
+        'open': _HIGHLIGHT_OPEN, 'close': _HIGHLIGHT_CLOSE, 'match': match,
+        'limit': per_page + 1, 'offset': (page - 1) * per_page,
+    }).all()
+
+    results = [
+        SearchResult(SEARCH_KINDS[row.rowid % 4], row.rowid // 4,
+                     _highlighted(row.title), _highlighted(row.snippet), row.rank)
+        for row in rows[:per_page]
+    ]
+
+    # Comments link to their canvas, which takes one bulk lookup for the whole page
+    comment_ids = [result.ref_id for result in results if result.kind == 'comment']
+    if comment_ids:
+        canvas_ids = dict(db.session.execute(
+            db.select(Comment.id, Comment.canvas_id).where(Comment.id.in_(comment_ids))
+        ).all())
+        for result in results:
+            if result.kind == 'comment':
+                result.canvas_id = canvas_ids.get(result.ref_id)
+    return results, len(rows) > per_page
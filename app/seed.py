@@ -0,0 +1,98 @@
+import random
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import User, Artist, Canvas, Comment, CanvasVote, CommentVote
+
+WORDS = (
+    'rose garden winter cardinal harbor lighthouse peony fox owl tulip paisley bargello '
+    'lemon tree cottage meadow holiday stocking ornament monogram tartan plaid cat dog '
+    'seashell coral wave mountain sunset pumpkin wreath daisy hydrangea strawberry cherry '
+    'blue white gold red green pastel geometric vintage modern folk whimsical tiny grand'
+).split()
+
+DEFAULT_VOLUMES = {
+    'users': 50_000,
+    'artists': 10_000,
+    'canvases': 200_000,
+    'canvas_votes': 2_000_000,
+    'comments': 500_000,
+    'comment_votes': 500_000,
+}
+
+# Created times are spread over this span, oldest rows first, so the ranked listings have history
+HISTORY = timedelta(days=365)
+
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _popular(rng, n):
+    """Pick an index in [0, n) with a long tail: the top 1% of items get about a fifth of the picks."""
+    return int(n * rng.random() ** 3)
+
+
+def _insert(model, rows, batch_size, progress):
+    """Bulk insert rows (an iterable of dicts) with one executemany per batch."""
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(db.insert(model), batch)
+            db.session.commit()
+            total += len(batch)
+            progress(model.__tablename__, total)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+        db.session.commit()
+        progress(model.__tablename__, total + len(batch))
+
+
+def _created(index, count, now):
+    return now - HISTORY * (1 - index / count)
+
+
+def _vote_pairs(rng, voters, targets, count):
+    """Yield count distinct (voter, target) pairs, spread over voters, skewed toward popular targets."""
+    per_voter, extra = divmod(count, voters)
+    for voter in range(voters):
+        wanted = min(per_voter + (voter < extra), targets)
+        picked = set()
+        while len(picked) < wanted:
+            picked.add(_popular(rng, targets))
+        yield from ((voter, target) for target in picked)
+
+
+def seed(volumes=None, seed=42, batch_size=10_000, progress=lambda table, count: None):
+    """Fill an empty database with a synthetic catalog of the given volumes."""
+    v = dict(DEFAULT_VOLUMES, **(volumes or {}))
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    # New rows get ids counting up from the current maximum, so rows can refer to each other by position
+    first = {model: (db.session.scalar(db.select(db.func.max(model.id))) or 0) + 1
+             for model in (User, Artist, Canvas, Comment)}
+
+    _insert(User, ({'username': f'stitcher{i}', 'email': f'stitcher{i}@example.com', 'password': 'password'}
+                   for i in range(first[User], first[User] + v['users'])), batch_size, progress)
+    _insert(Artist, ({'name': f'{_phrase(rng, 2)} Studio', 'bio': _phrase(rng, 20)}
+                     for _ in range(v['artists'])), batch_size, progress)
+    _insert(Canvas, ({'title': _phrase(rng, 3), 'description': _phrase(rng, 30),
+                      'artist_id': first[Artist] + _popular(rng, v['artists']),
+                      'created_at': _created(i, v['canvases'], now)}
+                     for i in range(v['canvases'])), batch_size, progress)
+    _insert(Comment, ({'content': _phrase(rng, rng.randint(4, 40)),
+                       'user_id': first[User] + rng.randrange(v['users']),
+                       'canvas_id': first[Canvas] + _popular(rng, v['canvases']),
+                       'created_at': _created(i, v['comments'], now)}
+                      for i in range(v['comments'])), batch_size, progress)
+    _insert(CanvasVote, ({'user_id': first[User] + user, 'canvas_id': first[Canvas] + canvas,
+                          'vote': 1 if rng.random() < 0.8 else -1}
+                         for user, canvas in _vote_pairs(rng, v['users'], v['canvases'], v['canvas_votes'])),
+            batch_size, progress)
+    _insert(CommentVote, ({'user_id': first[User] + user, 'comment_id': first[Comment] + comment,
+                           'vote': 1 if rng.random() < 0.7 else -1}
+                          for user, comment in _vote_pairs(rng, v['users'], v['comments'], v['comment_votes'])),
+            batch_size, progress)
@@ -0,0 +1,48 @@
+import os
+
+
+class Config:
+    """Defaults for create_app(); a mapping passed to create_app() overrides any of them."""
+    SECRET_KEY = 'your-secret-key'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('NEEDLEPOINT_DATABASE_URL', 'sqlite:///needlepoint.db')
+    DB_PROFILE = os.environ.get('NEEDLEPOINT_DB_PROFILE', 'default')  # see app.db_profiles
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    PRELOAD_SAFE = False  # forked workers drop any DB connections inherited from the process that imported the app
+    DB_MIGRATIONS = True  # register Flask-Migrate's 'flask db' commands; web workers can skip the import
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    COMMENT_PAGE_SIZE = 20
+    FEATURED_POLICY = 'uniform'  # 'uniform', 'score' or 'recent'
+    FEATURED_POOL_TTL = 300  # seconds between refreshes of the featured id pool
+    FEATURED_RECENT_WINDOW = 100
+    IMAGE_VARIANTS = {'thumb': 200, 'card': 480, 'full': 1600}  # longest edge in pixels
+    IMAGE_QUALITY = 85
+    IMAGE_WORKERS = 2  # 0 renders variants inside the request
+    RESPONSE_CACHE = 'memory'  # 'memory', 'sqlite' or None to disable
+    RESPONSE_CACHE_TTL = 60
+    RESPONSE_CACHE_SIZE = 1024
+    RESPONSE_CACHE_PATH = None  # defaults to response_cache.db in the instance folder
+    FRAGMENT_CACHE_SIZE = 4096  # rendered {% cache %} blocks kept per process; 0 disables the tag's caching
+    FRAGMENT_CACHE_TTL = 300  # longest a block is kept; also how long a neighbour's rename can lag in 'also liked'
+    TEMPLATE_BYTECODE_CACHE = True  # keep compiled templates on disk so restarts skip recompiling
+    TEMPLATE_BYTECODE_CACHE_PATH = None  # defaults to jinja_cache/ in the instance folder
+    SQL_INSTRUMENTATION = True  # per-request query stats in Server-Timing and the log
+    SQL_SLOW_REQUEST_MS = 100
+    SQL_N_PLUS_ONE_THRESHOLD = 5  # same statement this many times in one request
+    USER_CACHE_SIZE = 10000
+    USER_CACHE_TTL = 300  # seconds a cached or session-embedded user is trusted
+    USER_SESSION_EMBED = False  # also keep the user snapshot in the signed session cookie
+    VOTE_WRITE_BEHIND_MS = 0  # > 0 queues votes and writes them in batches at this interval
+    EVENT_BROKER = 'local'  # pub/sub backend for live canvas updates
+    EVENT_COALESCE_MS = 1000  # live updates for a canvas are merged and sent at most once per interval
+    EVENT_KEEPALIVE = 15  # seconds between keep-alive comments on idle event streams
+    EVENT_STREAM_MAX_AGE = 300  # seconds before an event stream closes and the browser reconnects
+    EVENT_STREAM_LIMIT = 24  # open event streams per process; more are turned away with a 503
+    EVENT_STREAM_RETRY = 30  # seconds a turned-away browser waits before trying again
+    SIMILAR_CANVASES_SHOWN = 6  # "stitchers also liked" entries on the canvas page
+    STITCH_LIST_BULK_LIMIT = 500  # canvases one bulk stitch-list change may touch
+    PURGE_WORKER = True  # purge deleted canvases' dependents on a background thread (False: inline)
+    PURGE_INTERVAL = 60  # seconds between sweeps of the purge queue
+    PURGE_CHUNK_SIZE = 1000  # rows deleted per purge transaction
+    ASSET_MAX_AGE = 365 * 24 * 3600  # seconds browsers keep fingerprinted assets and canvas images
+    STARTUP_BUDGET_MS = 1500  # cold import + create_app() time that 'flask bench-startup' enforces
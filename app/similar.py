@@ -0,0 +1,164 @@
+import logging
+from array import array
+
+from flask import current_app
+
+from app import db
+from app.cache import get_cache, invalidate
+from app.models import Canvas, CanvasVote, JobState, SimilarCanvas, StitchList
+
+logger = logging.getLogger(__name__)
+
+# numpy and scipy are imported inside the job functions: web workers only need similar_canvases()
+
+JOB_NAME = 'similar_canvases'
+# Damps similarities that rest on only a handful of shared stitchers
+SHRINKAGE = 5
+
+
+def interactions():
+    """(user id, canvas id) pairs for every upvote and stitch-list entry, as two int64 arrays."""
+    import numpy as np
+    users, canvases = array('q'), array('q')
+    for query in (db.select(CanvasVote.user_id, CanvasVote.canvas_id).where(CanvasVote.vote == 1),
+                  db.select(StitchList.user_id, StitchList.canvas_id).where(StitchList.canvas_id.isnot(None))):
+        for user_id, canvas_id in db.session.execute(query.execution_options(yield_per=50_000)):
+            users.append(user_id)
+            canvases.append(canvas_id)
+    return np.frombuffer(users, dtype=np.int64), np.frombuffer(canvases, dtype=np.int64)
+
+
+def item_matrix(users, canvases):
+    """Binary canvas x user CSR matrix, plus the canvas id of each row."""
+    import numpy as np
+    from scipy import sparse
+    canvas_ids, rows = np.unique(canvases, return_inverse=True)
+    _, columns = np.unique(users, return_inverse=True)
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)),
+                               shape=(len(canvas_ids), columns.max() + 1 if len(columns) else 0))
+    # A canvas both upvoted and on a stitch list counts once
+    matrix.data[:] = 1
+    return matrix, canvas_ids
+
+
+def top_k_similar(matrix, rows, k, chunk_size):
+    """Yield (row, neighbour rows, scores) with the k most similar rows of matrix to each of rows.
+
+    Similarity is cosine over the binary interaction vectors, shrunk toward zero for
+    small overlaps. Rows are multiplied against the whole matrix chunk_size at a time,
+    so memory stays bounded by one sparse chunk x items block.
+    """
+    import numpy as np
+    counts = np.asarray(matrix.sum(axis=1)).ravel()
+    norms = np.sqrt(counts)
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        overlap = (matrix[chunk] @ transposed).tocsr()
+        for i, row in enumerate(chunk):
+            begin, end = overlap.indptr[i], overlap.indptr[i + 1]
+            neighbours, shared = overlap.indices[begin:end], overlap.data[begin:end]
+            keep = neighbours != row
+            neighbours, shared = neighbours[keep], shared[keep]
+            if not len(neighbours):
+                continue
+            scores = shared / (norms[row] * norms[neighbours]) * (shared / (shared + SHRINKAGE))
+            if len(scores) > k:
+                best = np.argpartition(scores, -k)[-k:]
+                neighbours, scores = neighbours[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            yield row, neighbours[order], scores[order]
+
+
+def changed_canvas_ids(state):
+    """Canvases with new upvotes or stitch-list entries since the previous run's high-water mark."""
+    # Compared as text in CURRENT_TIMESTAMP's format: a bound datetime would carry '.000000'
+    # and sort after a vote stamped in the same second. Older marks were stored with a 'T'.
+    since = state['since'].replace('T', ' ')
+    changed = set(db.session.scalars(
+        db.select(CanvasVote.canvas_id).where(db.type_coerce(CanvasVote.updated_at, db.String) >= since).distinct()))
+    changed.update(db.session.scalars(
+        db.select(StitchList.canvas_id).where(StitchList.id > state['stitch_list_id']).distinct()))
+    return changed
+
+
+def bump_versions(condition):
+    """Retire the cached "also liked" blocks of the canvases matching condition."""
+    # updated_at is left as it was: the canvas itself has not been edited
+    db.session.execute(db.update(Canvas).where(condition)
+                       .values(version=Canvas.version + 1, updated_at=Canvas.updated_at))
+
+
+def refresh_similar_canvases(k=20, chunk_size=1000, incremental=False, progress=lambda done, total: None):
+    """Recompute the SimilarCanvas table and return the number of canvases refreshed.
+
+    A full run rewrites every canvas's neighbours. An incremental run still builds the
+    whole matrix, which is cheap, but only redoes the chunked multiply for canvases that
+    gained interactions since the last run; their neighbours' lists catch up on the next
+    full run. Each chunk's rows are replaced and committed on their own, so the write
+    lock is only held for one chunk at a time and readers never see an emptied table.
+    """
+    import numpy as np
+    # The database's own clock and format, the same that stamps vote rows
+    started = db.session.scalar(db.text('SELECT CURRENT_TIMESTAMP'))
+    stitch_list_id = db.session.scalar(db.select(db.func.max(StitchList.id))) or 0
+    state = db.session.get(JobState, JOB_NAME)
+    if incremental and state is None:
+        logger.info('No previous similar-canvases run; doing a full refresh')
+        incremental = False
+
+    matrix, canvas_ids = item_matrix(*interactions())
+    if incremental:
+        changed = np.fromiter(changed_canvas_ids(state.state), dtype=np.int64)
+        rows = np.flatnonzero(np.isin(canvas_ids, changed))
+    else:
+        rows = np.arange(len(canvas_ids))
+    # End the read transaction (a write one under BEGIN IMMEDIATE) before the long multiply
+    db.session.commit()
+
+    done = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        batch = [{'canvas_id': int(canvas_ids[row]), 'rank': rank,
+                  'similar_id': int(canvas_ids[neighbour]), 'score': float(score)}
+                 for row, neighbours, scores in top_k_similar(matrix, chunk, k, chunk_size)
+                 for rank, (neighbour, score) in enumerate(zip(neighbours, scores))]
+        ids = canvas_ids[chunk].tolist()
+        db.session.execute(db.delete(SimilarCanvas).where(SimilarCanvas.canvas_id.in_(ids)))
+        if batch:
+            db.session.execute(db.insert(SimilarCanvas), batch)
+        bump_versions(Canvas.id.in_(ids))
+        db.session.commit()
+        done += len(chunk)
+        progress(done, len(rows))
+
+    if not incremental:
+        # Canvases that have lost all their interactions since the previous full run
+        interacted = db.union(db.select(CanvasVote.canvas_id).where(CanvasVote.vote == 1),
+                              db.select(StitchList.canvas_id).where(StitchList.canvas_id.isnot(None)))
+        stale = db.select(SimilarCanvas.canvas_id).where(SimilarCanvas.canvas_id.notin_(interacted))
+        bump_versions(Canvas.id.in_(stale))
+        db.session.execute(db.delete(SimilarCanvas).where(SimilarCanvas.canvas_id.notin_(interacted)))
+
+    new_state = {'since': started, 'stitch_list_id': stitch_list_id}
+    state = db.session.get(JobState, JOB_NAME)
+    if state is None:
+        db.session.add(JobState(name=JOB_NAME, state=new_state))
+    else:
+        state.state = new_state
+    db.session.commit()
+
+    # Cached detail pages embed the old recommendations
+    if incremental:
+        invalidate(*[f'canvas:{canvas_id}' for canvas_id in canvas_ids[rows].tolist()])
+    elif get_cache() is not None:
+        get_cache().clear()
+    return len(rows)
+
+
+def similar_canvases(canvas_id, limit=None):
+    """The precomputed neighbours of canvas_id, most similar first, in one indexed query."""
+    limit = limit or current_app.config['SIMILAR_CANVASES_SHOWN']
+    return Canvas.query.join(SimilarCanvas, SimilarCanvas.similar_id == Canvas.id) \
+        .filter(SimilarCanvas.canvas_id == canvas_id) \
+        .order_by(SimilarCanvas.rank).limit(limit).all()
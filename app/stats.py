@@ -0,0 +1,133 @@
+import logging
+
+from app import db
+from app.cache import get_cache, invalidate
+from app.models import Artist, ArtistStats, Canvas, CanvasStats, Comment, JobState, StatsChange, StitchList
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'catalog_stats'
+CANVAS_COLUMNS = ['canvas_id', 'artist_id', 'score', 'stitchers', 'comments']
+ARTIST_COLUMNS = ['artist_id', 'canvases', 'score', 'stitchers', 'comments']
+
+
+def canvas_stats_query():
+    """(canvas_id, artist_id, score, stitchers, comments) for each canvas, as a select to insert from."""
+    stitchers = db.select(db.func.count()).where(StitchList.canvas_id == Canvas.id,
+                                                 StitchList.status.isnot(None)).scalar_subquery()
+    comments = db.select(db.func.count()).where(Comment.canvas_id == Canvas.id).scalar_subquery()
+    return db.select(Canvas.id, Canvas.artist_id, Canvas.score, stitchers, comments)
+
+
+def artist_stats_query():
+    """(artist_id, canvases, score, stitchers, comments) for each artist, summed from canvas_stats."""
+    def total(column):
+        return db.select(db.func.coalesce(db.func.sum(column), 0)) \
+            .where(CanvasStats.artist_id == Artist.id).scalar_subquery()
+
+    canvases = db.select(db.func.count()).where(CanvasStats.artist_id == Artist.id).scalar_subquery()
+    # Distinct people, so someone stitching three of an artist's canvases counts once
+    stitchers = db.select(db.func.count(StitchList.user_id.distinct())) \
+        .join(Canvas, Canvas.id == StitchList.canvas_id) \
+        .where(Canvas.artist_id == Artist.id, StitchList.status.isnot(None)).scalar_subquery()
+    return db.select(Artist.id, canvases, total(CanvasStats.score), stitchers, total(CanvasStats.comments))
+
+
+def _save_state(state, seq):
+    if state is None:
+        db.session.add(JobState(name=JOB_NAME, state={'seq': seq}))
+    else:
+        state.state = {'seq': seq}
+
+
+def _rebuild_in_chunks(stats, key, source_id, columns, query, chunk_size):
+    """Replace a stats table's rows one range of source ids at a time, committing each.
+
+    Rows are swapped range by range rather than the table being emptied first, so
+    readers never see it blank, and rows left by deleted sources go with their range.
+    Returns the rows written.
+    """
+    written = last = 0
+    while True:
+        ids = db.session.scalars(db.select(source_id).where(source_id > last).order_by(source_id).limit(chunk_size)).all()
+        if not ids:
+            db.session.execute(db.delete(stats).where(key > last))
+            db.session.commit()
+            return written
+        db.session.execute(db.delete(stats).where(key > last, key <= ids[-1]))
+        written += db.session.execute(db.insert(stats).from_select(
+            columns, query.where(source_id > last, source_id <= ids[-1]))).rowcount
+        db.session.commit()
+        last = ids[-1]
+
+
+def rebuild_stats(chunk_size=1000):
+    """Recompute every canvas and artist stats row. Returns (canvases, artists) written.
+
+    Each chunk of chunk_size canvases or artists is its own transaction. Journal rows
+    are only cleared, and the high-water mark set, once every row has been rewritten.
+    """
+    seq = db.session.scalar(db.select(db.func.max(StatsChange.seq))) or 0
+    canvases = _rebuild_in_chunks(CanvasStats, CanvasStats.canvas_id, Canvas.id, CANVAS_COLUMNS,
+                                  canvas_stats_query(), chunk_size)
+    artists = _rebuild_in_chunks(ArtistStats, ArtistStats.artist_id, Artist.id, ARTIST_COLUMNS,
+                                 artist_stats_query(), chunk_size)
+    db.session.execute(db.delete(StatsChange).where(StatsChange.seq <= seq))
+    _save_state(db.session.get(JobState, JOB_NAME), seq)
+    db.session.commit()
+
+    if get_cache() is not None:
+        get_cache().clear()
+    return canvases, artists
+
+
+def refresh_stats(chunk_size=1000, progress=lambda done, total: None):
+    """Bring the stats tables up to date with the changes journaled since the last run.
+
+    The stats_change journal is read in seq order, chunk_size rows at a time. Each
+    chunk's canvases are recomputed, plus the artists they belong (or belonged) to,
+    and in the same transaction its journal rows are deleted and the high-water mark
+    moves past them, so an interrupted run resumes where it stopped. Changes journaled
+    after the run starts are left for the next one. With no previous run this is a
+    full rebuild. Returns (canvases, artists) refreshed.
+    """
+    state = db.session.get(JobState, JOB_NAME)
+    if state is None:
+        logger.info('No previous catalog-stats run; doing a full rebuild')
+        return rebuild_stats(chunk_size)
+
+    mark = state.state['seq']
+    seq = db.session.scalar(db.select(db.func.max(StatsChange.seq))) or mark
+    total = db.session.scalar(db.select(db.func.count()).where(StatsChange.seq > mark, StatsChange.seq <= seq))
+    canvases, artists = set(), set()
+    done = 0
+
+    while True:
+        changes = db.session.execute(db.select(StatsChange.seq, StatsChange.canvas_id, StatsChange.artist_id)
+                                     .where(StatsChange.seq > mark, StatsChange.seq <= seq)
+                                     .order_by(StatsChange.seq).limit(chunk_size)).all()
+        if not changes:
+            break
+        canvas_ids = sorted({change.canvas_id for change in changes})
+        artist_ids = {change.artist_id for change in changes if change.artist_id is not None}
+
+        db.session.execute(db.delete(CanvasStats).where(CanvasStats.canvas_id.in_(canvas_ids)))
+        db.session.execute(db.insert(CanvasStats).from_select(
+            CANVAS_COLUMNS, canvas_stats_query().where(Canvas.id.in_(canvas_ids))))
+        artist_ids.update(db.session.scalars(db.select(Canvas.artist_id).where(Canvas.id.in_(canvas_ids))))
+        db.session.execute(db.delete(ArtistStats).where(ArtistStats.artist_id.in_(artist_ids)))
+        db.session.execute(db.insert(ArtistStats).from_select(
+            ARTIST_COLUMNS, artist_stats_query().where(Artist.id.in_(artist_ids))))
+
+        mark = changes[-1].seq
+        db.session.execute(db.delete(StatsChange).where(StatsChange.seq <= mark))
+        _save_state(state, mark)
+        db.session.commit()
+
+        invalidate('artists', *[f'artist:{artist_id}' for artist_id in sorted(artist_ids)])
+        canvases.update(canvas_ids)
+        artists.update(artist_ids)
+        done += len(changes)
+        progress(done, total)
+
+    return len(canvases), len(artists)
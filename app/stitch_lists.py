@@ -0,0 +1,55 @@
+from app import db
+from app.cache import invalidate
+from app.models import Canvas, CanvasStitchCount, StitchList, UserStitchCount
+from app.votes import DIALECT_INSERTS
+
+STITCH_STATUSES = ('Want to Stitch', 'In Progress', 'Completed')
+STITCH_ACTIONS = ('add', 'remove', 'status')
+
+
+def upsert_statement():
+    """INSERT ... ON CONFLICT DO UPDATE on (user_id, canvas_id): re-adding a canvas just moves its status."""
+    stmt = DIALECT_INSERTS[db.engine.dialect.name](StitchList)
+    return stmt.on_conflict_do_update(index_elements=[StitchList.user_id, StitchList.canvas_id],
+                                      set_={'status': stmt.excluded.status})
+
+
+def update_stitch_list(user_id, action, canvas_ids, status=None):
+    """Add, remove or re-status many canvases on a user's stitch list in one transaction.
+
+    Returns the ids of the canvases that were touched. The status count tables follow
+    along through their triggers.
+    """
+    canvas_ids = sorted(set(canvas_ids))
+    if action == 'add':
+        # Unknown ids are dropped rather than stored as dangling rows
+        canvas_ids = list(db.session.scalars(db.select(Canvas.id).where(Canvas.id.in_(canvas_ids))))
+        if canvas_ids:
+            db.session.execute(upsert_statement(), [
+                {'user_id': user_id, 'canvas_id': canvas_id, 'status': status} for canvas_id in canvas_ids])
+    else:
+        mine = db.and_(StitchList.user_id == user_id, StitchList.canvas_id.in_(canvas_ids))
+        if action == 'remove':
+            stmt = db.delete(StitchList).where(mine).returning(StitchList.canvas_id)
+        else:
+            stmt = db.update(StitchList).where(mine).values(status=status).returning(StitchList.canvas_id)
+        canvas_ids = list(db.session.scalars(stmt))
+    db.session.commit()
+    invalidate(*[f'canvas:{canvas_id}' for canvas_id in canvas_ids])
+    return canvas_ids
+
+
+def user_stitch_counts(user_id):
+    return _counts(UserStitchCount, UserStitchCount.user_id, user_id)
+
+
+def canvas_stitch_counts(canvas_id):
+    return _counts(CanvasStitchCount, CanvasStitchCount.canvas_id, canvas_id)
+
+
+def _counts(model, owner_column, owner_id):
+    """{status: count} for every status, from the materialized count table."""
+    counts = dict.fromkeys(STITCH_STATUSES, 0)
+    counts.update(db.session.execute(
+        db.select(model.status, model.count).where(owner_column == owner_id, model.count > 0)).all())
+    return counts
@@ -0,0 +1,217 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from flask import current_app
+
+from app import db
+from app.cache import invalidate
+from app.images import original_url, render_variants, store_file, stored_path, variant_urls
+from app.models import Artist, Canvas, JobState
+
+logger = logging.getLogger(__name__)
+
+FIELDS = {
+    'artists': ('name', 'bio'),
+    'canvases': ('title', 'description', 'artist', 'image'),
+}
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format {fmt!r}; use one of {", ".join(FORMATS)}')
+    return fmt
+
+
+def read_records(f, fmt):
+    """Yield one dict per record, reading the file a line at a time."""
+    if fmt == 'csv':
+        yield from csv.DictReader(f)
+    else:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecordWriter:
+
+    def __init__(self, f, fmt, fields):
+        self.f, self.fmt = f, fmt
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(f, fieldnames=fields)
+            self.csv.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            self.csv.writerow(record)
+        else:
+            self.f.write(json.dumps(record) + '\n')
+
+
+def batches(records, batch_size):
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        yield batch
+
+
+class ArtistMap:
+    """Artist name -> id for the whole catalog, creating missing artists a batch at a time."""
+
+    def __init__(self):
+        self.ids = {}
+        for artist_id, name in db.session.execute(db.select(Artist.id, Artist.name).order_by(Artist.id.desc())):
+            self.ids[name] = artist_id  # oldest wins when names repeat
+
+    def resolve(self, names, bios=None):
+        """Ids for names, inserting the unknown ones in one statement. Does not commit."""
+        bios = bios or {}
+        missing = list(dict.fromkeys(name for name in names if name not in self.ids))
+        if missing:
+            created = db.session.execute(
+                db.insert(Artist).returning(Artist.id, Artist.name, sort_by_parameter_order=True),
+                [{'name': name, 'bio': bios.get(name)} for name in missing])
+            self.ids.update((name, artist_id) for artist_id, name in created)
+        return [self.ids[name] for name in names]
+
+
+def _checkpoint_name(kind, path):
+    return f'import:{kind}:' + hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:20]
+
+
+def import_records(kind, path, fmt=None, batch_size=1000, images_dir=None, workers=4, restart=False,
+                   progress=lambda kind, done: None):
+    """Stream artists or canvases from a CSV/JSONL file into the catalog.
+
+    Each batch is inserted with one executemany and committed together with a
+    checkpoint of how many records are done, so an interrupted import picks up
+    where it stopped. Only one batch is held in memory at a time. Returns the number
+    of records read in this run.
+    """
+    fmt = detect_format(path, fmt)
+    name = _checkpoint_name(kind, path)
+    checkpoint = db.session.get(JobState, name)
+    if checkpoint is not None and restart:
+        db.session.delete(checkpoint)
+        db.session.commit()
+        checkpoint = None
+    skip = checkpoint.state['records'] if checkpoint is not None else 0
+    images_dir = images_dir or os.path.dirname(os.path.abspath(path))
+
+    artists = ArtistMap()
+    done = skip
+    with open(path, newline='', encoding='utf-8') as f, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-images') as pool, \
+            current_app.test_request_context():
+        for batch in batches(islice(read_records(f, fmt), skip, None), batch_size):
+            if kind == 'artists':
+                _import_artists(batch, artists)
+            else:
+                _import_canvases(batch, artists, pool, images_dir)
+            done += len(batch)
+            if checkpoint is None:
+                checkpoint = JobState(name=name, state={'path': os.path.abspath(path), 'records': done})
+                db.session.add(checkpoint)
+            else:
+                checkpoint.state = dict(checkpoint.state, records=done)
+            db.session.commit()
+            progress(kind, done)
+
+    if checkpoint is not None:
+        db.session.delete(checkpoint)
+        db.session.commit()
+    invalidate('featured', 'artists', 'canvases')
+    return done - skip
+
+
+def _import_artists(batch, artists):
+    # Artists already in the catalog (or earlier in the file) are not duplicated
+    artists.resolve([record['name'] for record in batch], {record['name']: record.get('bio') for record in batch})
+
+
+def _import_canvases(batch, artists, pool, images_dir):
+    artist_ids = artists.resolve([record['artist'] for record in batch])
+    app = current_app._get_current_object()
+    images = pool.map(lambda record: _store_image(app, record.get('image'), images_dir), batch)
+    rows = []
+    for record, artist_id, image in zip(batch, artist_ids, images):
+        row = {'title': record['title'], 'description': record.get('description') or None, 'artist_id': artist_id,
+               'image_url': None, 'image_variants': None}
+        if isinstance(image, tuple):
+            content_hash, path = image
+            row.update(image_url=original_url(path), image_variants=variant_urls(content_hash))
+        else:
+            row['image_url'] = image
+        rows.append(row)
+    db.session.execute(db.insert(Canvas), rows)
+
+
+def _store_image(app, image, images_dir):
+    """Copy one image into the store and render its variants; runs on a pool thread.
+
+    Returns (content_hash, path) for a stored file, or the value to keep as the image URL:
+    remote and already-hosted URLs pass through, and an unreadable file is logged and
+    dropped so the canvas still imports.
+    """
+    if not image:
+        return None
+    source = os.path.join(images_dir, image)
+    if image.startswith(('http://', 'https://')) or (image.startswith('/') and not os.path.exists(source)):
+        return image
+    try:
+        with app.app_context():
+            content_hash, path = store_file(source)
+            render_variants(content_hash, path)
+    except (OSError, ValueError):
+        logger.warning('Skipping unreadable image %s', image, exc_info=True)
+        return None
+    return content_hash, path
+
+
+def export_records(kind, path, fmt=None, batch_size=1000, images_dir=None, workers=4,
+                   progress=lambda kind, done: None):
+    """Stream artists or canvases to a CSV/JSONL file that import_records can read back.
+
+    With images_dir, stored canvas images are copied there in parallel and the image
+    column refers to them by file name. Returns the number of records written.
+    """
+    fmt = detect_format(path, fmt)
+    if kind == 'artists':
+        query = db.select(Artist.name, Artist.bio).order_by(Artist.id)
+    else:
+        query = db.select(Canvas.title, Canvas.description, Artist.name.label('artist'),
+                          Canvas.image_url.label('image')).join(Artist).order_by(Canvas.id)
+    if images_dir:
+        os.makedirs(images_dir, exist_ok=True)
+
+    done = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export-images') as pool, \
+            current_app.test_request_context():
+        writer = RecordWriter(f, fmt, FIELDS[kind])
+        rows = db.session.execute(query.execution_options(yield_per=batch_size)).mappings()
+        for batch in batches(rows, batch_size):
+            records = [dict(row) for row in batch]
+            if images_dir and kind == 'canvases':
+                sources = [stored_path(record['image']) for record in records]
+                for record, image in zip(records, pool.map(lambda source: _copy_image(source, images_dir), sources)):
+                    record['image'] = image or record['image']
+            for record in records:
+                writer.write(record)
+            done += len(records)
+            progress(kind, done)
+    return done
+
+
+def _copy_image(source, images_dir):
+    """Copy a stored image out and return its new file name, or None to keep the URL."""
+    if source is None or not os.path.exists(source):
+        return None
+    shutil.copyfile(source, os.path.join(images_dir, os.path.basename(source)))
+    return os.path.basename(source)
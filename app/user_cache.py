@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = '_user_snapshot'
+
+
+class CachedUser(UserMixin):
+    """The fields current_user needs, detached from any database session."""
+
+    def __init__(self, id, username, email, is_admin=False):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.is_admin = is_admin
+
+    def to_dict(self):
+        return {'id': self.id, 'username': self.username, 'email': self.email, 'is_admin': self.is_admin}
+
+
+class UserCache:
+    """Bounded LRU of CachedUser snapshots that expire after ttl seconds.
+
+    Entries and revocations are per process: a user changed in one gunicorn worker stays
+    trusted by another until its ttl runs out, which is why gunicorn.conf.py runs one worker.
+    """
+
+    def __init__(self, max_entries, ttl, stats_every=1000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats_every = stats_every
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+        # user id -> time of the last change, so embedded snapshots older than that are refused;
+        # kept oldest first and dropped after ttl, when every snapshot it could refuse has expired
+        self.revoked = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, load):
+        """Return the cached snapshot for user_id, calling load(user_id) on a miss."""
+        with self._lock:
+            item = self.entries.get(user_id)
+            if item is not None and item[1] > time.monotonic():
+                self.entries.move_to_end(user_id)
+                self._count(hit=True)
+                return item[0]
+            self._count(hit=False)
+
+        user = load(user_id)
+        if user is not None:
+            with self._lock:
+                self.entries[user_id] = (user, time.monotonic() + self.ttl)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            now = time.time()
+            for user_id in user_ids:
+                self.entries.pop(user_id, None)
+                self.revoked.pop(user_id, None)
+                self.revoked[user_id] = now
+            while self.revoked and next(iter(self.revoked.values())) < now - self.ttl:
+                del self.revoked[next(iter(self.revoked))]
+
+    def from_session(self, session, user_id, max_age):
+        """A snapshot embedded in the signed session cookie, if it is recent and not revoked."""
+        snapshot = session.get(SESSION_KEY)
+        if not snapshot or snapshot['user']['id'] != user_id:
+            return None
+        issued = snapshot['at']
+        if time.time() - issued > max_age or self.revoked.get(user_id, 0) >= issued:
+            return None
+        with self._lock:
+            self._count(hit=True)
+        return CachedUser(**snapshot['user'])
+
+    @staticmethod
+    def embed(session, user):
+        snapshot = CachedUser(user.id, user.username, user.email, user.is_admin)
+        session[SESSION_KEY] = {'user': snapshot.to_dict(), 'at': time.time()}
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.entries),
+        }
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.stats_every and (self.hits + self.misses) % self.stats_every == 0:
+            stats = self.stats()
+            logger.info('User cache: %.1f%% hit rate over %d lookups, %d cached',
+                        stats['hit_rate'] * 100, self.hits + self.misses, stats['size'])
@@ -0,0 +1,120 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.cache import invalidate
+from app.events import publish_score
+from app.models import Canvas, CanvasVote, Comment, CommentVote
+
+logger = logging.getLogger(__name__)
+
+DIALECT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+_TARGETS = {CanvasVote: 'canvas_id', CommentVote: 'comment_id'}
+
+
+def vote_value(direction):
+    return 1 if direction == 'up' else -1
+
+
+def upsert_statement(model):
+    """INSERT ... ON CONFLICT DO UPDATE that toggles a vote: repeating the same vote clears it."""
+    stmt = DIALECT_INSERTS[db.engine.dialect.name](model)
+    return stmt.on_conflict_do_update(
+        index_elements=[model.user_id, getattr(model, _TARGETS[model])],
+        set_={'vote': db.case((model.vote == stmt.excluded.vote, 0), else_=stmt.excluded.vote),
+              'updated_at': db.func.now()},
+    )
+
+
+def cast_vote(model, user_id, target_id, direction):
+    """Apply one vote in a single statement and return the user's resulting vote."""
+    params = {'user_id': user_id, _TARGETS[model]: target_id, 'vote': vote_value(direction)}
+    new_vote = db.session.execute(upsert_statement(model).values(params).returning(model.vote)).scalar_one()
+    db.session.commit()
+    return new_vote
+
+
+class VoteBuffer:
+    """Write-behind queue: votes are applied in batched transactions every interval_ms."""
+
+    def __init__(self, app, interval_ms):
+        self.app = app
+        self.interval = interval_ms / 1000
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, model, user_id, target_id, direction):
+        self._ensure_started()
+        self.queue.put((model, {'user_id': user_id, _TARGETS[model]: target_id, 'vote': vote_value(direction)}))
+
+    def flush(self):
+        batches = {}
+        while True:
+            try:
+                model, params = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            batches.setdefault(model, []).append(params)
+        if not batches:
+            return 0
+
+        with self.app.app_context():
+            try:
+                # executemany keeps queue order, so repeated toggles by one user still cancel out
+                for model, rows in batches.items():
+                    db.session.execute(upsert_statement(model), rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Dropped a batch of %d votes', sum(len(rows) for rows in batches.values()))
+                return 0
+            voted_canvases = {row['canvas_id'] for row in batches.get(CanvasVote, ())}
+            voted_comments = self._comment_canvases(batches)
+            # Pages may have been re-cached between the vote request and this flush
+            tags = [f'canvas:{canvas_id}' for canvas_id in voted_canvases | set(voted_comments.values())]
+            if voted_canvases:
+                tags.append('canvas-scores')
+            invalidate(*tags)
+            for canvas_id in voted_canvases:
+                publish_score(Canvas, canvas_id, canvas_id)
+            for comment_id, canvas_id in voted_comments.items():
+                publish_score(Comment, comment_id, canvas_id)
+        return sum(len(rows) for rows in batches.values())
+
+    def _comment_canvases(self, batches):
+        comment_ids = {row['comment_id'] for row in batches.get(CommentVote, ())}
+        if not comment_ids:
+            return {}
+        return dict(db.session.execute(db.select(Comment.id, Comment.canvas_id).where(Comment.id.in_(comment_ids))).all())
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+def submit_vote(model, user_id, target_id, direction):
+    """Cast a vote now, or queue it when write-behind mode is on. Returns the new vote or None if queued."""
+    interval_ms = current_app.config.get('VOTE_WRITE_BEHIND_MS')
+    if not interval_ms:
+        return cast_vote(model, user_id, target_id, direction)
+
+    buffer = current_app.extensions.get('vote_buffer')
+    if buffer is None:
+        buffer = current_app.extensions['vote_buffer'] = VoteBuffer(current_app._get_current_object(), interval_ms)
+    buffer.put(model, user_id, target_id, direction)
+    return None
@@ -0,0 +1,45 @@
+from flask import Blueprint, url_for, redirect, jsonify, abort
+from flask_login import current_user, login_required
+
+from app import db
+from app.cache import invalidate
+from app.catalog import wants_json
+from app.events import publish_score
+from app.models import Canvas, Comment, CanvasVote, CommentVote
+from app.votes import submit_vote
+
+bp = Blueprint('voting', __name__)
+
+def vote_response(model, target_id, new_vote):
+    """The counts after a vote, or 202 when write-behind mode has only queued it."""
+    if new_vote is None:
+        return jsonify(queued=True), 202
+    counts = db.session.execute(
+        db.select(model.score, model.upvotes, model.downvotes).where(model.id == target_id)).first()
+    if counts is None:
+        abort(404)
+    return jsonify(score=counts.score, upvotes=counts.upvotes, downvotes=counts.downvotes, user_vote=new_vote)
+
+@bp.route('/vote_canvas/<int:canvas_id>/<vote>', methods=['POST'])
+@login_required
+def vote_canvas(canvas_id, vote):
+    new_vote = submit_vote(CanvasVote, current_user.id, canvas_id, vote)
+    invalidate(f'canvas:{canvas_id}', 'canvas-scores')
+    if new_vote is not None:
+        publish_score(Canvas, canvas_id, canvas_id)
+    if wants_json():
+        return vote_response(Canvas, canvas_id, new_vote)
+    return redirect(url_for('catalog.canvas_detail', canvas_id=canvas_id))
+
+
+@bp.route('/vote_comment/<int:comment_id>/<vote>', methods=['POST'])
+@login_required
+def vote_comment(comment_id, vote):
+    comment = Comment.query.get_or_404(comment_id)
+    new_vote = submit_vote(CommentVote, current_user.id, comment_id, vote)
+    invalidate(f'canvas:{comment.canvas_id}')
+    if new_vote is not None:
+        publish_score(Comment, comment_id, comment.canvas_id)
+    if wants_json():
+        return vote_response(Comment, comment_id, new_vote)
+    return redirect(url_for('catalog.canvas_detail', canvas_id=comment.canvas_id))
@@ -0,0 +1,17 @@
+# Read by gunicorn when started from this directory: gunicorn wsgi:app
+#
+# Each viewer of a canvas page holds an open /canvas/<id>/events stream for up to
+# EVENT_STREAM_MAX_AGE seconds. The default sync worker serves one request at a time,
+# so a single viewer would tie it up; threaded workers (or -k gevent) are required.
+# Streams past EVENT_STREAM_LIMIT (24) get a 503, which keeps 8 threads free for pages.
+worker_class = 'gthread'
+threads = 32
+
+# One worker: the 'local' EVENT_BROKER, the 'memory' RESPONSE_CACHE and the user cache's
+# revocations all live in process memory. With a second worker, a vote handled by one
+# would never reach viewers streaming from the other, nor invalidate its cached pages.
+# Only raise this with RESPONSE_CACHE = 'sqlite' and an EVENT_BROKER shared between processes.
+workers = 1
+
+# wsgi.py is built for --preload: each forked worker drops the master's DB connections
+preload_app = True
@@ -0,0 +1,79 @@
+"""Unique stitch-list entries and trigger-maintained status counts.
+
+Revision ID: 1b8f4c62d9a7
+Revises: 9e4d27b1c6f0
+Create Date: 2026-10-19 00:31:47.905216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b8f4c62d9a7'
+down_revision = '9e4d27b1c6f0'
+branch_labels = None
+depends_on = None
+
+COUNT_TABLES = (('canvas_stitch_count', 'canvas_id'), ('user_stitch_count', 'user_id'))
+
+
+def _add(count_table, owner, row):
+    return (f"INSERT INTO {count_table} ({owner}, status, count) SELECT {row}.{owner}, {row}.status, 1 "
+            f"WHERE {row}.{owner} IS NOT NULL AND {row}.status IS NOT NULL "
+            f"ON CONFLICT ({owner}, status) DO UPDATE SET count = count + 1;")
+
+
+def _remove(count_table, owner, row):
+    return f"UPDATE {count_table} SET count = count - 1 WHERE {owner} = {row}.{owner} AND status = {row}.status;"
+
+
+def upgrade():
+    # Keep the newest entry where a canvas was added to the same list more than once
+    op.execute("DELETE FROM stitch_list WHERE id NOT IN "
+               "(SELECT MAX(id) FROM stitch_list GROUP BY user_id, canvas_id)")
+    with op.batch_alter_table('stitch_list', schema=None) as batch_op:
+        batch_op.create_index('ix_stitch_list_user_id_canvas_id', ['user_id', 'canvas_id'], unique=True)
+
+    op.create_table('canvas_stitch_count',
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['canvas_id'], ['canvas.id'], ),
+    sa.PrimaryKeyConstraint('canvas_id', 'status')
+    )
+    op.create_table('user_stitch_count',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'status')
+    )
+
+    for count_table, owner in COUNT_TABLES:
+        op.execute(
+            f"INSERT INTO {count_table} ({owner}, status, count) SELECT {owner}, status, COUNT(*) FROM stitch_list "
+            f"WHERE {owner} IS NOT NULL AND status IS NOT NULL GROUP BY {owner}, status"
+        )
+        op.execute(
+            f"CREATE TRIGGER stitch_list_{count_table}_insert AFTER INSERT ON stitch_list BEGIN "
+            f"{_add(count_table, owner, 'NEW')} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER stitch_list_{count_table}_update AFTER UPDATE OF status, {owner} ON stitch_list BEGIN "
+            f"{_remove(count_table, owner, 'OLD')} {_add(count_table, owner, 'NEW')} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER stitch_list_{count_table}_delete AFTER DELETE ON stitch_list BEGIN "
+            f"{_remove(count_table, owner, 'OLD')} END"
+        )
+
+
+def downgrade():
+    for count_table, _ in COUNT_TABLES:
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS stitch_list_{count_table}_{action}")
+    op.drop_table('user_stitch_count')
+    op.drop_table('canvas_stitch_count')
+    with op.batch_alter_table('stitch_list', schema=None) as batch_op:
+        batch_op.drop_index('ix_stitch_list_user_id_canvas_id')
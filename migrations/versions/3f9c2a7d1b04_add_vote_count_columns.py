@@ -0,0 +1,41 @@
+"""Add denormalized vote count columns.
+
+Revision ID: 3f9c2a7d1b04
+Revises: 848261c6d14f
+Create Date: 2026-10-18 09:12:41.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b04'
+down_revision = '848261c6d14f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('canvas', 'comment'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('score', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('upvotes', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('downvotes', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing vote rows
+    for table, vote_table, fk in (('canvas', 'canvas_vote', 'canvas_id'), ('comment', 'comment_vote', 'comment_id')):
+        op.execute(
+            f"UPDATE {table} SET "
+            f"score = (SELECT COALESCE(SUM(vote), 0) FROM {vote_table} WHERE {fk} = {table}.id), "
+            f"upvotes = (SELECT COUNT(*) FROM {vote_table} WHERE {fk} = {table}.id AND vote = 1), "
+            f"downvotes = (SELECT COUNT(*) FROM {vote_table} WHERE {fk} = {table}.id AND vote = -1)"
+        )
+
+
+def downgrade():
+    for table in ('comment', 'canvas'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('downvotes')
+            batch_op.drop_column('upvotes')
+            batch_op.drop_column('score')
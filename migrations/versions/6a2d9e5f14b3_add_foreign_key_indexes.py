@@ -0,0 +1,39 @@
+"""Index foreign keys and the listing access paths.
+
+Revision ID: 6a2d9e5f14b3
+Revises: 1b8f4c62d9a7
+Create Date: 2026-10-19 01:12:30.551872
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2d9e5f14b3'
+down_revision = '1b8f4c62d9a7'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('canvas', 'ix_canvas_artist_id', ['artist_id']),
+    ('canvas', 'ix_canvas_artist_id_score_id', ['artist_id', 'score', 'id']),
+    ('canvas', 'ix_canvas_artist_id_hot_id', ['artist_id', 'hot', 'id']),
+    ('comment', 'ix_comment_user_id', ['user_id']),
+    ('stitch_list', 'ix_stitch_list_user_id_status', ['user_id', 'status']),
+    ('stitch_list', 'ix_stitch_list_canvas_id', ['canvas_id']),
+    ('canvas_vote', 'ix_canvas_vote_canvas_id_vote', ['canvas_id', 'vote']),
+    ('canvas_vote', 'ix_canvas_vote_updated_at', ['updated_at']),
+    ('comment_vote', 'ix_comment_vote_comment_id_vote', ['comment_id', 'vote']),
+)
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, name, _ in reversed(INDEXES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(name)
@@ -0,0 +1,51 @@
+"""Never reuse canvas or comment ids.
+
+Revision ID: a1f6c2d8e947
+Revises: e6a0b3c95d17
+Create Date: 2026-10-19 06:02:14.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f6c2d8e947'
+down_revision = 'e6a0b3c95d17'
+branch_labels = None
+depends_on = None
+
+# Highest id each table has ever handed out, including ids of deleted rows whose
+# dependents are still waiting for the purge worker
+HIGHEST_IDS = {
+    'canvas': "SELECT max(id) FROM (SELECT max(id) AS id FROM canvas UNION ALL SELECT max(canvas_id) FROM canvas_purge "
+              "UNION ALL SELECT max(canvas_id) FROM comment UNION ALL SELECT max(canvas_id) FROM canvas_vote "
+              "UNION ALL SELECT max(canvas_id) FROM stitch_list)",
+    'comment': "SELECT max(id) FROM (SELECT max(id) AS id FROM comment UNION ALL SELECT max(comment_id) FROM comment_vote)",
+}
+
+
+def _rebuild(table, autoincrement):
+    # SQLite can only add or drop AUTOINCREMENT by copying the table, which drops its triggers
+    triggers = op.get_bind().execute(
+        sa.text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"), {'table': table}
+    ).scalars().all()
+    # Other tables' triggers write to this one; legacy renames don't re-check them while it's missing
+    op.execute('PRAGMA legacy_alter_table = ON')
+    with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    op.execute('PRAGMA legacy_alter_table = OFF')
+    for sql in triggers:
+        op.execute(sql)
+
+
+def upgrade():
+    for table, highest in HIGHEST_IDS.items():
+        _rebuild(table, True)
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', coalesce(({highest}), 0)")
+
+
+def downgrade():
+    for table in HIGHEST_IDS:
+        _rebuild(table, False)
@@ -0,0 +1,47 @@
+"""Maintain vote counts with triggers on the vote tables.
+
+Revision ID: b71e0c94d5a2
+Revises: 3f9c2a7d1b04
+Create Date: 2026-10-18 11:40:07.518302
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e0c94d5a2'
+down_revision = '3f9c2a7d1b04'
+branch_labels = None
+depends_on = None
+
+TABLES = (('canvas_vote', 'canvas', 'canvas_id'), ('comment_vote', 'comment', 'comment_id'))
+
+
+def _shift(*terms):
+    def delta(expr):
+        return ' '.join(f"{sign} IFNULL({row}.{expr}, 0)" for sign, row in terms)
+    return (f"score = score {delta('vote')}, "
+            f"upvotes = upvotes {delta('vote = 1')}, "
+            f"downvotes = downvotes {delta('vote = -1')}")
+
+
+def upgrade():
+    for vote_table, target_table, fk in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {vote_table}_counts_insert AFTER INSERT ON {vote_table} BEGIN "
+            f"UPDATE {target_table} SET {_shift(('+', 'NEW'))} WHERE id = NEW.{fk}; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {vote_table}_counts_update AFTER UPDATE OF vote ON {vote_table} BEGIN "
+            f"UPDATE {target_table} SET {_shift(('-', 'OLD'), ('+', 'NEW'))} WHERE id = NEW.{fk}; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {vote_table}_counts_delete AFTER DELETE ON {vote_table} BEGIN "
+            f"UPDATE {target_table} SET {_shift(('-', 'OLD'))} WHERE id = OLD.{fk}; END"
+        )
+
+
+def downgrade():
+    for vote_table, _, _ in TABLES:
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {vote_table}_counts_{action}")
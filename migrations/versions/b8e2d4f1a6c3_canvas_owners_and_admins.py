@@ -0,0 +1,36 @@
+"""Record who added each artist and which users are admins.
+
+Revision ID: b8e2d4f1a6c3
+Revises: a1f6c2d8e947
+Create Date: 2026-10-19 06:31:47.905163
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2d4f1a6c3'
+down_revision = 'a1f6c2d8e947'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ALTER TABLE rather than a batch copy, which would drop the search triggers on artist
+    op.execute('ALTER TABLE artist ADD COLUMN user_id INTEGER REFERENCES user (id)')
+    op.add_column('user', sa.Column('is_admin', sa.Boolean(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('user', 'is_admin')
+    # SQLite can't drop a foreign key column in place; copy the table and put its triggers back
+    triggers = op.get_bind().execute(
+        sa.text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'artist'")
+    ).scalars().all()
+    op.execute('PRAGMA legacy_alter_table = ON')
+    with op.batch_alter_table('artist', schema=None) as batch_op:
+        batch_op.drop_column('user_id')
+    op.execute('PRAGMA legacy_alter_table = OFF')
+    for sql in triggers:
+        op.execute(sql)
@@ -0,0 +1,82 @@
+"""Add created/updated timestamps and trigger-maintained ranking columns.
+
+Revision ID: c5f18b2e7a39
+Revises: 7c3e5a90d812
+Create Date: 2026-10-18 23:14:52.660418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f18b2e7a39'
+down_revision = '7c3e5a90d812'
+branch_labels = None
+depends_on = None
+
+# app.rankings.HOT_RANK_SQL and CONTROVERSY_RANK_SQL, in built-in SQL so any client can write
+RANKS = ("hot = round(sign(NEW.score) * log10(max(abs(NEW.score), 1)) + "
+         "(coalesce(strftime('%s', NEW.created_at), 1134028003) - 1134028003) / 45000.0, 7), "
+         "controversy = CASE WHEN NEW.upvotes > 0 AND NEW.downvotes > 0 "
+         "THEN pow(NEW.upvotes + NEW.downvotes, "
+         "1.0 * min(NEW.upvotes, NEW.downvotes) / max(NEW.upvotes, NEW.downvotes)) "
+         "ELSE 0.0 END")
+
+
+def upgrade():
+    for table in ('canvas', 'comment', 'canvas_vote', 'comment_vote'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Existing rows predate the columns; count them as created now
+        op.execute(f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP")
+
+    for table in ('canvas', 'comment'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('hot', sa.Float(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('controversy', sa.Float(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('canvas', schema=None) as batch_op:
+        batch_op.create_index('ix_canvas_hot_id', ['hot', 'id'], unique=False)
+        batch_op.create_index('ix_canvas_controversy_id', ['controversy', 'id'], unique=False)
+        batch_op.create_index('ix_canvas_created_at', ['created_at'], unique=False)
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_canvas_id_hot_id', ['canvas_id', 'hot', 'id'], unique=False)
+        batch_op.create_index('ix_comment_canvas_id_controversy_id', ['canvas_id', 'controversy', 'id'], unique=False)
+
+    for table in ('canvas', 'comment'):
+        op.execute(
+            f"CREATE TRIGGER {table}_rankings_insert AFTER INSERT ON {table} BEGIN "
+            f"UPDATE {table} SET {RANKS} WHERE id = NEW.id; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_rankings_update AFTER UPDATE OF score, upvotes, downvotes, created_at ON {table} BEGIN "
+            f"UPDATE {table} SET {RANKS} WHERE id = NEW.id; END"
+        )
+        # Backfill through the update trigger
+        op.execute(f"UPDATE {table} SET score = score")
+
+
+def downgrade():
+    for table in ('comment', 'canvas'):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_rankings_update")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_rankings_insert")
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_canvas_id_controversy_id')
+        batch_op.drop_index('ix_comment_canvas_id_hot_id')
+    with op.batch_alter_table('canvas', schema=None) as batch_op:
+        batch_op.drop_index('ix_canvas_created_at')
+        batch_op.drop_index('ix_canvas_controversy_id')
+        batch_op.drop_index('ix_canvas_hot_id')
+
+    for table in ('comment', 'canvas'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('controversy')
+            batch_op.drop_column('hot')
+
+    for table in ('comment_vote', 'canvas_vote', 'comment', 'canvas'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('created_at')
@@ -0,0 +1,100 @@
+"""Precomputed artist and canvas stats, with a trigger-fed change journal.
+
+Revision ID: c84d1f6a2b93
+Revises: f3a71c08e5d2
+Create Date: 2026-10-19 03:12:44.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c84d1f6a2b93'
+down_revision = 'f3a71c08e5d2'
+branch_labels = None
+depends_on = None
+
+STATS_CHANGE_TRIGGERS = {
+    'canvas_stats_change_insert': "AFTER INSERT ON canvas BEGIN INSERT INTO stats_change (canvas_id, artist_id) "
+                                  "SELECT NEW.id, NULL WHERE NEW.id IS NOT NULL; END",
+    'canvas_stats_change_update': "AFTER UPDATE OF score, artist_id ON canvas BEGIN "
+                                  "INSERT INTO stats_change (canvas_id, artist_id) "
+                                  "SELECT OLD.id, OLD.artist_id WHERE OLD.id IS NOT NULL; END",
+    'canvas_stats_change_delete': "AFTER DELETE ON canvas BEGIN INSERT INTO stats_change (canvas_id, artist_id) "
+                                  "SELECT OLD.id, OLD.artist_id WHERE OLD.id IS NOT NULL; END",
+    'stitch_list_stats_change_insert': "AFTER INSERT ON stitch_list BEGIN "
+                                       "INSERT INTO stats_change (canvas_id, artist_id) "
+                                       "SELECT NEW.canvas_id, NULL WHERE NEW.canvas_id IS NOT NULL; END",
+    'stitch_list_stats_change_update': "AFTER UPDATE OF status, canvas_id, user_id ON stitch_list BEGIN "
+                                       "INSERT INTO stats_change (canvas_id, artist_id) "
+                                       "SELECT OLD.canvas_id, NULL WHERE OLD.canvas_id IS NOT NULL UNION ALL "
+                                       "SELECT NEW.canvas_id, NULL WHERE NEW.canvas_id IS NOT NULL; END",
+    'stitch_list_stats_change_delete': "AFTER DELETE ON stitch_list BEGIN "
+                                       "INSERT INTO stats_change (canvas_id, artist_id) "
+                                       "SELECT OLD.canvas_id, NULL WHERE OLD.canvas_id IS NOT NULL; END",
+    'comment_stats_change_insert': "AFTER INSERT ON comment BEGIN INSERT INTO stats_change (canvas_id, artist_id) "
+                                   "SELECT NEW.canvas_id, NULL WHERE NEW.canvas_id IS NOT NULL; END",
+    'comment_stats_change_delete': "AFTER DELETE ON comment BEGIN INSERT INTO stats_change (canvas_id, artist_id) "
+                                   "SELECT OLD.canvas_id, NULL WHERE OLD.canvas_id IS NOT NULL; END",
+}
+
+
+def upgrade():
+    op.create_table('canvas_stats',
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stitchers', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('comments', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('canvas_id')
+    )
+    op.create_index('ix_canvas_stats_artist_id', 'canvas_stats', ['artist_id'], unique=False)
+    op.create_table('artist_stats',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('canvases', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('score', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stitchers', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('comments', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('artist_id')
+    )
+    op.create_table('stats_change',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    for name, body in STATS_CHANGE_TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+    # Backfill, and start the incremental job from an empty journal
+    op.execute(
+        "INSERT INTO canvas_stats (canvas_id, artist_id, score, stitchers, comments) "
+        "SELECT id, artist_id, score, "
+        "(SELECT count(*) FROM stitch_list WHERE stitch_list.canvas_id = canvas.id AND stitch_list.status IS NOT NULL), "
+        "(SELECT count(*) FROM comment WHERE comment.canvas_id = canvas.id) FROM canvas"
+    )
+    op.execute(
+        "INSERT INTO artist_stats (artist_id, canvases, score, stitchers, comments) "
+        "SELECT id, "
+        "(SELECT count(*) FROM canvas_stats WHERE canvas_stats.artist_id = artist.id), "
+        "(SELECT coalesce(sum(score), 0) FROM canvas_stats WHERE canvas_stats.artist_id = artist.id), "
+        "(SELECT count(DISTINCT stitch_list.user_id) FROM stitch_list JOIN canvas ON canvas.id = stitch_list.canvas_id "
+        "WHERE canvas.artist_id = artist.id AND stitch_list.status IS NOT NULL), "
+        "(SELECT coalesce(sum(comments), 0) FROM canvas_stats WHERE canvas_stats.artist_id = artist.id) FROM artist"
+    )
+    op.execute(
+        "INSERT OR REPLACE INTO job_state (name, state, updated_at) "
+        "VALUES ('catalog_stats', '{\"seq\": 0}', CURRENT_TIMESTAMP)"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM job_state WHERE name = 'catalog_stats'")
+    for name in STATS_CHANGE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table('stats_change')
+    op.drop_table('artist_stats')
+    op.drop_index('ix_canvas_stats_artist_id', table_name='canvas_stats')
+    op.drop_table('canvas_stats')
@@ -0,0 +1,41 @@
+"""Version counter keying the canvas page's cached fragments.
+
+Revision ID: d52e8a17c4f6
+Revises: c84d1f6a2b93
+Create Date: 2026-10-19 04:05:31.209846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52e8a17c4f6'
+down_revision = 'c84d1f6a2b93'
+branch_labels = None
+depends_on = None
+
+CANVAS_VERSION_TRIGGERS = {
+    'canvas_version_edit': "AFTER UPDATE OF title, description, artist_id, image_url, image_variants ON canvas "
+                           "BEGIN UPDATE canvas SET version = version + 1 WHERE id = NEW.id; END",
+    'stitch_list_canvas_version_insert': "AFTER INSERT ON stitch_list BEGIN "
+                                         "UPDATE canvas SET version = version + 1 WHERE id = NEW.canvas_id; END",
+    'stitch_list_canvas_version_update': "AFTER UPDATE OF status, canvas_id ON stitch_list BEGIN "
+                                         "UPDATE canvas SET version = version + 1 "
+                                         "WHERE id IN (OLD.canvas_id, NEW.canvas_id); END",
+    'stitch_list_canvas_version_delete': "AFTER DELETE ON stitch_list BEGIN "
+                                         "UPDATE canvas SET version = version + 1 WHERE id = OLD.canvas_id; END",
+}
+
+
+def upgrade():
+    # Plain ALTER TABLE rather than a batch copy, which would drop the triggers on canvas
+    op.add_column('canvas', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    for name, body in CANVAS_VERSION_TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def downgrade():
+    for name in CANVAS_VERSION_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_column('canvas', 'version')
@@ -0,0 +1,53 @@
+"""Add FTS5 search index over canvases, artists and comments.
+
+Revision ID: e2b95d4f0a71
+Revises: a4c07e19b6d8
+Create Date: 2026-10-18 17:48:30.662915
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b95d4f0a71'
+down_revision = 'a4c07e19b6d8'
+branch_labels = None
+depends_on = None
+
+# (kind, table, title column, body column); rowid = id * 4 + kind
+SOURCES = (
+    (1, 'canvas', 'title', 'description'),
+    (2, 'artist', 'name', 'bio'),
+    (3, 'comment', None, 'content'),
+)
+
+
+def upgrade():
+    op.execute("CREATE VIRTUAL TABLE search_index USING fts5(title, body, tokenize='porter unicode61')")
+    for kind, table, title, body in SOURCES:
+        new_title = f'NEW.{title}' if title else 'NULL'
+        changed = ', '.join(column for column in (title, body) if column)
+        op.execute(
+            f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index(rowid, title, body) VALUES (NEW.id * 4 + {kind}, {new_title}, NEW.{body}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {changed} ON {table} BEGIN "
+            f"UPDATE search_index SET title = {new_title}, body = NEW.{body} WHERE rowid = NEW.id * 4 + {kind}; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = OLD.id * 4 + {kind}; END"
+        )
+        op.execute(
+            f"INSERT INTO search_index(rowid, title, body) "
+            f"SELECT id * 4 + {kind}, {title or 'NULL'}, {body} FROM {table}"
+        )
+    op.execute("INSERT INTO search_index(search_index) VALUES ('optimize')")
+
+
+def downgrade():
+    for _, table, _, _ in SOURCES:
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{action}")
+    op.execute("DROP TABLE search_index")
@@ -0,0 +1,48 @@
+"""Rank in built-in SQL and index the windowed leaderboards by creation time.
+
+Revision ID: e6a0b3c95d17
+Revises: d52e8a17c4f6
+Create Date: 2026-10-19 05:12:47.530194
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a0b3c95d17'
+down_revision = 'd52e8a17c4f6'
+branch_labels = None
+depends_on = None
+
+# The triggers used to call hot_rank() and controversy_rank(), which only existed on
+# connections the app opened; these are app.rankings.HOT_RANK_SQL and CONTROVERSY_RANK_SQL
+RANKS = ("hot = round(sign(NEW.score) * log10(max(abs(NEW.score), 1)) + "
+         "(coalesce(strftime('%s', NEW.created_at), 1134028003) - 1134028003) / 45000.0, 7), "
+         "controversy = CASE WHEN NEW.upvotes > 0 AND NEW.downvotes > 0 "
+         "THEN pow(NEW.upvotes + NEW.downvotes, "
+         "1.0 * min(NEW.upvotes, NEW.downvotes) / max(NEW.upvotes, NEW.downvotes)) "
+         "ELSE 0.0 END")
+
+
+def upgrade():
+    for table in ('canvas', 'comment'):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_rankings_insert")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_rankings_update")
+        op.execute(
+            f"CREATE TRIGGER {table}_rankings_insert AFTER INSERT ON {table} BEGIN "
+            f"UPDATE {table} SET {RANKS} WHERE id = NEW.id; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_rankings_update AFTER UPDATE OF score, upvotes, downvotes, created_at ON {table} BEGIN "
+            f"UPDATE {table} SET {RANKS} WHERE id = NEW.id; END"
+        )
+
+    # Plain CREATE INDEX rather than a batch copy, which would drop the triggers on canvas
+    op.create_index('ix_canvas_artist_id_created_at', 'canvas', ['artist_id', 'created_at'], unique=False)
+    op.create_index('ix_comment_canvas_id_created_at', 'comment', ['canvas_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_comment_canvas_id_created_at', table_name='comment')
+    op.drop_index('ix_canvas_artist_id_created_at', table_name='canvas')
+    # c5f18b2e7a39 now creates these same triggers, so they stay as they are
@@ -0,0 +1,40 @@
+"""Queue deleted canvases for a chunked background purge.
+
+Revision ID: f3a71c08e5d2
+Revises: 6a2d9e5f14b3
+Create Date: 2026-10-19 01:46:18.027394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a71c08e5d2'
+down_revision = '6a2d9e5f14b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('canvas_purge',
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('canvas_id')
+    )
+    op.execute(
+        "CREATE TRIGGER canvas_purge_enqueue AFTER DELETE ON canvas BEGIN "
+        "INSERT OR IGNORE INTO canvas_purge (canvas_id, deleted_at) VALUES (OLD.id, CURRENT_TIMESTAMP); END"
+    )
+    # Canvases deleted before this revision may have left rows behind
+    op.execute(
+        "INSERT OR IGNORE INTO canvas_purge (canvas_id, deleted_at) "
+        "SELECT DISTINCT canvas_id, CURRENT_TIMESTAMP FROM ("
+        "SELECT canvas_id FROM comment UNION SELECT canvas_id FROM canvas_vote "
+        "UNION SELECT canvas_id FROM stitch_list) WHERE canvas_id NOT IN (SELECT id FROM canvas)"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS canvas_purge_enqueue")
+    op.drop_table('canvas_purge')
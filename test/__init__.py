@@ -0,0 +1,42 @@
+import unittest
+
+from app import create_app, db
+from app.models import User, Artist, Canvas
+
+# In-memory database, no CSRF tokens to fetch and every page rendered fresh
+TEST_CONFIG = {'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+               'WTF_CSRF_ENABLED': False, 'RESPONSE_CACHE': None}
+
+
+class AppTestCase(unittest.TestCase):
+    """Builds the app from TEST_CONFIG updated with config, pushes its context and creates the tables."""
+
+    config = {}
+
+    def setUp(self):
+        self.app = create_app({**TEST_CONFIG, **self.config})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_canvas(self):
+        """Flush the usual fixture: self.user, self.artist and self.artist's self.canvas."""
+        self.user = User(username='stitcher', email='stitcher@example.com', password='pw')
+        self.artist = Artist(name='Artist')
+        db.session.add_all([self.user, self.artist])
+        db.session.flush()
+        self.canvas = Canvas(title='Canvas', artist_id=self.artist.id)
+        db.session.add(self.canvas)
+        db.session.flush()
+
+    def client_for(self, user):
+        """A test client logged in as user."""
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+        return client
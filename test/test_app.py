@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from test import TEST_CONFIG
+
+
+class TestAppFactory(unittest.TestCase):
+
+    def test_apps_are_configured_independently(self):
+        first = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'PAGE_SIZE': 10})
+        second = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.assertEqual(first.config['PAGE_SIZE'], 10)
+        self.assertEqual(second.config['PAGE_SIZE'], 50)
+        self.assertEqual(set(first.blueprints), {'auth', 'catalog', 'voting'})
+        self.assertEqual(first.url_map.bind('').match('/vote_canvas/1/up', method='POST')[0], 'voting.vote_canvas')
+
+    def test_preload_safe_workers_drop_inherited_connections(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/app.db', 'PRELOAD_SAFE': True})
+            with app.app_context():
+                db.session.execute(db.text('SELECT 1'))
+                db.session.remove()
+                self.assertEqual(db.engine.pool.checkedin(), 1)
+
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    with app.app_context():
+                        fresh = db.engine.pool.checkedin() == 0
+                        ok = fresh and db.session.execute(db.text('SELECT 1')).scalar() == 1
+                except Exception:
+                    ok = False
+                os._exit(0 if ok else 1)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            with app.app_context():
+                self.assertEqual(db.engine.pool.checkedin(), 1)
+
+    def test_wsgi_app_serves_requests_without_forking(self):
+        import wsgi
+        self.assertIn('sqlalchemy', wsgi.app.extensions)
+
+        app = create_app({**wsgi.CONFIG, **TEST_CONFIG})
+        with app.app_context():
+            db.create_all()
+            self.assertEqual(app.test_client().get('/').status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import brotli
+from flask import url_for
+
+from app import create_app
+from app.assets import build_assets, load_manifest
+from test import TEST_CONFIG
+
+CSS = b'.canvas-card { margin: 0 auto; padding: 12px; border: 1px solid #ddd; }\n' * 50
+
+
+class TestAssetPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(TEST_CONFIG)
+        self.static_dir = tempfile.TemporaryDirectory()
+        self.app.static_folder = self.static_dir.name
+        self.write('css/styles.css', CSS)
+        self.write('images/logo.png', b'\x89PNG not really')
+        self.write('canvas_images/' + 'a' * 64 + '_thumb.jpg', b'jpeg bytes')
+        self.manifest = build_assets(self.static_dir.name)
+        load_manifest(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.static_dir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.static_dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def get(self, url, encoding=None):
+        return self.client.get(url, headers={'Accept-Encoding': encoding} if encoding else {})
+
+    def test_build_fingerprints_and_precompresses_text_assets(self):
+        target = self.manifest['css/styles.css']
+        self.assertRegex(target, r'^dist/css/styles\.[0-9a-f]{12}\.css$')
+        for suffix in ('', '.gz', '.br'):
+            self.assertTrue(os.path.exists(os.path.join(self.static_dir.name, target + suffix)), suffix)
+        # Already-compressed formats are copied but not compressed again
+        self.assertFalse(os.path.exists(os.path.join(self.static_dir.name, self.manifest['images/logo.png'] + '.gz')))
+        self.assertNotIn('canvas_images/' + 'a' * 64 + '_thumb.jpg', self.manifest)
+
+    def test_url_for_resolves_through_manifest(self):
+        with self.app.test_request_context():
+            self.assertEqual(url_for('static', filename='css/styles.css'), '/static/' + self.manifest['css/styles.css'])
+            self.assertEqual(url_for('static', filename='css/unbuilt.css'), '/static/css/unbuilt.css')
+
+    def test_serves_precompressed_variant_with_immutable_caching(self):
+        with self.app.test_request_context():
+            url = url_for('static', filename='css/styles.css')
+
+        response = self.get(url, 'gzip, deflate, br')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.data), CSS)
+        self.assertEqual(response.mimetype, 'text/css')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        self.assertNotIn('no-cache', response.headers['Cache-Control'])
+        self.assertNotIn('Content-Disposition', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        response.close()
+
+        response = self.get(url, 'gzip')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), CSS)
+        response.close()
+
+        response = self.get(url)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, CSS)
+        response.close()
+
+    def test_only_fingerprinted_files_are_immutable(self):
+        response = self.get('/static/css/styles.css')
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+        response = self.get('/static/canvas_images/' + 'a' * 64 + '_thumb.jpg')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        response.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import random
+import tempfile
+import unittest
+from app import db
+from app.bench import BENCH_EXCLUDED, bench_routes, compare, measure_startup, percentile, run_benchmark
+from app.models import Canvas, CanvasVote, Comment
+from app.seed import seed
+from app.settings import Config
+from test import AppTestCase
+
+
+class TestSeedAndBenchmark(AppTestCase):
+
+    def setUp(self):
+        # A file rather than :memory:, whose single shared connection can't serve concurrent requests
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.tmp.name, 'bench.db')}
+        super().setUp()
+        seed({'users': 20, 'artists': 5, 'canvases': 30, 'canvas_votes': 200, 'comments': 40, 'comment_votes': 50},
+             batch_size=16)
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def test_seed_inserts_requested_volumes_with_consistent_scores(self):
+        self.assertEqual(Canvas.query.count(), 30)
+        self.assertEqual(Comment.query.count(), 40)
+        self.assertEqual(CanvasVote.query.count(), 200)
+        total_votes = db.session.scalar(db.select(db.func.sum(CanvasVote.vote)))
+        self.assertEqual(db.session.scalar(db.select(db.func.sum(Canvas.score))), total_votes)
+
+    def test_benchmark_reports_every_route(self):
+        report = run_benchmark(requests=4, concurrency=2)
+        self.assertIn('canvas_detail', report['routes'])
+        for name, stats in report['routes'].items():
+            self.assertEqual(stats['errors'], 0, name)
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+        lines, regressed = compare(report, report)
+        self.assertFalse(regressed)
+
+    def test_every_endpoint_is_benchmarked_or_excluded(self):
+        routes, _ = bench_routes(random.Random(1))
+        adapter = self.app.url_map.bind('localhost')
+        covered = {adapter.match(url().split('?')[0], method=method)[0] for _, method, url, _, _ in routes}
+        endpoints = {rule.endpoint for rule in self.app.url_map.iter_rules()}
+        self.assertEqual(endpoints - set(BENCH_EXCLUDED), covered)
+
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_cold_boot_skips_heavy_imports_and_meets_budget(self):
+        result = measure_startup(runs=1, config={'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_MIGRATIONS': False})
+        self.assertEqual(result['heavy_modules'], [])
+        self.assertLess(result['p50_ms'], Config.STARTUP_BUDGET_MS)
+
+
+if __name__ == '__main__':
+    unittest.main()
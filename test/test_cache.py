@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from flask import g
+from app import db
+from app.cache import CACHE_BACKENDS, get_cache
+from test import AppTestCase
+
+
+class TestResponseCache(AppTestCase):
+    config = {'RESPONSE_CACHE': 'memory'}
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        self.add_canvas()
+        db.session.commit()
+
+        self.anonymous = self.app.test_client()
+        self.member = self.client_for(self.user)
+
+    def tearDown(self):
+        get_cache().clear()
+        super().tearDown()
+
+    def test_anonymous_pages_are_cached_and_revalidated(self):
+        url = f'/canvas/{self.canvas.id}'
+        first = self.anonymous.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(first.get_etag()[0])
+
+        # A direct write that bypasses the routes is not seen until the page is invalidated
+        self.canvas.title = 'Renamed'
+        db.session.commit()
+        self.assertEqual(self.anonymous.get(url).data, first.data)
+
+        not_modified = self.anonymous.get(url, headers={'If-None-Match': first.get_etag()[0]})
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_writes_invalidate_affected_pages(self):
+        url = f'/canvas/{self.canvas.id}'
+        self.anonymous.get(url)
+        # Requests share the test's app context, so forget the anonymous user Flask-Login cached on g
+        g.pop('_login_user', None)
+        self.member.post(f'/add_comment/{self.canvas.id}', data={'comment': 'Lovely colours'})
+        g.pop('_login_user', None)
+        self.assertIn(b'Lovely colours', self.anonymous.get(url).data)
+
+    def test_sqlite_backend_deletes_by_tag(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CACHE_BACKENDS['sqlite'](dict(self.app.config, RESPONSE_CACHE_PATH=os.path.join(tmp, 'cache.db')))
+            cache.set('a', (b'page a', 'text/html', 'etag-a'), 60, ['canvas:1'])
+            cache.set('b', (b'page b', 'text/html', 'etag-b'), 60, ['canvas:2'])
+            cache.delete_tags(['canvas:1'])
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get('b'), (b'page b', 'text/html', 'etag-b'))
+
+    def test_sqlite_backend_stays_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CACHE_BACKENDS['sqlite'](dict(self.app.config, RESPONSE_CACHE_PATH=os.path.join(tmp, 'cache.db'),
+                                                  RESPONSE_CACHE_SIZE=3))
+            cache.set('expired', (b'old', 'text/html', 'etag'), -1, ['canvas:1'])
+            for i in range(5):
+                cache.set(f'page{i}', (b'page', 'text/html', f'etag-{i}'), 60 + i, ['canvas:1'])
+            conn = cache._connection()
+            self.assertEqual(sorted(row[0] for row in conn.execute('SELECT key FROM response_cache')),
+                             ['page2', 'page3', 'page4'])
+            self.assertEqual(conn.execute('SELECT count(*) FROM response_cache_tag').fetchone()[0], 3)
+
+    def test_unrecognised_query_arguments_share_one_entry(self):
+        for i in range(5):
+            self.anonymous.get(f'/?junk={i}')
+            self.anonymous.get(f'/canvases?sort=score&junk={i}')
+        self.assertEqual(len(get_cache().entries), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from app import db
+from app.models import Comment, CommentVote
+from test import AppTestCase
+
+
+class TestCommentThreads(AppTestCase):
+    config = {'COMMENT_PAGE_SIZE': 2}
+
+    def setUp(self):
+        super().setUp()
+        self.add_canvas()
+        self.comments = [Comment(content=f'Comment {i}', user_id=self.user.id, canvas_id=self.canvas.id)
+                         for i in range(5)]
+        db.session.add_all(self.comments)
+        db.session.flush()
+        db.session.add(CommentVote(user_id=self.user.id, comment_id=self.comments[1].id, vote=1))
+        db.session.commit()
+
+        self.client = self.client_for(self.user)
+
+    def json_page(self, **args):
+        return self.client.get(f'/canvas/{self.canvas.id}/comments', query_string=dict(format='json', **args)).json
+
+    def test_newest_first_pages_cover_the_thread(self):
+        contents, cursor = [], None
+        while True:
+            page = self.json_page(**({'after': cursor} if cursor else {}))
+            contents += [comment['content'] for comment in page['comments']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(contents, [f'Comment {i}' for i in reversed(range(5))])
+
+    def test_top_sort_includes_viewer_votes(self):
+        first = self.json_page(comments='top')['comments'][0]
+        self.assertEqual((first['content'], first['score'], first['user_vote']), ('Comment 1', 1, 1))
+
+    def test_detail_page_renders_first_page_and_fragment_link(self):
+        html = self.client.get(f'/canvas/{self.canvas.id}').data
+        self.assertIn(b'Comment 4', html)
+        self.assertNotIn(b'Comment 2', html)
+        self.assertIn(b'data-fragment-url', html)
+
+    def test_json_comment_returns_rendered_fragment(self):
+        response = self.client.post(f'/add_comment/{self.canvas.id}', data={'comment': 'Fresh'},
+                                    headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(f'id="comment-{response.json["id"]}"', response.json['html'])
+
+        empty = self.client.post(f'/add_comment/{self.canvas.id}', data={'comment': '  '},
+                                 headers={'Accept': 'application/json'})
+        self.assertEqual(empty.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
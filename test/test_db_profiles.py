@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, event, exc, text
+
+from app import db
+from app.db_profiles import DB_PROFILES, apply_pragmas
+from app.models import Artist
+from test import AppTestCase
+
+
+class TestDbProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.url = 'sqlite:///' + os.path.join(self.tmp.name, 'profile.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_production_writer_uses_wal_and_immediate_transactions(self):
+        engine = create_engine(self.url)
+        apply_pragmas(engine, DB_PROFILES['production']['pragmas'], immediate=True)
+        with engine.begin() as conn:
+            self.assertEqual(conn.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+            self.assertEqual(conn.execute(text('PRAGMA busy_timeout')).scalar(), 5000)
+            self.assertEqual(conn.execute(text('PRAGMA synchronous')).scalar(), 1)  # NORMAL
+            conn.execute(text('CREATE TABLE t (x INTEGER)'))
+        engine.dispose()
+
+    def test_reader_refuses_writes(self):
+        engine = create_engine(self.url)
+        apply_pragmas(engine, {'query_only': 'ON'})
+        with engine.connect() as conn:
+            with self.assertRaises(exc.OperationalError):
+                conn.execute(text('CREATE TABLE t (x INTEGER)'))
+        engine.dispose()
+
+
+class TestRoutingSession(AppTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = {'DB_PROFILE': 'production',
+                       'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.tmp.name, 'app.db')}
+        super().setUp()
+        db.session.add(Artist(name='Artist'))
+        db.session.commit()
+
+        self.statements = []
+        for bind_key, engine in db.engines.items():
+            event.listen(engine, 'before_cursor_execute', self.recorder(bind_key or 'writer'))
+
+    def tearDown(self):
+        super().tearDown()
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        # init_app registered an empty metadata for the reader bind on the shared db; apps
+        # built later in this process have no such engine, so create_all() would fail
+        db.metadatas.pop('reader', None)
+        self.tmp.cleanup()
+
+    def recorder(self, bind):
+        def record(conn, cursor, statement, parameters, context, executemany):
+            self.statements.append((bind, statement))
+        return record
+
+    def binds(self, verb):
+        return {bind for bind, statement in self.statements if statement.split()[0].upper() == verb}
+
+    def test_get_requests_read_from_the_reader(self):
+        response = self.app.test_client().get('/artists')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Artist', response.data)
+        self.assertEqual(self.binds('SELECT'), {'reader'})
+        self.assertEqual(self.binds('BEGIN'), set())
+
+    def test_writes_use_the_writer_with_immediate_transactions(self):
+        # A flush inside a GET still goes to the writer, which takes the lock up front
+        with self.app.test_request_context('/artists', method='GET'):
+            db.session.add(Artist(name='Flushed'))
+            db.session.flush()
+            self.assertEqual(self.binds('INSERT'), {'writer'})
+            db.session.commit()
+        self.assertIn(('writer', 'BEGIN IMMEDIATE'), self.statements)
+        self.assertEqual(self.binds('BEGIN'), {'writer'})
+
+        self.statements.clear()
+        response = self.app.test_client().post('/add_artist', data={'name': 'Posted', 'bio': ''})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.binds('SELECT') | self.binds('INSERT'), {'writer'})
+        self.assertEqual(db.session.scalar(db.select(db.func.count()).select_from(Artist)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import unittest
+from app import db
+from app.events import LocalBroker, canvas_channel
+from app.models import Comment
+from test import AppTestCase
+
+
+class TestLiveEvents(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # A long interval keeps the delivery thread idle so the tests flush by hand
+        self.broker = self.app.extensions['event_broker'] = LocalBroker({'EVENT_COALESCE_MS': 60000})
+
+        self.add_canvas()
+        self.comment = Comment(content='First', user_id=self.user.id, canvas_id=self.canvas.id)
+        db.session.add(self.comment)
+        db.session.commit()
+
+        self.client = self.client_for(self.user)
+
+    def tearDown(self):
+        super().tearDown()
+        self.app.extensions.pop('event_broker', None)
+
+    def test_burst_is_coalesced_into_one_message(self):
+        subscriber = self.broker.subscribe(canvas_channel(self.canvas.id))
+        for _ in range(3):
+            self.client.post(f'/vote_canvas/{self.canvas.id}/up')
+        self.client.post(f'/vote_comment/{self.comment.id}/down')
+        self.broker.flush()
+
+        message = subscriber.get_nowait()
+        self.assertTrue(subscriber.empty())
+        self.assertEqual(message['scores'], [
+            {'kind': 'canvas', 'id': self.canvas.id, 'score': 1, 'upvotes': 1, 'downvotes': 0},
+            {'kind': 'comment', 'id': self.comment.id, 'score': -1, 'upvotes': 0, 'downvotes': 1},
+        ])
+
+    def test_new_comment_is_published(self):
+        subscriber = self.broker.subscribe(canvas_channel(self.canvas.id))
+        self.client.post(f'/add_comment/{self.canvas.id}', data={'comment': 'Lovely'})
+        self.broker.flush()
+        [comment] = subscriber.get_nowait()['comments']
+        self.assertEqual((comment['username'], comment['content']), ('stitcher', 'Lovely'))
+
+    def test_nothing_is_queued_without_subscribers(self):
+        self.client.post(f'/vote_canvas/{self.canvas.id}/up')
+        self.assertEqual(self.broker.pending, {})
+
+    def test_event_stream_relays_updates(self):
+        response = self.client.get(f'/canvas/{self.canvas.id}/events')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = iter(response.response)
+        self.assertEqual(next(chunks), b'retry: 3000\n\n')
+
+        self.client.post(f'/vote_canvas/{self.canvas.id}/down')
+        self.broker.flush()
+        event, data = next(chunks).decode().strip().split('\n')
+        self.assertEqual(event, 'event: update')
+        self.assertEqual(json.loads(data[len('data: '):])['scores'][0]['score'], -1)
+        response.close()
+        self.assertFalse(self.broker.has_subscribers(canvas_channel(self.canvas.id)))
+
+    def test_event_stream_ends_so_the_browser_reconnects(self):
+        self.app.config.update(EVENT_KEEPALIVE=0.01, EVENT_STREAM_MAX_AGE=0.05)
+        response = self.client.get(f'/canvas/{self.canvas.id}/events')
+        chunks = list(response.response)
+        self.assertEqual(chunks[0], b'retry: 3000\n\n')
+        self.assertIn(b': keepalive\n\n', chunks)
+        self.assertFalse(self.broker.has_subscribers(canvas_channel(self.canvas.id)))
+
+    def test_streams_past_the_limit_are_turned_away(self):
+        self.app.config['EVENT_STREAM_LIMIT'] = 1
+        first = self.client.get(f'/canvas/{self.canvas.id}/events')
+        refused = self.client.get(f'/canvas/{self.canvas.id}/events')
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused.headers['Retry-After'], '30')
+        # Closing a stream frees its slot, whether or not it was ever read
+        first.close()
+        again = self.client.get(f'/canvas/{self.canvas.id}/events')
+        self.assertEqual(again.status_code, 200)
+        again.close()
+        self.assertEqual(self.app.extensions['event_streams'].open, 0)
+
+    def test_event_stream_for_missing_canvas(self):
+        self.assertEqual(self.client.get('/canvas/999/events').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import unittest
+from app import db
+from app.featured import FEATURED_POLICIES, featured_canvases, get_featured_pool
+from app.instrumentation import capture_queries
+from app.models import Artist, Canvas
+from test import AppTestCase
+
+
+class TestFeaturedCanvases(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.artist = Artist(name='Artist')
+        db.session.add(self.artist)
+        db.session.flush()
+        for i in range(6):
+            db.session.add(Canvas(title=f'Canvas {i}', artist_id=self.artist.id, score=i))
+        db.session.commit()
+
+    def test_every_policy_returns_distinct_canvases(self):
+        for policy in FEATURED_POLICIES:
+            featured = featured_canvases(4, policy=policy)
+            self.assertEqual(len(featured), 4, policy)
+            self.assertEqual(len({canvas.id for canvas in featured}), 4, policy)
+
+    def test_pool_picks_up_new_canvases_after_commit(self):
+        featured_pool = get_featured_pool()
+        featured_pool.ensure_fresh()
+        canvas = Canvas(title='New', artist_id=self.artist.id)
+        db.session.add(canvas)
+        db.session.commit()
+        featured_pool.ensure_fresh()
+        self.assertIn(canvas.id, featured_pool.ids)
+
+    def test_inserts_and_deletes_update_the_pool_without_reloading(self):
+        featured_pool = get_featured_pool()
+        featured_pool.ensure_fresh()
+        loaded_at = featured_pool.loaded_at
+        first, second = Canvas.query.order_by(Canvas.id).limit(2).all()
+        canvas = Canvas(title='New', artist_id=self.artist.id, score=4)
+        db.session.add(canvas)
+        db.session.delete(second)
+        db.session.commit()
+
+        self.assertEqual(featured_pool.loaded_at, loaded_at)
+        expected_ids, expected_weights = featured_pool.load()
+        self.assertEqual(featured_pool.ids, expected_ids)
+        self.assertEqual(featured_pool.cum_weights, expected_weights)
+
+    def test_expired_pool_reloads_in_the_background(self):
+        featured_pool = get_featured_pool()
+        featured_pool.ensure_fresh()
+        db.session.execute(db.update(Canvas).values(score=0))
+        db.session.commit()
+        old_weights = featured_pool.cum_weights
+        featured_pool.loaded_at -= featured_pool.ttl + 1
+
+        with capture_queries() as log:
+            featured_pool.ensure_fresh()
+        self.assertEqual(log.count, 0)
+        self.assertEqual(featured_pool.cum_weights, old_weights)
+        for thread in threading.enumerate():
+            if thread.name == 'featured-pool':
+                thread.join()
+        self.assertEqual(list(featured_pool.cum_weights), [1, 2, 3, 4, 5, 6])
+
+    def test_failed_reload_keeps_the_snapshot_and_can_retry(self):
+        featured_pool = get_featured_pool()
+        featured_pool.ensure_fresh()
+        ids, load = featured_pool.ids, featured_pool.load
+        featured_pool.load = lambda: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            featured_pool.refresh()
+        self.assertIs(featured_pool.ids, ids)
+        self.assertFalse(featured_pool._refreshing)
+
+        canvas = Canvas(title='New', artist_id=self.artist.id)
+        db.session.add(canvas)
+        db.session.commit()
+        featured_pool.load = load
+        featured_pool.refresh()
+        self.assertEqual(featured_pool._changes, [])
+        self.assertEqual(featured_pool.ids[-1], canvas.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from flask import g, render_template, render_template_string
+from app import db
+from app.models import Canvas, CanvasVote, Comment, StitchList
+from test import AppTestCase
+
+
+class TestFragmentCache(AppTestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.config = {'TEMPLATE_BYTECODE_CACHE_PATH': self.cache_dir.name}
+        super().setUp()
+        self.add_canvas()
+        self.comment = Comment(content='Lovely colours', user_id=self.user.id, canvas_id=self.canvas.id)
+        db.session.add(self.comment)
+        db.session.commit()
+
+        self.member = self.client_for(self.user)
+
+    def tearDown(self):
+        super().tearDown()
+        self.cache_dir.cleanup()
+
+    def render_counted(self, source, **context):
+        calls = []
+        html = render_template_string(source, count=lambda: calls.append(1) or len(calls), **context)
+        return html, len(calls)
+
+    def test_block_is_rendered_once_per_key(self):
+        source = "{% cache ('canvas', 1, version), 60 %}{{ count() }}{% endcache %}"
+        self.assertEqual(self.render_counted(source, version=0), ('1', 1))
+        self.assertEqual(self.render_counted(source, version=0), ('1', 0))
+        self.assertEqual(self.render_counted(source, version=1), ('1', 1))
+
+    def test_markup_outside_the_block_stays_live(self):
+        source = "{% cache key %}<b>{{ title }}</b>{% endcache %}<i>{{ user }}</i>"
+        self.assertEqual(render_template_string(source, key=1, title='Old', user='a'), '<b>Old</b><i>a</i>')
+        self.assertEqual(render_template_string(source, key=1, title='New', user='b'), '<b>Old</b><i>b</i>')
+        # Cached HTML is not escaped a second time
+        self.assertEqual(render_template_string(source, key=2, title='<3', user='c'), '<b>&lt;3</b><i>c</i>')
+
+    def test_disabled_cache_renders_every_time(self):
+        self.app.config['FRAGMENT_CACHE_SIZE'] = 0
+        source = "{% cache 'canvas' %}{{ count() }}{% endcache %}"
+        self.assertEqual(self.render_counted(source), ('1', 1))
+        self.assertEqual(self.render_counted(source), ('1', 1))
+
+    def version(self):
+        return db.session.scalar(db.select(Canvas.version).where(Canvas.id == self.canvas.id))
+
+    def test_edits_and_stitch_lists_move_the_canvas_version_but_votes_do_not(self):
+        version = self.version()
+        db.session.add(CanvasVote(user_id=self.user.id, canvas_id=self.canvas.id, vote=1))
+        db.session.commit()
+        self.assertEqual(self.version(), version)
+
+        self.canvas.title = 'Renamed'
+        db.session.commit()
+        self.assertEqual(self.version(), version + 1)
+        db.session.add(StitchList(user_id=self.user.id, canvas_id=self.canvas.id, status='Completed'))
+        db.session.commit()
+        self.assertEqual(self.version(), version + 2)
+
+    def test_canvas_page_is_fresh_for_changes_from_any_process(self):
+        url = f'/canvas/{self.canvas.id}'
+        self.assertIn(b'Lovely colours', self.member.get(url).data)
+
+        # Written behind the app's back, as another worker would: no invalidate() call
+        db.session.execute(db.text('UPDATE canvas SET title = :title WHERE id = :id'),
+                           {'title': 'Renamed', 'id': self.canvas.id})
+        db.session.commit()
+        g.pop('_login_user', None)
+        self.assertIn(b'Renamed', self.member.get(url).data)
+
+        g.pop('_login_user', None)
+        self.member.post(f'/vote_comment/{self.comment.id}/up')
+        g.pop('_login_user', None)
+        html = self.member.get(url).data.decode()
+        self.assertIn('<span class="vote-count">1</span>', html.split(f'id="comment-{self.comment.id}"')[1])
+        self.assertIn('voted-up', html)
+
+    def test_compiled_templates_are_kept_on_disk(self):
+        render_template('_comments.html', comments=[], canvas_id=self.canvas.id)
+        self.assertTrue(os.listdir(self.cache_dir.name))
@@ -0,0 +1,61 @@
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from app import db
+from app.models import Artist, Canvas
+from test import AppTestCase
+
+
+def png_bytes(size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class TestImagePipeline(AppTestCase):
+    config = {'IMAGE_WORKERS': 0}
+
+    def setUp(self):
+        super().setUp()
+        self.static_dir = tempfile.TemporaryDirectory()
+        self.app.static_folder = self.static_dir.name
+
+        self.artist = Artist(name='Artist')
+        db.session.add(self.artist)
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        super().tearDown()
+        self.static_dir.cleanup()
+
+    def upload(self, title, data):
+        return self.client.post('/add_canvas', data={
+            'title': title,
+            'artist_id': self.artist.id,
+            'image': (io.BytesIO(data), 'upload.png'),
+        }, content_type='multipart/form-data')
+
+    def test_upload_is_deduplicated_and_resized(self):
+        data = png_bytes()
+        self.upload('First', data)
+        self.upload('Second', data)
+
+        first, second = Canvas.query.order_by(Canvas.id).all()
+        self.assertEqual(first.image_url, second.image_url)
+        self.assertEqual(set(first.image_variants), set(self.app.config['IMAGE_VARIANTS']))
+
+        files = os.listdir(os.path.join(self.app.static_folder, 'canvas_images'))
+        self.assertEqual(len(files), 1 + len(self.app.config['IMAGE_VARIANTS']))
+
+        thumb = os.path.join(self.app.static_folder, first.image_variants['thumb'].split('/static/', 1)[1])
+        with Image.open(thumb) as image:
+            self.assertEqual(max(image.size), self.app.config['IMAGE_VARIANTS']['thumb'])
+
+
+if __name__ == '__main__':
+    unittest.main()
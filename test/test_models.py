@@ -1,21 +1,9 @@
 import unittest
-from app import app, db
+from app import db
 from app.models import User
+from test import AppTestCase
 
-class TestModels(unittest.TestCase):
-
-    def setUp(self):
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'  # Use an in-memory database for testing
-        app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for testing
-        self.app_context = app.app_context()
-        self.app_context.push()
-        db.create_all()
-
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
+class TestModels(AppTestCase):
 
     def test_user_creation(self):
         user = User(username='testuser', email='test@example.com', password='testpassword')
@@ -0,0 +1,62 @@
+import unittest
+from werkzeug.exceptions import BadRequest
+from app import db
+from app.catalog import unindexed
+from app.models import Artist, Canvas
+from app.pagination import keyset_paginate
+from test import AppTestCase
+
+
+class TestKeysetPagination(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        artist = Artist(name='Artist')
+        db.session.add(artist)
+        db.session.flush()
+        for i, score in enumerate([3, 1, 3, 0, 2]):
+            db.session.add(Canvas(title=f'Canvas {i}', artist_id=artist.id, score=score))
+        db.session.commit()
+
+    def page(self, columns, descending=False, **args):
+        with self.app.test_request_context(query_string=dict(per_page=2, **args)):
+            return keyset_paginate(Canvas.query, columns, descending)
+
+    def test_walks_forward_and_back_by_id(self):
+        first = self.page([Canvas.id])
+        self.assertEqual([c.title for c in first], ['Canvas 0', 'Canvas 1'])
+        self.assertIsNone(first.prev_cursor)
+
+        second = self.page([Canvas.id], after=first.next_cursor)
+        self.assertEqual([c.title for c in second], ['Canvas 2', 'Canvas 3'])
+
+        third = self.page([Canvas.id], after=second.next_cursor)
+        self.assertEqual([c.title for c in third], ['Canvas 4'])
+        self.assertIsNone(third.next_cursor)
+
+        back = self.page([Canvas.id], before=third.prev_cursor)
+        self.assertEqual([c.title for c in back], ['Canvas 2', 'Canvas 3'])
+        self.assertIsNotNone(back.prev_cursor)
+
+    def test_orders_by_score_descending(self):
+        first = self.page([Canvas.score, Canvas.id], descending=True)
+        second = self.page([Canvas.score, Canvas.id], descending=True, after=first.next_cursor)
+        self.assertEqual([c.title for c in first] + [c.title for c in second],
+                         ['Canvas 2', 'Canvas 0', 'Canvas 4', 'Canvas 1'])
+
+    def test_orders_by_an_unindexed_expression(self):
+        columns = [unindexed(Canvas.score), Canvas.id]
+        first = self.page(columns, descending=True)
+        second = self.page(columns, descending=True, after=first.next_cursor)
+        self.assertEqual([c.title for c in first] + [c.title for c in second],
+                         ['Canvas 2', 'Canvas 0', 'Canvas 4', 'Canvas 1'])
+
+    def test_rejects_malformed_cursor(self):
+        with self.app.test_request_context(query_string={'after': '!!'}):
+            with self.assertRaises(BadRequest):
+                keyset_paginate(Canvas.query, [Canvas.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+from flask import g
+
+from app import db
+from app.instrumentation import capture_queries
+from app.models import (User, Artist, Canvas, CanvasPurge, CanvasStitchCount, CanvasVote, Comment, CommentVote,
+                        SimilarCanvas, StitchList, UserStitchCount)
+from app.purge import purge_deleted_canvases, schedule_purge
+from test import AppTestCase
+
+
+def count(model, **filters):
+    return db.session.scalar(db.select(db.func.count()).select_from(model).filter_by(**filters))
+
+
+class HeldWorker:
+    wakes = 0
+
+    def wake(self):
+        self.wakes += 1
+
+
+class TestCanvasPurge(AppTestCase):
+    config = {'PURGE_WORKER': False}
+
+    def setUp(self):
+        super().setUp()
+
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', password='pw') for i in range(12)]
+        artist = Artist(name='Artist')
+        db.session.add_all(users + [artist])
+        db.session.flush()
+        self.doomed, self.kept = Canvas(title='Doomed', artist_id=artist.id), Canvas(title='Kept', artist_id=artist.id)
+        db.session.add_all([self.doomed, self.kept])
+        db.session.flush()
+        for canvas in (self.doomed, self.kept):
+            comments = [Comment(content=f'Comment {i}', user_id=users[0].id, canvas_id=canvas.id) for i in range(7)]
+            db.session.add_all(comments)
+            db.session.flush()
+            for user in users:
+                db.session.add(CanvasVote(user_id=user.id, canvas_id=canvas.id, vote=1))
+                db.session.add(StitchList(user_id=user.id, canvas_id=canvas.id, status='In Progress'))
+                db.session.add_all(CommentVote(user_id=user.id, comment_id=comment.id, vote=1) for comment in comments)
+        db.session.add(SimilarCanvas(canvas_id=self.kept.id, rank=0, similar_id=self.doomed.id, score=0.5))
+        db.session.add(SimilarCanvas(canvas_id=self.doomed.id, rank=0, similar_id=self.kept.id, score=0.5))
+        db.session.commit()
+        artist.user_id = users[0].id
+        db.session.commit()
+        self.doomed_id, self.kept_id, self.user_id = self.doomed.id, self.kept.id, users[0].id
+        self.users = users
+
+    def test_delete_touches_only_the_canvas_row(self):
+        with capture_queries() as log:
+            db.session.delete(self.doomed)
+            db.session.commit()
+        # The canvas itself and nothing from its 100+ dependent rows
+        self.assertLessEqual(log.count, 2)
+        self.assertEqual(count(CanvasVote, canvas_id=self.doomed_id), 12)
+        self.assertEqual(count(Comment, canvas_id=self.doomed_id), 7)
+        self.assertEqual([row.canvas_id for row in CanvasPurge.query], [self.doomed_id])
+
+    def test_purge_removes_dependents_in_chunks(self):
+        db.session.delete(self.doomed)
+        db.session.commit()
+        canvases, rows = purge_deleted_canvases(chunk_size=5)
+        # 84 comment votes, 7 comments, 12 canvas votes, 12 stitch-list rows, 2 similar rows, 1 count row
+        self.assertEqual((canvases, rows), (1, 118))
+        for model in (CanvasVote, Comment, StitchList, CanvasStitchCount):
+            self.assertEqual(count(model, canvas_id=self.doomed_id), 0)
+        self.assertEqual(count(CommentVote), 84)
+        self.assertEqual(count(SimilarCanvas), 0)
+        self.assertEqual(count(CanvasPurge), 0)
+        # The other canvas and the users' materialized counts are left consistent
+        self.assertEqual(count(CanvasVote, canvas_id=self.kept_id), 12)
+        self.assertEqual(db.session.scalar(db.select(UserStitchCount.count).filter_by(
+            user_id=self.user_id, status='In Progress')), 1)
+
+    def test_schedule_purge_runs_inline_without_worker(self):
+        db.session.delete(self.doomed)
+        db.session.commit()
+        self.assertEqual(schedule_purge()[0], 1)
+        self.assertEqual(schedule_purge(), (0, 0))
+        self.assertEqual(count(Comment), 7)
+
+    def test_delete_route_queues_the_purge(self):
+        # A worker that only notes it was woken, so the queue can be inspected before any sweep
+        self.app.config['PURGE_WORKER'] = True
+        self.app.extensions['canvas_purge'] = worker = HeldWorker()
+        response = self.client_for(self.users[0]).post(f'/delete_canvas/{self.doomed_id}')
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(db.session.get(Canvas, self.doomed_id))
+        self.assertEqual([row.canvas_id for row in CanvasPurge.query], [self.doomed_id])
+        self.assertEqual(count(Comment, canvas_id=self.doomed_id), 7)
+        self.assertEqual(worker.wakes, 1)
+
+    def test_only_the_artists_stitcher_or_an_admin_may_delete(self):
+        stranger, admin = self.users[1], self.users[2]
+        admin.is_admin = True
+        db.session.commit()
+        self.client_for(stranger).post(f'/delete_canvas/{self.doomed_id}')
+        self.client_for(stranger).post(f'/edit_canvas/{self.kept_id}', data={'title': 'Vandalised'})
+        g.pop('_login_user', None)
+        self.assertEqual(count(CanvasPurge), 0)
+        self.assertEqual(db.session.get(Canvas, self.kept_id).title, 'Kept')
+        self.client_for(admin).post(f'/delete_canvas/{self.doomed_id}')
+        self.assertIsNone(db.session.get(Canvas, self.doomed_id))
+
+    def test_purge_spares_canvas_created_after_deleting_newest(self):
+        db.session.delete(self.kept)
+        db.session.commit()
+        canvas = Canvas(title='Fresh', artist_id=self.kept.artist_id)
+        db.session.add(canvas)
+        db.session.flush()
+        comment = Comment(content='First!', user_id=self.user_id, canvas_id=canvas.id)
+        db.session.add_all([comment, CanvasVote(user_id=self.user_id, canvas_id=canvas.id, vote=1)])
+        db.session.flush()
+        db.session.add(CommentVote(user_id=self.user_id, comment_id=comment.id, vote=1))
+        db.session.commit()
+        # The deleted canvas's id and its comments' ids are never handed out again
+        self.assertGreater(canvas.id, self.kept_id)
+        self.assertEqual(count(Comment, canvas_id=canvas.id), 1)
+        purge_deleted_canvases()
+        self.assertIsNotNone(db.session.get(Canvas, canvas.id))
+        self.assertEqual(count(Comment, canvas_id=canvas.id), 1)
+        self.assertEqual(count(CanvasVote, canvas_id=canvas.id), 1)
+        self.assertEqual(count(CommentVote, comment_id=comment.id), 1)
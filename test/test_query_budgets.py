@@ -0,0 +1,79 @@
+import unittest
+from flask import g
+from app import db
+from app.instrumentation import capture_queries
+from app.models import User, Artist, Canvas, Comment, CanvasVote, CommentVote
+from test import AppTestCase
+
+# Maximum statements per page, independent of how many rows the page shows
+QUERY_BUDGETS = {
+    '/': 2,
+    '/canvases': 1,
+    '/canvases?sort=score': 1,
+    '/canvases?sort=hot': 1,
+    '/canvases?sort=day': 1,
+    '/artists': 1,
+    '/artist/{artist_id}': 2,
+    '/canvas/{canvas_id}': 4,
+    '/canvas/{canvas_id}/comments?format=json': 1,
+    '/search?q=canvas': 2,
+}
+# Logged-in pages also load the user and the viewer's votes and stitch-list entry
+MEMBER_EXTRA_QUERIES = {
+    '/canvas/{canvas_id}': 3,
+    '/canvas/{canvas_id}/comments?format=json': 1,
+}
+
+
+class TestQueryBudgets(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed(rows=8)
+
+    def seed(self, rows):
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', password='pw') for i in range(rows)]
+        artists = [Artist(name=f'Artist {i}') for i in range(rows)]
+        db.session.add_all(users + artists)
+        db.session.flush()
+        canvases = [Canvas(title=f'Canvas {i}', artist_id=artists[i % 2].id) for i in range(rows)]
+        db.session.add_all(canvases)
+        db.session.flush()
+        comments = [Comment(content=f'Comment {i}', user_id=user.id, canvas_id=canvases[0].id)
+                    for i, user in enumerate(users)]
+        db.session.add_all(comments)
+        db.session.flush()
+        db.session.add_all([CanvasVote(user_id=user.id, canvas_id=canvases[0].id, vote=1) for user in users])
+        db.session.add_all([CommentVote(user_id=users[0].id, comment_id=comment.id, vote=1) for comment in comments])
+        db.session.commit()
+        self.user_id, self.artist_id, self.canvas_id = users[0].id, artists[0].id, canvases[0].id
+
+    def assertQueryBudget(self, client, url, max_queries):
+        # Requests share the test's app context, so drop what Flask-Login cached on g
+        g.pop('_login_user', None)
+        with capture_queries() as log:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertLessEqual(log.count, max_queries, f'{url} ran {log.count} queries:\n' +
+                             '\n'.join(statement for statement, _ in log.statements))
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+
+    def urls(self):
+        for pattern, budget in QUERY_BUDGETS.items():
+            yield pattern, pattern.format(artist_id=self.artist_id, canvas_id=self.canvas_id), budget
+
+    def test_anonymous_pages_stay_within_budget(self):
+        client = self.app.test_client()
+        for _, url, budget in self.urls():
+            self.assertQueryBudget(client, url, budget)
+
+    def test_member_pages_stay_within_budget(self):
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.user_id)
+        for pattern, url, budget in self.urls():
+            self.assertQueryBudget(client, url, budget + 1 + MEMBER_EXTRA_QUERIES.get(pattern, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from flask import g
+from app import db
+from app.models import Comment, CanvasVote, CommentVote, StitchList
+from app.query_plans import capture_statements, query_plans
+from test import AppTestCase
+
+# Every page a visitor or member can load, and the large tables it may legitimately SCAN.
+# Keyset listings walk the rowid or an ordering index and stop at LIMIT; the featured pool
+# reads every canvas id and score, but only once per FEATURED_POOL_TTL. Top-of-day/week
+# range-search created_at and sort only that window.
+ROUTES = {
+    '/': {'canvas'},
+    '/canvases': {'canvas'},
+    '/canvases?sort=score': {'canvas'},
+    '/canvases?sort=hot': {'canvas'},
+    '/canvases?sort=day': set(),
+    '/canvases?sort=week': set(),
+    '/canvases?sort=controversial': {'canvas'},
+    '/artists': {'artist'},
+    '/artist/{artist_id}': set(),
+    '/artist/{artist_id}?sort=score': set(),
+    '/artist/{artist_id}?sort=hot': set(),
+    '/artist/{artist_id}?sort=controversial': set(),
+    '/artist/{artist_id}?sort=week': set(),
+    '/canvas/{canvas_id}': set(),
+    '/canvas/{canvas_id}?comments=top': set(),
+    '/canvas/{canvas_id}?comments=hot': set(),
+    '/canvas/{canvas_id}?comments=controversial': set(),
+    '/canvas/{canvas_id}?comments=week': set(),
+    '/canvas/{canvas_id}/comments?format=json': set(),
+    '/search?q=canvas': set(),
+}
+MEMBER_ROUTES = {
+    '/stitch_list': set(),
+    '/stitch_list?status=Completed': set(),
+}
+
+
+class TestQueryPlans(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_canvas()
+        user, artist, canvas = self.user, self.artist, self.canvas
+        comment = Comment(content='Comment', user_id=user.id, canvas_id=canvas.id)
+        db.session.add_all([comment, StitchList(user_id=user.id, canvas_id=canvas.id, status='Completed'),
+                            CanvasVote(user_id=user.id, canvas_id=canvas.id, vote=1)])
+        db.session.flush()
+        db.session.add(CommentVote(user_id=user.id, comment_id=comment.id, vote=1))
+        db.session.commit()
+        self.user_id, self.artist_id, self.canvas_id = user.id, artist.id, canvas.id
+
+    def assertNoUnexpectedScans(self, client, routes):
+        for pattern, allowed in routes.items():
+            url = pattern.format(artist_id=self.artist_id, canvas_id=self.canvas_id)
+            g.pop('_login_user', None)
+            with capture_statements() as statements:
+                self.assertEqual(client.get(url).status_code, 200, url)
+            for plan in query_plans(statements):
+                unexpected = plan.scanned_tables() - allowed
+                self.assertFalse(unexpected, f'{url} scans {", ".join(sorted(unexpected))}:\n{plan}')
+
+    def test_anonymous_pages(self):
+        self.assertNoUnexpectedScans(self.app.test_client(), ROUTES)
+
+    def test_member_pages(self):
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self.user_id)
+        self.assertNoUnexpectedScans(client, dict(ROUTES, **MEMBER_ROUTES))
+
+
+if __name__ == '__main__':
+    unittest.main()
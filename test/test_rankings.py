@@ -0,0 +1,108 @@
+import sqlite3
+import unittest
+from datetime import datetime, timedelta, timezone
+from app import db
+from app.commands import rebuild_vote_counts
+from app.models import User, Artist, Canvas, Comment, CanvasVote, CommentVote
+from app.rankings import controversy_rank, hot_rank, ranking_triggers
+from test import AppTestCase
+
+
+class TestRankingFormulas(unittest.TestCase):
+
+    def test_hot_favours_score_and_recency(self):
+        now = datetime(2026, 10, 18).timestamp()
+        self.assertGreater(hot_rank(10, now), hot_rank(1, now))
+        self.assertGreater(hot_rank(1, now), hot_rank(1, now - 86400))
+        self.assertGreater(hot_rank(5, now), hot_rank(-5, now))
+        # A day of age costs about two orders of magnitude of score
+        self.assertGreater(hot_rank(1, now), hot_rank(50, now - 86400))
+
+    def test_controversy_needs_both_directions(self):
+        self.assertEqual(controversy_rank(10, 0), 0)
+        self.assertGreater(controversy_rank(5, 5), controversy_rank(9, 1))
+        self.assertGreater(controversy_rank(50, 50), controversy_rank(5, 5))
+
+    def test_triggers_rank_rows_written_outside_the_app(self):
+        # A bare connection, as the sqlite3 shell or a migration would open
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, score INTEGER, upvotes INTEGER, '
+                           'downvotes INTEGER, created_at DATETIME, hot FLOAT, controversy FLOAT)')
+        for sql in ranking_triggers('item'):
+            connection.execute(sql)
+        rows = [(up - down, up, down, f'2026-10-{day:02d} 12:34:56')
+                for up in (0, 1, 3, 40) for down in (0, 2, 40) for day in (1, 18)]
+        connection.executemany('INSERT INTO item (score, upvotes, downvotes, created_at) VALUES (?, ?, ?, ?)', rows)
+        ranked = connection.execute('SELECT hot, controversy FROM item ORDER BY id').fetchall()
+        for (score, up, down, created), (hot, controversy) in zip(rows, ranked):
+            timestamp = datetime.fromisoformat(created).replace(tzinfo=timezone.utc).timestamp()
+            self.assertEqual(hot, hot_rank(score, timestamp))
+            self.assertEqual(controversy, controversy_rank(up, down))
+
+
+class TestLeaderboards(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.users = [User(username=f'user{i}', email=f'user{i}@example.com', password='pw') for i in range(4)]
+        artist = Artist(name='Artist')
+        db.session.add_all(self.users + [artist])
+        db.session.flush()
+        now = datetime.utcnow()
+        self.old = Canvas(title='Old favourite', artist_id=artist.id, created_at=now - timedelta(days=30))
+        self.new = Canvas(title='New arrival', artist_id=artist.id, created_at=now - timedelta(hours=1))
+        self.split = Canvas(title='Divisive', artist_id=artist.id, created_at=now - timedelta(days=3))
+        db.session.add_all([self.old, self.new, self.split])
+        db.session.flush()
+        # Old: +4, new: +1, divisive: two up and two down
+        for i, user in enumerate(self.users):
+            db.session.add_all([CanvasVote(user_id=user.id, canvas_id=self.old.id, vote=1),
+                                CanvasVote(user_id=user.id, canvas_id=self.split.id, vote=1 if i % 2 else -1)])
+        db.session.add(CanvasVote(user_id=self.users[0].id, canvas_id=self.new.id, vote=1))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def titles(self, sort):
+        html = self.client.get('/canvases', query_string={'sort': sort}).get_data(as_text=True)
+        found = [(html.find(canvas.title), canvas.title) for canvas in (self.old, self.new, self.split)]
+        return [title for position, title in sorted(found) if position >= 0]
+
+    def test_triggers_keep_rankings_in_step_with_votes(self):
+        canvas = db.session.get(Canvas, self.split.id)
+        self.assertEqual((canvas.upvotes, canvas.downvotes), (2, 2))
+        self.assertEqual(canvas.controversy, controversy_rank(2, 2))
+        self.assertEqual(canvas.hot, hot_rank(0, int(canvas.created_at.replace(tzinfo=timezone.utc).timestamp())))
+
+        db.session.execute(db.delete(CanvasVote).where(CanvasVote.canvas_id == self.split.id, CanvasVote.vote == -1))
+        db.session.commit()
+        self.assertEqual(db.session.get(Canvas, self.split.id).controversy, 0)
+
+    def test_listing_sorts(self):
+        self.assertEqual(self.titles('score'), ['Old favourite', 'New arrival', 'Divisive'])
+        self.assertEqual(self.titles('hot')[0], 'New arrival')
+        self.assertEqual(self.titles('controversial')[0], 'Divisive')
+        self.assertEqual(self.titles('day'), ['New arrival'])
+        self.assertEqual(self.titles('week'), ['New arrival', 'Divisive'])
+
+    def test_rebuild_restores_rankings(self):
+        db.session.execute(db.update(Canvas).values(hot=0, controversy=0))
+        db.session.commit()
+        rebuild_vote_counts()
+        self.assertEqual(self.titles('controversial')[0], 'Divisive')
+        self.assertEqual(self.titles('hot')[0], 'New arrival')
+
+    def test_comment_thread_sorts(self):
+        comments = [Comment(content=f'Comment {i}', user_id=self.users[0].id, canvas_id=self.old.id) for i in range(2)]
+        db.session.add_all(comments)
+        db.session.flush()
+        db.session.add_all([CommentVote(user_id=self.users[1].id, comment_id=comments[0].id, vote=1),
+                            CommentVote(user_id=self.users[2].id, comment_id=comments[0].id, vote=-1)])
+        db.session.commit()
+        page = self.client.get(f'/canvas/{self.old.id}/comments',
+                               query_string={'format': 'json', 'comments': 'controversial'}).json
+        self.assertEqual(page['comments'][0]['content'], 'Comment 0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from app import db
+from app.models import User, Artist, Canvas, Comment
+from app.search import search
+from test import AppTestCase
+
+
+class TestSearch(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        user = User(username='stitcher', email='stitcher@example.com', password='pw')
+        self.artist = Artist(name='Rose Garden Studio', bio='Florals and <b>roses</b>')
+        db.session.add_all([user, self.artist])
+        db.session.flush()
+        self.canvas = Canvas(title='Winter Cardinal', description='A red bird on snow', artist_id=self.artist.id)
+        db.session.add(self.canvas)
+        db.session.flush()
+        self.comment = Comment(content='Stitched this cardinal in a weekend', user_id=user.id, canvas_id=self.canvas.id)
+        db.session.add(self.comment)
+        db.session.commit()
+
+    def test_ranks_title_matches_above_body_matches(self):
+        results, has_next = search('cardinal')
+        self.assertEqual([(r.kind, r.ref_id) for r in results],
+                         [('canvas', self.canvas.id), ('comment', self.comment.id)])
+        self.assertEqual(results[1].canvas_id, self.canvas.id)
+        self.assertIn('<mark>Cardinal</mark>', results[0].title)
+        self.assertFalse(has_next)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.canvas.title = 'Summer Cardinal'
+        db.session.delete(self.comment)
+        db.session.commit()
+        self.assertEqual([r.ref_id for r in search('summer')[0]], [self.canvas.id])
+        self.assertEqual(search('winter')[0], [])
+        self.assertEqual(search('weekend')[0], [])
+
+    def test_highlights_escape_stored_html(self):
+        results, _ = search('roses')
+        self.assertIn('&lt;b&gt;<mark>roses</mark>&lt;/b&gt;', results[0].snippet)
+
+    def test_query_syntax_is_treated_as_text(self):
+        self.assertEqual(search('cardinal AND "')[0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
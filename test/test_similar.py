@@ -0,0 +1,94 @@
+import unittest
+from app import db
+from app.models import User, Artist, Canvas, CanvasVote, JobState, SimilarCanvas, StitchList
+from app.similar import changed_canvas_ids, refresh_similar_canvases, similar_canvases
+from test import AppTestCase
+
+
+class TestSimilarCanvases(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.users = [User(username=f'user{i}', email=f'user{i}@example.com', password='pw') for i in range(4)]
+        artist = Artist(name='Artist')
+        db.session.add_all(self.users + [artist])
+        db.session.flush()
+        self.canvases = [Canvas(title=f'Canvas {name}', artist_id=artist.id) for name in 'ABCDE']
+        db.session.add_all(self.canvases)
+        db.session.flush()
+        a, b, c, d, _ = self.canvases
+        # Three stitchers like A and B together, one likes A and C; D is only downvoted
+        for user in self.users[:3]:
+            db.session.add_all([CanvasVote(user_id=user.id, canvas_id=a.id, vote=1),
+                                CanvasVote(user_id=user.id, canvas_id=b.id, vote=1)])
+        db.session.add_all([CanvasVote(user_id=self.users[3].id, canvas_id=a.id, vote=1),
+                            StitchList(user_id=self.users[3].id, canvas_id=c.id, status='In Progress'),
+                            CanvasVote(user_id=self.users[3].id, canvas_id=d.id, vote=-1)])
+        db.session.commit()
+
+    def titles(self, canvas):
+        return [similar.title for similar in similar_canvases(canvas.id)]
+
+    def test_full_refresh_ranks_neighbours(self):
+        refresh_similar_canvases(k=5, chunk_size=2)
+        a, b, c, d, _ = self.canvases
+        self.assertEqual(self.titles(a), ['Canvas B', 'Canvas C'])
+        self.assertEqual(self.titles(c), ['Canvas A'])
+        self.assertEqual(self.titles(d), [])
+
+    def test_top_k_limits_stored_neighbours(self):
+        refresh_similar_canvases(k=1)
+        self.assertEqual(db.session.scalar(db.select(db.func.count()).select_from(SimilarCanvas)), 3)
+        self.assertEqual(self.titles(self.canvases[0]), ['Canvas B'])
+
+    def test_incremental_refresh_picks_up_new_interactions(self):
+        refresh_similar_canvases(k=5)
+        e = self.canvases[4]
+        db.session.add(StitchList(user_id=self.users[0].id, canvas_id=e.id, status='Want to Stitch'))
+        db.session.commit()
+        refresh_similar_canvases(k=5, incremental=True)
+        self.assertEqual(self.titles(e), ['Canvas B', 'Canvas A'])
+
+    def test_votes_in_the_same_second_as_the_mark_are_picked_up(self):
+        refresh_similar_canvases(k=5)
+        state = db.session.get(JobState, 'similar_canvases').state
+        e = self.canvases[4]
+        db.session.add(CanvasVote(user_id=self.users[0].id, canvas_id=e.id, vote=1))
+        db.session.commit()
+        db.session.execute(db.text('UPDATE canvas_vote SET updated_at = :since WHERE canvas_id = :id'),
+                           {'since': state['since'], 'id': e.id})
+        db.session.commit()
+        self.assertIn(e.id, changed_canvas_ids(state))
+
+    def test_each_chunk_is_committed_on_its_own(self):
+        open_transactions = []
+        refresh_similar_canvases(k=5, chunk_size=1,
+                                 progress=lambda done, total: open_transactions.append(db.session().in_transaction()))
+        self.assertEqual(open_transactions, [False] * 3)
+
+    def test_full_refresh_drops_canvases_without_interactions(self):
+        refresh_similar_canvases(k=5)
+        c = self.canvases[2]
+        db.session.execute(db.delete(StitchList).where(StitchList.canvas_id == c.id))
+        db.session.commit()
+        refresh_similar_canvases(k=5)
+        self.assertEqual(self.titles(c), [])
+        self.assertEqual(self.titles(self.canvases[0]), ['Canvas B'])
+
+    def test_refresh_retires_cached_recommendations(self):
+        a, _, _, d, _ = self.canvases
+        refresh_similar_canvases(k=5)
+        versions = dict(db.session.execute(db.select(Canvas.id, Canvas.version)).all())
+        self.assertGreater(versions[a.id], 0)
+        self.assertEqual(versions[d.id], 0)
+
+    def test_canvas_page_shows_recommendations(self):
+        refresh_similar_canvases()
+        html = self.app.test_client().get(f'/canvas/{self.canvases[2].id}').get_data(as_text=True)
+        self.assertIn('Stitchers also liked', html)
+        self.assertIn('Canvas A', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
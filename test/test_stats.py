@@ -0,0 +1,114 @@
+from app import db
+from app.instrumentation import capture_queries
+from app.models import (User, Artist, ArtistStats, Canvas, CanvasStats, CanvasVote, Comment, JobState,
+                        StatsChange, StitchList)
+from app.stats import rebuild_stats, refresh_stats
+from test import AppTestCase
+
+
+class TestCatalogStats(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.users = [User(username=f'user{i}', email=f'user{i}@example.com', password='pw') for i in range(3)]
+        self.artists = [Artist(name='First'), Artist(name='Second')]
+        db.session.add_all(self.users + self.artists)
+        db.session.flush()
+        self.canvases = [Canvas(title=f'Canvas {i}', artist_id=self.artists[0].id) for i in range(2)]
+        db.session.add_all(self.canvases)
+        db.session.flush()
+        a, b = self.canvases
+        # user0 stitches both of the first artist's canvases, so counts once as their stitcher
+        db.session.add_all([StitchList(user_id=self.users[0].id, canvas_id=a.id, status='Completed'),
+                            StitchList(user_id=self.users[0].id, canvas_id=b.id, status='In Progress'),
+                            StitchList(user_id=self.users[1].id, canvas_id=a.id, status='Want to Stitch'),
+                            CanvasVote(user_id=self.users[0].id, canvas_id=a.id, vote=1),
+                            CanvasVote(user_id=self.users[1].id, canvas_id=a.id, vote=1),
+                            CanvasVote(user_id=self.users[2].id, canvas_id=b.id, vote=-1),
+                            Comment(content='Nice', user_id=self.users[2].id, canvas_id=b.id)])
+        db.session.commit()
+
+    def canvas_stats(self, canvas):
+        stats = db.session.get(CanvasStats, canvas.id)
+        return stats and (stats.artist_id, stats.score, stats.stitchers, stats.comments)
+
+    def artist_stats(self, artist):
+        stats = db.session.get(ArtistStats, artist.id)
+        return stats and (stats.canvases, stats.score, stats.stitchers, stats.comments)
+
+    def test_rebuild_computes_every_row_and_empties_the_journal(self):
+        self.assertEqual(rebuild_stats(), (2, 2))
+        a, b = self.canvases
+        self.assertEqual(self.canvas_stats(a), (self.artists[0].id, 2, 2, 0))
+        self.assertEqual(self.canvas_stats(b), (self.artists[0].id, -1, 1, 1))
+        self.assertEqual(self.artist_stats(self.artists[0]), (2, 1, 2, 1))
+        self.assertEqual(self.artist_stats(self.artists[1]), (0, 0, 0, 0))
+        self.assertEqual(db.session.scalar(db.select(db.func.count()).select_from(StatsChange)), 0)
+
+    def test_refresh_only_recomputes_journaled_canvases(self):
+        refresh_stats()  # no previous run: full rebuild
+        self.assertEqual(refresh_stats(), (0, 0))
+
+        a, b = self.canvases
+        db.session.add_all([CanvasVote(user_id=self.users[2].id, canvas_id=a.id, vote=1),
+                            Comment(content='Lovely', user_id=self.users[1].id, canvas_id=a.id)])
+        db.session.commit()
+        self.assertEqual(refresh_stats(), (1, 1))
+        self.assertEqual(self.canvas_stats(a), (self.artists[0].id, 3, 2, 1))
+        self.assertEqual(self.artist_stats(self.artists[0]), (2, 2, 2, 2))
+
+    def test_refresh_follows_moves_removals_and_deletes(self):
+        rebuild_stats()
+        a, b = self.canvases
+        b.artist_id = self.artists[1].id
+        db.session.execute(db.delete(StitchList).where(StitchList.user_id == self.users[1].id))
+        db.session.commit()
+        self.assertEqual(refresh_stats(), (2, 2))
+        self.assertEqual(self.artist_stats(self.artists[0]), (1, 2, 1, 0))
+        self.assertEqual(self.artist_stats(self.artists[1]), (1, -1, 1, 1))
+
+        db.session.delete(b)
+        db.session.commit()
+        refresh_stats()
+        self.assertIsNone(self.canvas_stats(b))
+        self.assertEqual(self.artist_stats(self.artists[1]), (0, 0, 0, 0))
+
+    def test_rebuild_in_chunks_replaces_rows_range_by_range(self):
+        rebuild_stats()
+        a, b = self.canvases
+        db.session.delete(b)
+        db.session.commit()
+        self.assertEqual(rebuild_stats(chunk_size=1), (1, 2))
+        self.assertEqual(self.canvas_stats(a), (self.artists[0].id, 2, 2, 0))
+        self.assertIsNone(self.canvas_stats(b))
+        self.assertEqual(self.artist_stats(self.artists[0]), (1, 2, 2, 0))
+
+    def test_refresh_commits_each_chunk_with_its_high_water_mark(self):
+        rebuild_stats()
+        a, b = self.canvases
+        for canvas in (a, b, a):
+            db.session.add(Comment(content='Again', user_id=self.users[0].id, canvas_id=canvas.id))
+            db.session.commit()
+        journal = db.session.scalars(db.select(StatsChange.seq).order_by(StatsChange.seq)).all()
+
+        chunks = []
+        def progress(done, total):
+            chunks.append((db.session().in_transaction(), done, total,
+                           db.session.get(JobState, 'catalog_stats').state['seq']))
+        self.assertEqual(refresh_stats(chunk_size=1, progress=progress), (2, 1))
+        self.assertEqual(chunks, [(False, i + 1, 3, seq) for i, seq in enumerate(journal)])
+        self.assertEqual(self.canvas_stats(a)[3], 2)
+
+    def test_artist_pages_read_stats_without_scanning_relationships(self):
+        rebuild_stats()
+        client = self.app.test_client()
+        with capture_queries() as log:
+            html = client.get('/artists').get_data(as_text=True)
+        self.assertEqual(log.count, 1)
+        self.assertIn('2 canvases', html)
+        self.assertIn('2 stitchers', html)
+
+        html = client.get(f'/artist/{self.artists[0].id}').get_data(as_text=True)
+        self.assertIn('score 2', html)
+        self.assertIn('1 comments', html)
@@ -0,0 +1,69 @@
+import unittest
+from flask import g
+from app import db
+from app.instrumentation import capture_queries
+from app.models import User, Artist, Canvas, StitchList
+from app.stitch_lists import canvas_stitch_counts, user_stitch_counts
+from test import AppTestCase
+
+
+class TestStitchLists(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.users = [User(username=f'user{i}', email=f'user{i}@example.com', password='pw') for i in range(2)]
+        artist = Artist(name='Artist')
+        db.session.add_all(self.users + [artist])
+        db.session.flush()
+        self.canvases = [Canvas(title=f'Canvas {i}', artist_id=artist.id) for i in range(30)]
+        db.session.add_all(self.canvases)
+        db.session.commit()
+        self.ids = [canvas.id for canvas in self.canvases]
+        self.client = self.client_for(self.users[0])
+
+    def post(self, client=None, **data):
+        g.pop('_login_user', None)
+        return (client or self.client).post('/stitch_list', data=data, headers={'Accept': 'application/json'})
+
+    def test_bulk_add_status_and_remove_keep_counts(self):
+        response = self.post(action='add', status='Want to Stitch', canvas_id=self.ids[:20])
+        self.assertEqual(response.json['counts']['Want to Stitch'], 20)
+        self.post(action='status', status='In Progress', canvas_id=self.ids[:5])
+        self.post(action='remove', canvas_id=self.ids[15:25])
+
+        self.assertEqual(user_stitch_counts(self.users[0].id),
+                         {'Want to Stitch': 10, 'In Progress': 5, 'Completed': 0})
+        self.assertEqual(db.session.scalar(db.select(db.func.count()).select_from(StitchList)), 15)
+
+    def test_re_adding_upserts_instead_of_duplicating(self):
+        self.post(action='add', status='Want to Stitch', canvas_id=[self.ids[0]])
+        self.post(action='add', status='Completed', canvas_id=[self.ids[0]])
+        self.post(self.client_for(self.users[1]), action='add', status='Completed', canvas_id=[self.ids[0]])
+        self.assertEqual(canvas_stitch_counts(self.ids[0]), {'Want to Stitch': 0, 'In Progress': 0, 'Completed': 2})
+        self.assertEqual(StitchList.query.filter_by(user_id=self.users[0].id).count(), 1)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.post(action='add', status='Someday', canvas_id=[self.ids[0]]).status_code, 400)
+        self.assertEqual(self.post(action='explode', canvas_id=[self.ids[0]]).status_code, 400)
+        self.assertEqual(self.post(action='add', status='Completed', canvas_id=[999]).json['changed'], [])
+
+    def test_list_page_loads_canvases_eagerly(self):
+        self.post(action='add', status='In Progress', canvas_id=self.ids)
+        g.pop('_login_user', None)
+        with capture_queries() as log:
+            html = self.client.get('/stitch_list').get_data(as_text=True)
+        self.assertIn('Canvas 29', html)
+        self.assertIn('In Progress (30)', html)
+        # User, the page of entries with their canvases, and the counts
+        self.assertLessEqual(log.count, 3)
+
+    def test_canvas_page_shows_counts(self):
+        self.post(action='add', status='In Progress', canvas_id=[self.ids[0]])
+        g.pop('_login_user', None)
+        html = self.app.test_client().get(f'/canvas/{self.ids[0]}').get_data(as_text=True)
+        self.assertIn('1 stitcher: In Progress', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
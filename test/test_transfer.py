@@ -0,0 +1,88 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from app import db
+from app.models import Artist, Canvas, JobState
+from app.transfer import _checkpoint_name, export_records, import_records
+from test import AppTestCase
+
+
+class TestCatalogTransfer(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app.static_folder = os.path.join(self.tmp.name, 'static')
+        db.session.add(Artist(name='Existing Studio'))
+        db.session.commit()
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write_canvases_csv(self, rows):
+        Image.new('RGB', (300, 200), 'blue').save(self.path('rose.png'))
+        with open(self.path('canvases.csv'), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['title', 'description', 'artist', 'image'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return self.path('canvases.csv')
+
+    def test_imports_canvases_with_artists_and_images(self):
+        path = self.write_canvases_csv([
+            {'title': 'Rose', 'description': 'Red', 'artist': 'Existing Studio', 'image': 'rose.png'},
+            {'title': 'Fox', 'description': '', 'artist': 'New Studio', 'image': 'https://example.com/fox.jpg'},
+            {'title': 'Owl', 'description': '', 'artist': 'New Studio', 'image': 'missing.png'},
+        ])
+        progress = []
+        self.assertEqual(import_records('canvases', path, batch_size=2,
+                                        progress=lambda kind, done: progress.append(done)), 3)
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(Artist.query.count(), 2)
+
+        rose, fox, owl = Canvas.query.order_by(Canvas.id).all()
+        self.assertEqual(rose.artist.name, 'Existing Studio')
+        self.assertEqual(fox.artist_id, owl.artist_id)
+        self.assertTrue(os.path.exists(os.path.join(self.app.static_folder, rose.image_for('thumb').split('/static/')[1])))
+        self.assertEqual(fox.image_url, 'https://example.com/fox.jpg')
+        self.assertIsNone(owl.image_url)
+        self.assertIsNone(db.session.get(JobState, _checkpoint_name('canvases', path)))
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write_canvases_csv([{'title': f'Canvas {i}', 'description': '', 'artist': 'Existing Studio',
+                                         'image': ''} for i in range(5)])
+        # As if an earlier run committed the first three records and was interrupted
+        db.session.add(JobState(name=_checkpoint_name('canvases', path), state={'path': path, 'records': 3}))
+        db.session.commit()
+        self.assertEqual(import_records('canvases', path, batch_size=2), 2)
+        self.assertEqual([canvas.title for canvas in Canvas.query.order_by(Canvas.id)], ['Canvas 3', 'Canvas 4'])
+
+    def test_export_round_trips_through_import(self):
+        path = self.write_canvases_csv([{'title': 'Rose', 'description': 'Red', 'artist': 'Existing Studio',
+                                         'image': 'rose.png'}])
+        import_records('canvases', path)
+        exported = self.path('out/canvases.jsonl')
+        os.makedirs(os.path.dirname(exported))
+        self.assertEqual(export_records('canvases', exported, images_dir=self.path('out/images')), 1)
+
+        with open(exported) as f:
+            [record] = [json.loads(line) for line in f]
+        self.assertEqual((record['title'], record['artist']), ('Rose', 'Existing Studio'))
+        self.assertTrue(os.path.exists(self.path(f"out/images/{record['image']}")))
+
+        db.session.execute(db.delete(Canvas))
+        db.session.commit()
+        import_records('canvases', exported, images_dir=self.path('out/images'))
+        self.assertEqual(Canvas.query.one().image_url, f"/static/canvas_images/{record['image']}")
+
+
+if __name__ == '__main__':
+    unittest.main()
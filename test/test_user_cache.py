@@ -0,0 +1,53 @@
+import unittest
+from flask import g
+from app import db
+from app.instrumentation import capture_queries
+from app.models import User, get_user_cache, load_user
+from test import AppTestCase
+
+
+class TestUserCache(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.user = User(username='stitcher', email='stitcher@example.com', password='pw')
+        db.session.add(self.user)
+        db.session.commit()
+
+    def test_second_load_skips_the_database(self):
+        with self.app.test_request_context():
+            self.assertEqual(load_user(str(self.user.id)).username, 'stitcher')
+            with capture_queries() as log:
+                self.assertEqual(load_user(str(self.user.id)).username, 'stitcher')
+        self.assertEqual(log.count, 0)
+
+    def test_update_invalidates_cached_user(self):
+        with self.app.test_request_context():
+            load_user(str(self.user.id))
+            self.user.username = 'renamed'
+            db.session.commit()
+            self.assertEqual(load_user(str(self.user.id)).username, 'renamed')
+
+    def test_session_embedding_survives_an_empty_cache(self):
+        self.app.config['USER_SESSION_EMBED'] = True
+        client = self.client_for(self.user)
+        client.get('/artists')
+        get_user_cache().entries.clear()
+        g.pop('_login_user', None)
+
+        with capture_queries() as log:
+            response = client.get('/artists')
+        self.assertIn(b'Logout', response.data)
+        self.assertFalse([statement for statement, _ in log.statements if 'FROM user' in statement])
+
+    def test_revocations_are_forgotten_once_every_snapshot_has_expired(self):
+        cache = get_user_cache()
+        cache.invalidate([1, 2])
+        cache.revoked[1] -= cache.ttl + 1
+        cache.invalidate([3, 2])
+        self.assertEqual(list(cache.revoked), [3, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
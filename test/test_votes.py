@@ -0,0 +1,63 @@
+import unittest
+from app import db
+from app.commands import rebuild_vote_counts
+from app.models import Canvas, Comment, CanvasVote
+from app.votes import VoteBuffer
+from test import AppTestCase
+
+
+class TestVotes(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_canvas()
+        self.comment = Comment(content='Nice', user_id=self.user.id, canvas_id=self.canvas.id)
+        db.session.add(self.comment)
+        db.session.commit()
+
+        self.client = self.client_for(self.user)
+
+    def counts(self, model, target_id):
+        db.session.expire_all()
+        row = db.session.get(model, target_id)
+        return row.score, row.upvotes, row.downvotes
+
+    def test_canvas_vote_toggle_updates_counts(self):
+        self.client.post(f'/vote_canvas/{self.canvas.id}/up')
+        self.assertEqual(self.counts(Canvas, self.canvas.id), (1, 1, 0))
+        self.client.post(f'/vote_canvas/{self.canvas.id}/down')
+        self.assertEqual(self.counts(Canvas, self.canvas.id), (-1, 0, 1))
+        self.client.post(f'/vote_canvas/{self.canvas.id}/down')
+        self.assertEqual(self.counts(Canvas, self.canvas.id), (0, 0, 0))
+
+    def test_comment_vote_updates_counts(self):
+        self.client.post(f'/vote_comment/{self.comment.id}/up')
+        self.assertEqual(self.counts(Comment, self.comment.id), (1, 1, 0))
+
+    def test_json_vote_returns_new_counts(self):
+        response = self.client.post(f'/vote_canvas/{self.canvas.id}/up', headers={'Accept': 'application/json'})
+        self.assertEqual(response.json, {'score': 1, 'upvotes': 1, 'downvotes': 0, 'user_vote': 1})
+        response = self.client.post(f'/vote_comment/{self.comment.id}/down', headers={'Accept': 'application/json'})
+        self.assertEqual(response.json, {'score': -1, 'upvotes': 0, 'downvotes': 1, 'user_vote': -1})
+
+    def test_form_vote_still_redirects(self):
+        response = self.client.post(f'/vote_canvas/{self.canvas.id}/up')
+        self.assertEqual(response.status_code, 302)
+
+    def test_rebuild_vote_counts(self):
+        db.session.add(CanvasVote(user_id=self.user.id, canvas_id=self.canvas.id, vote=-1))
+        db.session.commit()
+        rebuild_vote_counts()
+        self.assertEqual(self.counts(Canvas, self.canvas.id), (-1, 0, 1))
+
+    def test_write_behind_buffer_applies_votes_in_order(self):
+        buffer = VoteBuffer(self.app, interval_ms=50)
+        buffer.queue.put((CanvasVote, {'user_id': self.user.id, 'canvas_id': self.canvas.id, 'vote': 1}))
+        buffer.queue.put((CanvasVote, {'user_id': self.user.id, 'canvas_id': self.canvas.id, 'vote': 1}))
+        buffer.queue.put((CanvasVote, {'user_id': self.user.id, 'canvas_id': self.canvas.id, 'vote': -1}))
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(self.counts(Canvas, self.canvas.id), (-1, 0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
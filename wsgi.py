@@ -0,0 +1,7 @@
+from app import create_app
+
+# Works served directly or from a forking server; with gunicorn --preload each forked worker
+# drops the master's DB connections. The 'flask db' commands aren't needed here, so
+# Flask-Migrate is never imported. Live-update streams need threaded workers; see gunicorn.conf.py
+CONFIG = {'PRELOAD_SAFE': True, 'DB_MIGRATIONS': False}
+app = create_app(CONFIG)